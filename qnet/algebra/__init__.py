@@ -19,10 +19,13 @@
 
 import qnet.algebra.operator_algebra
 import qnet.algebra.circuit_algebra
+import qnet.algebra.context_vars
 import qnet.algebra.hilbert_space_algebra
+import qnet.algebra.instance_cache
 import qnet.algebra.matrix_algebra
 import qnet.algebra.operator_algebra
 import qnet.algebra.ordering
+import qnet.algebra.parallel
 import qnet.algebra.pattern_matching
 import qnet.algebra.permutations
 import qnet.algebra.singleton
@@ -33,8 +36,10 @@ import qnet.algebra.scalar_types
 from .abstract_algebra import *
 from .circuit_algebra import *
 from .hilbert_space_algebra import *
+from .instance_cache import *
 from .matrix_algebra import *
 from .operator_algebra import *
+from .parallel import *
 from .state_algebra import *
 from .super_operator_algebra import *
 from .pattern_matching import *
@@ -47,8 +52,10 @@ __all__ = _combine_all(
     'qnet.algebra.abstract_algebra',
     'qnet.algebra.circuit_algebra',
     'qnet.algebra.hilbert_space_algebra',
+    'qnet.algebra.instance_cache',
     'qnet.algebra.matrix_algebra',
     'qnet.algebra.operator_algebra',
+    'qnet.algebra.parallel',
     'qnet.algebra.state_algebra',
     'qnet.algebra.super_operator_algebra',
     'qnet.algebra.scalar_types',
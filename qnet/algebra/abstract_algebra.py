@@ -30,29 +30,58 @@ See :ref:`abstract_algebra` for design details and usage.
 from abc import ABCMeta, abstractproperty
 from contextlib import contextmanager
 from copy import copy
-from functools import reduce
 from collections import OrderedDict
+from time import perf_counter
 import logging
-
+import struct
+import sys
+import threading
+import weakref
+
+try:
+    from hashlib import blake2b
+except ImportError:  # Python < 3.6
+    from pyblake2 import blake2b
+
+from numpy import ndarray, generic as np_generic, empty as np_empty
+import sympy
 from sympy import Basic as SympyBasic
+from sympy.core.function import AppliedUndef
+from sympy.core.singleton import Singleton as SympySingleton
 from sympy.core.sympify import SympifyError
 
 from .pattern_matching import (
-    ProtoExpr, match_pattern, wc, pattern_head, Pattern, pattern)
+    ProtoExpr, wc, pattern_head, Pattern, pattern)
 from .singleton import Singleton
+from .instance_cache import InstanceCache
+from .context_vars import ContextVar
 
 __all__ = [
     'AlgebraException', 'AlgebraError', 'CannotSimplify',
-    'WrongSignatureError', 'Expression', 'Operation', 'all_symbols',
-    'extra_binary_rules', 'extra_rules', 'no_instance_caching', 'no_rules',
-    'set_union', 'simplify', 'substitute', 'temporary_instance_cache']
+    'WrongSignatureError', 'Expression', 'Operation', 'CreateStatistics',
+    'all_symbols', 'create_statistics', 'extra_binary_rules', 'extra_rules',
+    'hash_consing', 'no_instance_caching', 'no_rules',
+    'set_instance_cache', 'set_union', 'simplify', 'structural_digest',
+    'substitute', 'temporary_instance_cache']
 
 __private__ = [  # anything not in __all__ must be in __private__
     'assoc', 'idem', 'orderby', 'filter_neutral', 'match_replace',
     'match_replace_binary', 'cache_attr', 'check_idempotent_create',
     'check_rules_dict']
 
-LEVEL = 0  # for debugging create method
+_LEVEL = ContextVar('LEVEL', default=0)  # for debugging create method
+
+# CreateStatistics instance, if collecting statistics
+_CREATE_STATS = ContextVar('CREATE_STATS', default=None)
+
+# map (cls, name) -> value of class attributes that are overridden in the
+# current context (see _ContextAttribute). The dict is never modified in place
+_OVERRIDES = ContextVar('OVERRIDES', default={})
+_OVERRIDES_LOCK = threading.Lock()
+
+# canonical instances of all hash-consed expressions, by instance key
+_HASH_CONS = weakref.WeakValueDictionary()
+_HASH_CONS_LOCK = threading.Lock()
 
 LOG = True  # emit debug logging messages?
 # TODO: test if `LOG = False` results in significant performance increase. If
@@ -101,6 +130,69 @@ class WrongSignatureError(AlgebraError):
     pass
 
 
+class _ContextAttribute():
+    """Descriptor for a class attribute whose `value` may be overridden within
+    the current context (thread, or asyncio task), see :func:`_override`.
+
+    An override for a class applies to all of its subclasses, unless a
+    subclass is closer to the class on which the attribute is defined, and has
+    an override of its own.
+    """
+
+    def __init__(self, value):
+        self.value = value
+        self.owner = None
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __get__(self, instance, cls):
+        overrides = _OVERRIDES.get()
+        if overrides:
+            name = self.name
+            for klass in cls.__mro__:
+                try:
+                    return overrides[(klass, name)]
+                except KeyError:
+                    if klass is self.owner:
+                        break
+        return self.value
+
+
+def _context_attribute(cls, name):
+    """Return the :class:`_ContextAttribute` through which `cls` obtains the
+    class attribute `name`, converting a plain class attribute if necessary"""
+    with _OVERRIDES_LOCK:
+        for klass in cls.__mro__:
+            if name in klass.__dict__:
+                attr = klass.__dict__[name]
+                if not isinstance(attr, _ContextAttribute):
+                    attr = _ContextAttribute(attr)
+                    attr.__set_name__(klass, name)
+                    setattr(klass, name, attr)
+                return attr
+    raise AttributeError(
+        "type object %r has no attribute %r" % (cls.__name__, name))
+
+
+@contextmanager
+def _override(cls, **attrs):
+    """Context manager that overrides the given class attributes of `cls`
+    within the current context only. Other threads (and asyncio tasks) are not
+    affected"""
+    overrides = dict(_OVERRIDES.get())
+    for name, value in attrs.items():
+        _context_attribute(cls, name)
+        overrides[(cls, name)] = value
+    token = _OVERRIDES.set(overrides)
+    try:
+        yield
+    finally:
+        _OVERRIDES.reset(token)
+
+
 class Expression(metaclass=ABCMeta):
     """Abstract class for QNET Expressions. All algebraic objects are either
     scalars (numbers or Sympy expressions) or instances of Expression.
@@ -125,7 +217,27 @@ class Expression(metaclass=ABCMeta):
     Class attributes:
         instance_caching (bool):  Flag to indicate whether the `create` class
             method should cache the instantiation of instances
+        hash_consing (bool): Flag to indicate whether the `create` class
+            method should return the canonical instance for every expression,
+            see :func:`hash_consing`
+
+    The instances are cached in the `_instances` class attribute, which by
+    default is an unbounded
+    :class:`~qnet.algebra.instance_cache.InstanceCache` shared by all
+    subclasses. See :func:`set_instance_cache` for installing a different
+    cache backend.
+
+    Expressions may be created concurrently from several threads. The context
+    managers that temporarily change the flags, the instance cache, or the
+    rules of a class (e.g. :func:`no_instance_caching`,
+    :func:`temporary_instance_cache`, :func:`extra_rules`) only take effect in
+    the thread (or asyncio task) in which they are entered.
     """
+
+    __slots__ = (
+        '_hash', '_instance_key', '_interned', '_symbols', '_digest',
+        '__weakref__')
+
     # Note: all subclasses of Exression that override `__init__` or `create`
     # *must* call the corresponding superclass method *at the end*. Otherwise,
     # caching will not work correctly
@@ -133,8 +245,9 @@ class Expression(metaclass=ABCMeta):
     _simplifications = []
 
     # we cache all instances of Expressions for fast construction
-    _instances = {}
-    instance_caching = True
+    _instances = _ContextAttribute(InstanceCache())
+    instance_caching = _ContextAttribute(True)
+    hash_consing = _ContextAttribute(False)
 
     # eventually, we should ensure that the create method is idempotent, i.e.
     # expr.create(*expr.args, **expr.kwargs) == expr(*expr.args, **expr.kwargs)
@@ -146,6 +259,7 @@ class Expression(metaclass=ABCMeta):
         # hash, tex, and repr str, generated on demand (lazily) -- see also
         # _cached_rendering class attribute
         self._hash = None
+        self._interned = False
         self._instance_key = self._get_instance_key(args, kwargs)
 
     @classmethod
@@ -156,63 +270,84 @@ class Expression(metaclass=ABCMeta):
         appropriate object (which may or may not be an instance of the original
         class)
         """
-        global LEVEL
         if LOG:
+            level = _LEVEL.get()
             logger = logging.getLogger(__name__ + '.create')
             logger.debug(
                 "%s%s.create(*args, **kwargs); args = %s, kwargs = %s",
-                ("  " * LEVEL), cls.__name__, args, kwargs)
-            LEVEL += 1
+                ("  " * level), cls.__name__, args, kwargs)
+            _LEVEL.set(level + 1)
+        stats = _CREATE_STATS.get()
+        instance_caching = cls.instance_caching
+        hash_consing = cls.hash_consing
+        instances = cls._instances
         key = cls._get_instance_key(args, kwargs)
         try:
-            if cls.instance_caching:
-                instance = cls._instances[key]
+            if instance_caching:
+                instance = instances[key]
+                if stats is not None:
+                    stats._record_lookup(cls, hit=True)
+                if hash_consing:
+                    instance = _hash_cons(instance)
                 if LOG:
-                    LEVEL -= 1
-                    logger.debug("%s(cached)-> %s", ("  " * LEVEL), instance)
+                    _LEVEL.set(level)
+                    logger.debug("%s(cached)-> %s", ("  " * level), instance)
                 return instance
         except KeyError:
-            pass
+            if stats is not None:
+                stats._record_lookup(cls, hit=False)
         for i, simplification in enumerate(cls._simplifications):
             if LOG:
                 try:
                     simpl_name = simplification.__name__
                 except AttributeError:
                     simpl_name = "simpl%d" % i
-            simplified = simplification(cls, args, kwargs)
+            if stats is None:
+                simplified = simplification(cls, args, kwargs)
+            else:
+                t_start = perf_counter()
+                simplified = simplification(cls, args, kwargs)
+                stats._record_simplification(
+                    cls, simplification, i, perf_counter() - t_start)
             try:
                 args, kwargs = simplified
             except (TypeError, ValueError):
                 # We assume that if the simplification didn't return a tuple,
                 # the result is a fully instantiated object
-                if cls.instance_caching:
-                    cls._instances[key] = simplified
-                if cls._create_idempotent and cls.instance_caching:
+                if hash_consing:
+                    simplified = _hash_cons(simplified)
+                if instance_caching:
+                    instances[key] = simplified
+                if cls._create_idempotent and instance_caching:
                     try:
                         key2 = simplified._instance_key
                         if key2 != key:
-                            cls._instances[key2] = simplified  # simplified key
+                            instances[key2] = simplified  # simplified key
                     except AttributeError:
                         #  simplified might e.g. be a scalar and not have
                         #  _instance_key
                         pass
                 if LOG:
-                    LEVEL -= 1
+                    _LEVEL.set(level)
                     logger.debug(
-                        "%s(%s)-> %s", ("  " * LEVEL), simpl_name, simplified)
+                        "%s(%s)-> %s", ("  " * level), simpl_name, simplified)
                 return simplified
         if len(kwargs) > 0:
             cls._has_kwargs = True
         instance = cls(*args, **kwargs)
-        if cls.instance_caching:
-            cls._instances[key] = instance
-        if cls._create_idempotent and cls.instance_caching:
+        if stats is not None:
+            stats._record_instantiation(cls)
+        if hash_consing:
+            instance = _hash_cons(instance)
+        if instance_caching:
+            instances[key] = instance
+        if cls._create_idempotent and instance_caching:
             key2 = cls._get_instance_key(args, kwargs)
             if key2 != key:
-                cls._instances[key2] = instance  # instantiated key
+                instances[key2] = instance  # instantiated key
         if LOG:
-            LEVEL -= 1
-            logger.debug("%s -> %s", ("  " * LEVEL), instance)
+            _LEVEL.set(level)
+            logger.debug("%s -> %s", ("  " * level), instance)
         return instance
 
     @classmethod
@@ -224,7 +359,8 @@ class Expression(metaclass=ABCMeta):
 
         Two expressions for which `expr._instance_key` is the same are
         identical by definition (although `expr1 is expr2` generally only holds
-        for explicit Singleton instances)
+        for explicit Singleton instances, or for hash-consed expressions, see
+        :func:`hash_consing`)
         """
         return (cls,) + tuple(args) + tuple(sorted(kwargs.items()))
 
@@ -253,9 +389,13 @@ class Expression(metaclass=ABCMeta):
         return self.kwargs
 
     def __eq__(self, other):
+        if self is other:
+            return True
         try:
-            return ((self is other) or
-                    (self._instance_key == other._instance_key))
+            if self._interned and other._interned:
+                # there is only one hash-consed instance for any expression
+                return False
+            return self._instance_key == other._instance_key
         except AttributeError:
             return False
 
@@ -264,6 +404,33 @@ class Expression(metaclass=ABCMeta):
             self._hash = hash(self._instance_key)
         return self._hash
 
+    def __reduce__(self):
+        # The expression is pickled as a table of its (unique)
+        # sub-expressions, see _dag_table. Unpickling re-creates them, instead
+        # of restoring the attributes (which would carry over the hash-consing
+        # status)
+        return (_load_dag, (_dag_table(self), ))
+
+    def structural_digest(self):
+        """Digest (:class:`bytes`) of the structure of the expression.
+
+        Unlike the :func:`hash` of an expression, the digest is the same in
+        every Python process (on any machine, and for any version of Python).
+        It may thus be used as a key for persistent caches. Equal expressions
+        have the same digest, unless some of their scalar arguments are equal
+        but of different type (e.g. ``1`` and ``1.0``). The digest is
+        calculated only once per instance, from the digests of the
+        sub-expressions.
+
+        Raises:
+            TypeError: if the expression contains arguments for which no
+                digest can be calculated (e.g. a Sympy ``Dummy``)
+        """
+        try:
+            return self._digest
+        except AttributeError:
+            return _structural_digest(self)
+
     def __repr__(self):
         # This method will be replaced by init_printing()
         from qnet.printing import init_printing
@@ -286,14 +453,9 @@ class Expression(metaclass=ABCMeta):
         return self._substitute(var_map)
 
     def _substitute(self, var_map):
-        if self in var_map:
-            return var_map[self]
-        if isinstance(self.__class__, Singleton):
-            return self
-        new_args = [substitute(arg, var_map) for arg in self.args]
-        new_kwargs = {key: substitute(val, var_map)
-                      for (key, val) in self.kwargs.items()}
-        return self.create(*new_args, **new_kwargs)
+        # Subclasses may override this method. The default implementation
+        # traverses the expression tree iteratively, see `_substitute_tree`
+        return _substitute_tree(self, var_map)
 
     def simplify(self, rules=None):
         """Recursively re-instantiate the expression, while applying all of the
@@ -303,27 +465,10 @@ class Expression(metaclass=ABCMeta):
             rules (list, OrderedDict): List of rules or dictionary mapping
                 names to rules, where each rule is a tuple
                 (Pattern, replacement callable)
+
+        See :func:`simplify`.
         """
-        if rules is None:
-            rules = {}
-        new_args = [simplify(arg, rules) for arg in self.args]
-        new_kwargs = {key: simplify(val, rules)
-                      for (key, val) in self.kwargs.items()}
-        simplified = self.create(*new_args, **new_kwargs)
-        try:
-            # `rules` is an OrderedDict key => (pattern, replacement)
-            items = rules.items()
-        except AttributeError:
-            # `rules` is a list of (pattern, replacement) tuples
-            items = enumerate(rules)
-        for key, (pat, replacement) in items:
-            matched = pat.match(simplified)
-            if matched:
-                try:
-                    return replacement(**matched)
-                except CannotSimplify:
-                    pass
-        return simplified
+        return simplify(self, rules)
 
     def _repr_latex_(self):
         """For compatibility with the IPython notebook, generate TeX expression
@@ -343,7 +488,21 @@ class Expression(metaclass=ABCMeta):
         raise SympifyError("QNET expressions cannot be converted to SymPy")
 
     def all_symbols(self):
-        """Set of all_symbols contained within the expression."""
+        """Set of all_symbols contained within the expression.
+
+        As expressions are immutable, the set is only calculated once per
+        instance, and returned as a :class:`frozenset`. Subclasses should
+        override :meth:`_all_symbols` instead of this method.
+        """
+        try:
+            return self._symbols
+        except AttributeError:
+            self._symbols = frozenset(self._all_symbols())
+            return self._symbols
+
+    def _all_symbols(self):
+        # Subclasses may override this method. The default implementation
+        # combines the (cached) sets of symbols of all arguments
         return set_union(*[all_symbols(op) for op in self.args])
 
     def __ne__(self, other):
@@ -357,6 +516,14 @@ class Expression(metaclass=ABCMeta):
         return NotImplemented
 
 
+if sys.version_info < (3, 6):
+    # Python 3.5 does not call __set_name__ for the class attributes
+    for (_name, _attr) in list(Expression.__dict__.items()):
+        if isinstance(_attr, _ContextAttribute):
+            _attr.__set_name__(Expression, _name)
+    del _name, _attr
+
+
 def _str_instance_key(key):
     """Format the key (Expression_instance_key result) as a slightly more
     readable string corresponding to the "create" call.
@@ -418,6 +585,55 @@ def substitute(expr, var_map):
         return expr
 
 
+def _children(expr):
+    """List of all args and kwargs values of `expr`"""
+    kwargs = expr.kwargs
+    if len(kwargs) == 0:
+        return list(expr.args)
+    return list(expr.args) + list(kwargs.values())
+
+
+def _substitute_tree(expr, var_map):
+    """Apply the default substitution algorithm to `expr`, without recursion.
+
+    The expression tree is traversed with an explicit stack. Every
+    sub-expression is processed only once, even if it occurs several times in
+    the tree. Sub-expressions whose class overrides
+    :meth:`Expression._substitute` are substituted through that method.
+    """
+    default_substitute = Expression._substitute
+    results = {}  # id(sub-expression) => substituted sub-expression
+    stack = [(expr, False)]
+    while len(stack) > 0:
+        node, children_done = stack.pop()
+        node_id = id(node)
+        if node_id in results:
+            continue
+        if children_done:
+            new_args = [
+                results[id(arg)] if isinstance(arg, Expression)
+                else substitute(arg, var_map) for arg in node.args]
+            new_kwargs = {
+                key: (results[id(val)] if isinstance(val, Expression)
+                      else substitute(val, var_map))
+                for (key, val) in node.kwargs.items()}
+            results[node_id] = node.create(*new_args, **new_kwargs)
+            continue
+        if node in var_map:
+            results[node_id] = var_map[node]
+        elif (node is not expr and
+                node.__class__._substitute is not default_substitute):
+            results[node_id] = node._substitute(var_map)
+        elif isinstance(node.__class__, Singleton):
+            results[node_id] = node
+        else:
+            stack.append((node, True))
+            for child in reversed(_children(node)):
+                if isinstance(child, Expression) and id(child) not in results:
+                    stack.append((child, False))
+    return results[id(expr)]
+
+
 def _simplify_expr(expr, rules=None):
     """Non-recursively match expr again all rules"""
     if rules is None:
@@ -469,64 +685,44 @@ def simplify(expr, rules=None):
         logger = logging.getLogger(__name__ + '.simplify')
     if rules is None:
         rules = {}
-    stack = []
-    path = []
-    if isinstance(expr, Expression):
-        stack.append(ProtoExpr.from_expr(expr))
-        path.append(0)
-        if LOG:
-            logger.debug(
-                "Starting at level 1: placing expr on stack: %s", expr)
-        while True:
-            i = path[-1]
-            try:
-                arg = stack[-1][i]
-                if LOG:
-                    logger.debug(
-                        "At level %d: considering arg %d: %s",
-                        len(stack), i+1, arg)
-            except IndexError:
-                # done at this level
-                path.pop()
-                expr = stack.pop().instantiate()
-                expr = _simplify_expr(expr, rules)
-                if len(stack) == 0:
-                    if LOG:
-                        logger.debug(
-                            "Complete level 1: returning simplified expr: %s",
-                            expr)
-                    return expr
-                else:
-                    stack[-1][path[-1]] = expr
-                    path[-1] += 1
-                    if LOG:
-                        logger.debug(
-                            "Complete level %d. At level %d, setting arg %d "
-                            "to simplified expr: %s", len(stack)+1, len(stack),
-                            path[-1], expr)
-            else:
-                if isinstance(arg, Expression):
-                    stack.append(ProtoExpr.from_expr(arg))
-                    path.append(0)
-                    if LOG:
-                        logger.debug("   placing arg on stack")
-                else:  # scalar
-                    stack[-1][i] = _simplify_expr(arg, rules)
-                    if LOG:
-                        logger.debug(
-                            "   arg is leaf, replacing with simplified expr: "
-                            "%s", stack[-1][i])
-                    path[-1] += 1
-    else:
+    if not isinstance(expr, Expression):
         return _simplify_expr(expr, rules)
+    # We traverse the expression tree with an explicit stack (not recursively),
+    # so that there is no limit on the depth of `expr`. Every sub-expression is
+    # only simplified once, even if it occurs several times in the tree.
+    results = {}  # id(sub-expression) => simplified sub-expression
+    stack = [(expr, False)]
+    while len(stack) > 0:
+        node, children_done = stack.pop()
+        node_id = id(node)
+        if node_id in results:
+            continue
+        if children_done:
+            new_args = [
+                results[id(arg)] if isinstance(arg, Expression)
+                else _simplify_expr(arg, rules) for arg in node.args]
+            new_kwargs = {
+                key: (results[id(val)] if isinstance(val, Expression)
+                      else _simplify_expr(val, rules))
+                for (key, val) in node.kwargs.items()}
+            simplified = _simplify_expr(
+                node.create(*new_args, **new_kwargs), rules)
+            if LOG:
+                logger.debug("Simplified %s -> %s", node, simplified)
+            results[node_id] = simplified
+        else:
+            stack.append((node, True))
+            for child in reversed(_children(node)):
+                if isinstance(child, Expression) and id(child) not in results:
+                    stack.append((child, False))
+    return results[id(expr)]
 
 
 def set_union(*sets):
     """Similar to ``sum()``, but for sets. Generate the union of an arbitrary
     number of set arguments.
     """
-    # TODO: can this be done with set.union?
-    return reduce(lambda a, b: a.union(b), sets, set(()))
+    return set().union(*sets)
 
 
 def all_symbols(expr):
@@ -537,6 +733,17 @@ def all_symbols(expr):
         return set(())
 
 
+def structural_digest(value):
+    """Return :meth:`Expression.structural_digest` for an expression, or an
+    equivalent digest for a scalar, or for a (possibly nested) tuple, list, or
+    dict of expressions and scalars"""
+    if _is_node(value):
+        return value.structural_digest()
+    out = bytearray(b'V')
+    _digest_encode(out, value, {})
+    return blake2b(bytes(out), digest_size=_DIGEST_SIZE).digest()
+
+
 class Operation(Expression, metaclass=ABCMeta):
     """Base class for all "operations", i.e. Expressions that act algebraically
     on other expressions (their "operands").
@@ -547,6 +754,8 @@ class Operation(Expression, metaclass=ABCMeta):
     must be given as keyword-arguments.
     """
 
+    __slots__ = ('_operands', )
+
     def __init__(self, *operands, **kwargs):
         self._operands = operands
         super().__init__(*operands, **kwargs)
@@ -576,8 +785,13 @@ def assoc(cls, ops, kwargs):
         >>> Plus.create(1,Plus(2,3))
         Plus(1, 2, 3)
     """
-    expanded = [(o,) if not isinstance(o, cls) else o.operands for o in ops]
-    return sum(expanded, ()), kwargs
+    expanded = []
+    for o in ops:
+        if isinstance(o, cls):
+            expanded.extend(o.operands)
+        else:
+            expanded.append(o)
+    return tuple(expanded), kwargs
 
 
 def idem(cls, ops, kwargs):
@@ -634,6 +848,122 @@ def filter_neutral(cls, ops, kwargs):
         return ops[0]
 
 
+_NO_RULE = object()  # memoized result for operands that match no rule
+
+
+class _RuleIndex():
+    """Index of the `rules` of a class (the `_rules` or `_binary_rules` class
+    attribute), for quickly finding the rules that may match a given list of
+    operands.
+
+    For every rule, the number of operands and the `head` for each operand is
+    extracted from the rule's pattern. The candidate rules for a given list of
+    operands are determined from the length of the list and the types of the
+    operands, and cached for each combination of types. The order of the
+    candidate rules is the same as in `rules`. The patterns of the candidate
+    rules are compiled (see
+    :meth:`~qnet.algebra.pattern_matching.Pattern.compile`).
+
+    The `memo` attribute is a bounded
+    :class:`~qnet.algebra.instance_cache.InstanceCache` that
+    :func:`match_replace_binary` uses to store the result of the binary rules
+    for pairs of operands. As it is part of the index, it is discarded
+    whenever the rules change.
+    """
+
+    _max_signatures = 4096  # max number of cached candidate lists
+    memo_maxsize = 10000  # max number of memoized results for operand pairs
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.n_rules = len(rules)
+        # For binary rules: map of operand pairs (with their types) to the
+        # result of the rule application (or _NO_RULE)
+        self.memo = InstanceCache(
+            maxsize=self.memo_maxsize, pin_singletons=False)
+        self._entries = []  # (n_args, min_args, heads, rule)
+        for key, (pat, replacement) in rules.items():
+            n_args, min_args, heads = self._analyze_pattern(pat)
+            self._entries.append(
+                (n_args, min_args, heads, (key, pat.compile(), replacement)))
+        self._candidates = {}
+
+    @staticmethod
+    def _analyze_pattern(pat):
+        """Return a tuple (n_args, min_args, heads) for the given
+        :func:`~qnet.algebra.pattern_matching.pattern_head`. If the pattern
+        matches an exact number of operands, `n_args` is that number and
+        `heads` is a tuple of the required type(s) for each operand (None for
+        any type). Otherwise, `n_args` and `heads` are None, and `min_args` is
+        the minimum number of operands."""
+        if pat.args is None:
+            return None, 0, None
+        if pat._has_non_single_arg:
+            min_args = 0
+            for arg in pat.args:
+                if (not isinstance(arg, Pattern) or
+                        arg.mode in (Pattern.single, Pattern.one_or_more)):
+                    min_args += 1
+            return None, min_args, None
+        heads = tuple(
+            [arg.head if isinstance(arg, Pattern) else None
+             for arg in pat.args])
+        return len(heads), len(heads), heads
+
+    def is_valid(self, rules):
+        """Check whether the index is (still) valid for `rules`"""
+        return rules is self.rules and len(rules) == self.n_rules
+
+    def candidates(self, ops):
+        """List of (key, matcher, replacement) tuples for all rules that may
+        match the given list of operands, where `matcher` is the compiled
+        pattern of the rule"""
+        signature = tuple([op.__class__ for op in ops])
+        try:
+            return self._candidates[signature]
+        except KeyError:
+            pass
+        n = len(ops)
+        result = []
+        for (n_args, min_args, heads, rule) in self._entries:
+            if n_args is None:
+                if n >= min_args:
+                    result.append(rule)
+            elif n == n_args:
+                for (op, head) in zip(ops, heads):
+                    if head is not None and not isinstance(op, head):
+                        break
+                else:
+                    result.append(rule)
+        if len(self._candidates) >= self._max_signatures:
+            self._candidates.clear()
+        self._candidates[signature] = result
+        return result
+
+
+# map id(rules) -> _RuleIndex. As the index references the rules, the id
+# remains valid for as long as the index is stored
+_RULE_INDICES = {}
+_RULE_INDICES_LOCK = threading.Lock()
+_MAX_RULE_INDICES = 256
+
+
+def _rule_index(cls, attr):
+    """Return a valid :class:`_RuleIndex` for the rules in the class attribute
+    `attr` (``'_rules'`` or ``'_binary_rules'``) of `cls`. As the rules may be
+    overridden in the current context (e.g. by :func:`extra_rules`), indices
+    are stored for each rules dict, not for each class."""
+    rules = getattr(cls, attr)
+    index = _RULE_INDICES.get(id(rules))
+    if index is None or not index.is_valid(rules):
+        index = _RuleIndex(rules)
+        with _RULE_INDICES_LOCK:
+            if len(_RULE_INDICES) >= _MAX_RULE_INDICES:
+                del _RULE_INDICES[next(iter(_RULE_INDICES))]  # oldest
+            _RULE_INDICES[id(rules)] = index
+    return index
+
+
 def match_replace(cls, ops, kwargs):
     """Match and replace a full operand specification to a function that
     provides a replacement for the whole expression
@@ -682,16 +1012,17 @@ def match_replace(cls, ops, kwargs):
     expr = ProtoExpr(ops, kwargs)
     if LOG:
         logger = logging.getLogger(__name__ + '.create')
-    for key, rule in cls._rules.items():
-        pat, replacement = rule
-        match_dict = match_pattern(pat, expr)
-        if match_dict:
+    candidates = _rule_index(cls, '_rules').candidates(ops)
+    for key, matcher, replacement in candidates:
+        match_dict = matcher(expr)
+        if match_dict is not None:
             try:
                 replaced = replacement(**match_dict)
                 if LOG:
                     logger.debug(
-                        "%sRule %s.%s: (%s, %s) -> %s", ("  " * (LEVEL)),
-                        cls.__name__, key, expr.args, expr.kwargs, replaced)
+                        "%sRule %s.%s: (%s, %s) -> %s",
+                        ("  " * _LEVEL.get()), cls.__name__, key, expr.args,
+                        expr.kwargs, replaced)
                 return replaced
             except CannotSimplify:
                 continue
@@ -701,22 +1032,45 @@ def match_replace(cls, ops, kwargs):
 
 def _get_binary_replacement(first, second, cls):
     """Helper function for match_replace_binary"""
+    index = _rule_index(cls, '_binary_rules')
+    use_memo = cls.instance_caching
+    if use_memo:
+        memo_key = (first.__class__, first, second.__class__, second)
+        try:
+            replaced = index.memo[memo_key]
+            if replaced is _NO_RULE:
+                return None
+            if LOG:
+                logger = logging.getLogger(__name__ + '.create')
+                logger.debug(
+                    "%sRule %s.(memo): (%s, %s) -> %s",
+                    ("  " * _LEVEL.get()), cls.__name__, [first, second], {},
+                    replaced)
+            return replaced
+        except KeyError:
+            pass
+        except TypeError:  # unhashable operands
+            use_memo = False
     expr = ProtoExpr([first, second], {})
     if LOG:
         logger = logging.getLogger(__name__ + '.create')
-    for key, rule in cls._binary_rules.items():
-        pat, replacement = rule
-        match_dict = match_pattern(pat, expr)
-        if match_dict:
+    for key, matcher, replacement in index.candidates(expr.args):
+        match_dict = matcher(expr)
+        if match_dict is not None:
             try:
                 replaced = replacement(**match_dict)
                 if LOG:
                     logger.debug(
-                        "%sRule %s.%s: (%s, %s) -> %s", ("  " * (LEVEL)),
-                        cls.__name__, key, expr.args, expr.kwargs, replaced)
+                        "%sRule %s.%s: (%s, %s) -> %s",
+                        ("  " * _LEVEL.get()), cls.__name__, key, expr.args,
+                        expr.kwargs, replaced)
+                if use_memo:
+                    index.memo[memo_key] = replaced
                 return replaced
             except CannotSimplify:
                 continue
+    if use_memo:
+        index.memo[memo_key] = _NO_RULE
     return None
 
 
@@ -760,35 +1114,32 @@ def match_replace_binary(cls, ops, kwargs):
 
 
 def _match_replace_binary(cls, ops: list) -> list:
-    """Reduce list of `ops`"""
-    n = len(ops)
-    if n <= 1:
-        return ops
-    ops_left = ops[:n // 2]
-    ops_right = ops[n // 2:]
-    return _match_replace_binary_combine(
-        cls,
-        _match_replace_binary(cls, ops_left),
-        _match_replace_binary(cls, ops_right))
-
-
-def _match_replace_binary_combine(cls, a: list, b: list) -> list:
-    """combine two fully reduced lists a, b"""
-    if len(a) == 0 or len(b) == 0:
-        return a + b
-    r = _get_binary_replacement(a[-1], b[0], cls)
-    if r is None:
-        return a + b
-    if r == cls.neutral_element:
-        return _match_replace_binary_combine(cls, a[:-1], b[1:])
-    if isinstance(r, cls):
-        r = list(r.args)
-    else:
-        r = [r, ]
-    return _match_replace_binary_combine(
-        cls,
-        _match_replace_binary_combine(cls, a[:-1], r),
-        b[1:])
+    """Reduce list of `ops`
+
+    The operands are processed from left to right: each operand is combined
+    with the last element of the fully reduced list. If a binary rule applies,
+    the result of the rule takes the place of both operands and is combined
+    again with the (new) last element of the reduced list. This requires a
+    linear number of steps, without any recursion.
+    """
+    neutral_element = cls.neutral_element
+    reduced = []
+    pending = list(reversed(ops))  # next operand to process is at the end
+    while len(pending) > 0:
+        op = pending.pop()
+        if len(reduced) > 0:
+            r = _get_binary_replacement(reduced[-1], op, cls)
+            if r is not None:
+                reduced.pop()
+                if r == neutral_element:
+                    continue
+                if isinstance(r, cls):
+                    pending.extend(reversed(r.args))
+                else:
+                    pending.append(r)
+                continue
+        reduced.append(op)
+    return reduced
 
 
 ###############################################################################
@@ -853,82 +1204,643 @@ def check_rules_dict(rules):
     return OrderedDict(rules)
 
 
+class CreateStatistics:
+    """Collector of statistics about calls to :meth:`Expression.create`.
+
+    For every class, the following is recorded:
+
+    * the number of lookups in the instance cache that succeeded ('hits') or
+      failed ('misses')
+    * the number of times the class was actually instantiated
+      ('instantiations'), i.e. no simplification returned a final result
+    * for every entry in the `_simplifications` list of the class, the number
+      of times it was called ('calls') and the cumulative time spent in it
+      ('time', in seconds). The time is inclusive, i.e., it includes any
+      nested calls to `create` that the simplification triggers.
+
+    Statistics are only collected while the collector is active, see
+    :func:`create_statistics`.
+    """
+
+    def __init__(self):
+        self._data = {}
+
+    def _class_stats(self, cls):
+        try:
+            return self._data[cls]
+        except KeyError:
+            cls_stats = {
+                'hits': 0, 'misses': 0, 'instantiations': 0,
+                'simplifications': OrderedDict()}
+            self._data[cls] = cls_stats
+            return cls_stats
+
+    def _record_lookup(self, cls, hit):
+        cls_stats = self._class_stats(cls)
+        if hit:
+            cls_stats['hits'] += 1
+        else:
+            cls_stats['misses'] += 1
+
+    def _record_instantiation(self, cls):
+        self._class_stats(cls)['instantiations'] += 1
+
+    def _record_simplification(self, cls, simplification, i, time):
+        simpl_stats = self._class_stats(cls)['simplifications']
+        try:
+            name = simplification.__name__
+        except AttributeError:
+            name = "simpl%d" % i
+        try:
+            entry = simpl_stats[name]
+        except KeyError:
+            entry = {'calls': 0, 'time': 0.0}
+            simpl_stats[name] = entry
+        entry['calls'] += 1
+        entry['time'] += time
+
+    def reset(self):
+        """Discard all collected statistics"""
+        self._data.clear()
+
+    def snapshot(self):
+        """Return a copy of the collector in its current state, which is not
+        affected by any further calls to `create`"""
+        new = self.__class__()
+        for cls, cls_stats in self._data.items():
+            new_cls_stats = dict(cls_stats)
+            new_cls_stats['simplifications'] = OrderedDict(
+                [(name, dict(entry)) for (name, entry)
+                 in cls_stats['simplifications'].items()])
+            new._data[cls] = new_cls_stats
+        return new
+
+    def as_dict(self):
+        """Export the statistics as a (nested) dict, with the fully qualified
+        class names (``module.QualName``) as keys. The value for each class is a dict with keys 'hits', 'misses',
+        'instantiations', 'time' (total time spent in simplifications), and
+        'simplifications'. The latter maps the name of each simplification to
+        a dict with the keys 'calls' and 'time'."""
+        result = {}
+        for cls, cls_stats in self.snapshot()._data.items():
+            cls_stats['time'] = sum(
+                entry['time'] for entry
+                in cls_stats['simplifications'].values())
+            result[cls.__module__ + '.' + cls.__qualname__] = cls_stats
+        return result
+
+    def __repr__(self):
+        return "<%s for %d classes>" % (
+            self.__class__.__name__, len(self._data))
+
+
+@contextmanager
+def create_statistics(stats=None):
+    """Collect statistics about calls to :meth:`Expression.create` within the
+    managed context. The context manager yields the active
+    :class:`CreateStatistics` instance (`stats`, or a new instance if `stats`
+    is None)::
+
+        >>> from qnet.algebra.operator_algebra import (
+        ...     OperatorSymbol, OperatorPlus)
+        >>> A = OperatorSymbol('A', hs=0)
+        >>> B = OperatorSymbol('B', hs=0)
+        >>> with temporary_instance_cache(OperatorPlus):
+        ...     with create_statistics() as stats:
+        ...         expr = A * B + B * A
+        >>> data = stats.as_dict()
+        >>> key = 'qnet.algebra.operator_algebra.OperatorPlus'
+        >>> data[key]['misses']
+        1
+        >>> data[key]['simplifications']['assoc']['calls']
+        1
+
+    Outside of the context, no statistics are collected, and there is no
+    overhead. Statistics are only collected for the thread (or asyncio task)
+    in which the context is entered.
+    """
+    if stats is None:
+        stats = CreateStatistics()
+    token = _CREATE_STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        _CREATE_STATS.reset(token)
+
+
+def _instantiate(cls, args, kwargs):
+    """Instantiate an (unpickled) expression"""
+    instance = cls(*args, **kwargs)
+    if cls.hash_consing:
+        instance = _hash_cons(instance)
+    return instance
+
+
+class _NodeRef():
+    """Reference to the node with the given `index` in a :func:`_dag_table`"""
+
+    __slots__ = ('index', )
+
+    def __init__(self, index):
+        self.index = index
+
+    def __reduce__(self):
+        return (_NodeRef, (self.index, ))
+
+
+class _NodeArray():
+    """Numpy object array (e.g. the elements of a
+    :class:`~qnet.algebra.matrix_algebra.Matrix`) in a :func:`_dag_table`,
+    with the given `shape` and (encoded) flat list of `items`"""
+
+    __slots__ = ('shape', 'items')
+
+    def __init__(self, shape, items):
+        self.shape = shape
+        self.items = items
+
+    def __reduce__(self):
+        return (_NodeArray, (self.shape, self.items))
+
+
+def _is_node(value):
+    """Whether `value` is stored as a node in a :func:`_dag_table`. Singletons
+    are pickled by name, instead"""
+    return (isinstance(value, Expression) and
+            not isinstance(value.__class__, Singleton))
+
+
+def _dag_children(value):
+    """Iterate over all expressions that are nodes in the (possibly nested)
+    arguments `value`"""
+    if _is_node(value):
+        yield value
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _dag_children(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _dag_children(item)
+    elif isinstance(value, ndarray) and value.dtype == object:
+        for item in value.flat:
+            yield from _dag_children(item)
+
+
+def _dag_encode(value, refs):
+    """Replace all expressions in the (possibly nested) arguments `value` by
+    their :class:`_NodeRef` in `refs`. Return the encoded value, and a hashable
+    key for it (None, if `value` is not hashable)"""
+    if _is_node(value):
+        ref = refs[id(value)]
+        return ref, ref
+    elif isinstance(value, (tuple, list)):
+        encoded, keys = [], []
+        for item in value:
+            enc_item, key = _dag_encode(item, refs)
+            encoded.append(enc_item)
+            keys.append(key)
+        if None in keys:
+            keys = None
+        else:
+            keys = (value.__class__, tuple(keys))
+        return value.__class__(encoded), keys
+    elif isinstance(value, dict):
+        encoded, keys = {}, []
+        for (name, item) in value.items():
+            encoded[name], key = _dag_encode(item, refs)
+            keys.append((name, key))
+        if any([key is None for (__, key) in keys]):
+            keys = None
+        else:
+            keys = (dict, tuple(sorted(keys)))
+        return encoded, keys
+    elif isinstance(value, ndarray) and value.dtype == object:
+        encoded, key = _dag_encode(list(value.flat), refs)
+        if key is not None:
+            key = (ndarray, value.shape, key)
+        return _NodeArray(value.shape, encoded), key
+    else:
+        # Values that are equal but of different type (1, 1.0, True) must not
+        # be merged
+        try:
+            key = (value.__class__, value)
+            hash(key)
+        except TypeError:
+            key = None
+        return value, key
+
+
+def _dag_decode(value, nodes):
+    """Inverse of :func:`_dag_encode`, for the already decoded `nodes`"""
+    if isinstance(value, _NodeRef):
+        return nodes[value.index]
+    elif isinstance(value, (tuple, list)):
+        return value.__class__([_dag_decode(item, nodes) for item in value])
+    elif isinstance(value, dict):
+        return {
+            name: _dag_decode(item, nodes) for (name, item) in value.items()}
+    elif isinstance(value, _NodeArray):
+        array = np_empty(len(value.items), dtype=object)
+        for (i, item) in enumerate(value.items):
+            array[i] = _dag_decode(item, nodes)
+        return array.reshape(value.shape)
+    else:
+        return value
+
+
+def _dag_table(expr):
+    """Flatten `expr` into a list of nodes ``(cls, args, kwargs)``, one for
+    every unique sub-expression, in which any sub-expression is replaced by a
+    :class:`_NodeRef` to an earlier node. The last node is `expr`.
+
+    Sub-expressions that occur repeatedly (whether as the same object or as
+    equal objects) are stored only once. The table is constructed without
+    recursion, so that it is suitable for pickling arbitrarily deep
+    expressions.
+    """
+    refs = {}  # id(sub-expression) => _NodeRef
+    by_key = {}  # structural key of node => _NodeRef
+    nodes = []
+    stack = [expr]
+    while stack:
+        current = stack[-1]
+        if id(current) in refs:
+            stack.pop()
+            continue
+        args, kwargs = current.args, current.kwargs
+        pending = [
+            child for child in _dag_children((args, kwargs))
+            if id(child) not in refs]
+        if len(pending) > 0:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        args, args_key = _dag_encode(tuple(args), refs)
+        kwargs, kwargs_key = _dag_encode(dict(kwargs), refs)
+        key = None
+        if args_key is not None and kwargs_key is not None:
+            key = (current.__class__, args_key, kwargs_key)
+            try:
+                refs[id(current)] = by_key[key]
+                continue
+            except KeyError:
+                pass
+        ref = _NodeRef(len(nodes))
+        nodes.append((current.__class__, args, kwargs))
+        refs[id(current)] = ref
+        if key is not None:
+            by_key[key] = ref
+    return nodes
+
+
+def _recreate(cls, args, kwargs):
+    """Re-create a (deserialized) expression through the `create` method of
+    `cls`, so that it is interned in the instance cache (and hash-consed, if
+    applicable). If `create` does not reproduce the expression exactly (e.g.
+    because the original expression was instantiated directly with arguments
+    that would be simplified by `create`), or if `create` raises an
+    exception, it is instantiated directly instead."""
+    try:
+        instance = cls.create(*args, **kwargs)
+    except Exception:
+        # e.g. a rule that fails for arguments that are not in normal form
+        return _instantiate(cls, args, kwargs)
+    try:
+        if instance._instance_key != cls._get_instance_key(args, kwargs):
+            instance = _instantiate(cls, args, kwargs)
+    except AttributeError:  # e.g. a scalar
+        instance = _instantiate(cls, args, kwargs)
+    return instance
+
+
+def _load_dag(nodes):
+    """Reconstruct an expression from its :func:`_dag_table`, see
+    :func:`_recreate`"""
+    objs = []
+    for (cls, args, kwargs) in nodes:
+        args = _dag_decode(args, objs)
+        kwargs = _dag_decode(kwargs, objs)
+        objs.append(_recreate(cls, args, kwargs))
+    return objs[-1]
+
+
+_DIGEST_SIZE = 32
+
+_F64 = struct.Struct('<d')
+
+
+def _digest_str(out, s):
+    """Append the length-prefixed string `s` to `out`"""
+    data = s.encode('utf-8')
+    out += b'%d:' % len(data)
+    out += data
+
+
+def _digest_encode(out, value, sympy_memo):
+    """Append the canonical encoding of the argument `value` of an expression
+    to `out`, for :func:`_structural_digest`. Sub-expressions are encoded by
+    their digest. The encodings of Sympy objects are cached in
+    `sympy_memo`, by id"""
+    if value is None:
+        out += b'N'
+    elif value is True or value is False:
+        out += b'T' if value else b'F'
+    elif isinstance(value, Expression):
+        if isinstance(value.__class__, Singleton):
+            out += b'O'
+            _digest_str(
+                out, value.__class__.__module__ + ':' + value.__name__)
+        else:
+            out += b'E'
+            out += value.structural_digest()
+    elif isinstance(value, SympyBasic):
+        try:
+            out += sympy_memo[id(value)]
+        except KeyError:
+            encoded = bytearray()
+            _digest_encode_sympy(encoded, value, sympy_memo)
+            sympy_memo[id(value)] = bytes(encoded)
+            out += encoded
+    elif isinstance(value, int):
+        out += b'I%d;' % value
+    elif isinstance(value, float):
+        out += b'D'
+        out += _F64.pack(value)
+    elif isinstance(value, complex):
+        out += b'C'
+        out += _F64.pack(value.real)
+        out += _F64.pack(value.imag)
+    elif isinstance(value, str):
+        out += b'S'
+        _digest_str(out, value)
+    elif isinstance(value, (tuple, list)):
+        out += b'(' if isinstance(value, tuple) else b'['
+        for item in value:
+            _digest_encode(out, item, sympy_memo)
+        out += b')'
+    elif isinstance(value, dict):
+        items = []
+        for (key, item) in value.items():
+            encoded_key, encoded_item = bytearray(), bytearray()
+            _digest_encode(encoded_key, key, sympy_memo)
+            _digest_encode(encoded_item, item, sympy_memo)
+            items.append((bytes(encoded_key), bytes(encoded_item)))
+        out += b'{'
+        for (encoded_key, encoded_item) in sorted(items):
+            out += encoded_key
+            out += encoded_item
+        out += b'}'
+    elif isinstance(value, ndarray):
+        out += b'A'
+        _digest_str(out, value.dtype.str)
+        _digest_encode(out, value.shape, sympy_memo)
+        for item in value.flat:
+            _digest_encode(out, item, sympy_memo)
+    elif isinstance(value, np_generic):
+        _digest_encode(out, value.item(), sympy_memo)
+    else:
+        raise TypeError(
+            "Cannot calculate structural digest for %r of type %s"
+            % (value, value.__class__))
+
+
+def _digest_encode_sympy(out, value, sympy_memo):
+    """Append the canonical encoding of the Sympy object `value` to `out`.
+    Unlike Sympy's equality, the encoding distinguishes between e.g.
+    ``Integer(1)`` and ``Float(1)``"""
+    if isinstance(value, sympy.Integer):
+        out += b'z%d;' % value.p
+    elif isinstance(value, sympy.Rational):
+        out += b'q%d/%d;' % (value.p, value.q)
+    elif isinstance(value, sympy.Float):
+        sign, man, exp, bc = value._mpf_
+        out += b'f%d,%d,%d,%d,%d;' % (sign, man, exp, bc, value._prec)
+    elif isinstance(value.__class__, SympySingleton):
+        out += b'o'
+        _digest_str(out, value.__class__.__name__)
+    elif value.__class__ is sympy.Symbol:
+        out += b's'
+        _digest_str(out, value.name)
+        _digest_encode(out, sorted(value.assumptions0.items()), sympy_memo)
+    else:
+        if isinstance(value, AppliedUndef):
+            out += b'u'
+            _digest_str(out, str(value.func))
+        else:
+            name = value.__class__.__name__
+            if (value.is_Atom or
+                    getattr(sympy, name, None) is not value.__class__):
+                # e.g. Dummy, for which equality depends on the object
+                raise TypeError(
+                    "Cannot calculate structural digest for %r" % value)
+            out += b'b'
+            _digest_str(out, name)
+        _digest_encode(out, tuple(value.args), sympy_memo)
+
+
+def _structural_digest(expr):
+    """Calculate and store the :meth:`Expression.structural_digest` of `expr`
+    and of all of its sub-expressions that do not have a digest yet. The
+    digest is calculated without recursion, so that it is available for
+    arbitrarily deep expressions."""
+    sympy_memo = {}
+    stack = [expr]
+    while stack:
+        current = stack[-1]
+        try:
+            current._digest
+            stack.pop()
+            continue
+        except AttributeError:
+            pass
+        args, kwargs = tuple(current.args), dict(current.kwargs)
+        pending = [
+            child for child in _dag_children((args, kwargs))
+            if not hasattr(child, '_digest')]
+        if len(pending) > 0:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        out = bytearray()
+        cls = current.__class__
+        _digest_str(out, cls.__module__ + ':' + cls.__qualname__)
+        _digest_encode(out, args, sympy_memo)
+        _digest_encode(out, kwargs, sympy_memo)
+        current._digest = blake2b(
+            bytes(out), digest_size=_DIGEST_SIZE).digest()
+    return expr._digest
+
+
+def _hash_cons(expr):
+    """Return the canonical instance of `expr`. If there is no canonical
+    instance yet, `expr` becomes the canonical instance"""
+    try:
+        if expr._interned:
+            return expr
+        key = expr._instance_key
+        hash_value = hash(key)
+    except (AttributeError, TypeError):
+        # not an Expression, or an Expression with an unhashable key
+        return expr
+    with _HASH_CONS_LOCK:
+        canonical = _HASH_CONS.get(key)
+        if canonical is None:
+            expr._hash = hash_value
+            expr._interned = True
+            _HASH_CONS[key] = expr
+            canonical = expr
+    return canonical
+
+
+@contextmanager
+def hash_consing():
+    """Context manager for hash-consing all expressions obtained from
+    :meth:`Expression.create` (and thus from all algebraic operations): Any two
+    structurally equal expressions are represented by the same Python object,
+    so that they compare by identity, and have a precomputed hash.
+
+    The canonical instances are kept for as long as they are in use, even
+    outside of the managed context and independently of the instance cache
+    (e.g. across :func:`temporary_instance_cache`). Expressions that are
+    instantiated directly (not through `create`) are not hash-consed, and are
+    compared structurally.
+
+    Note that two hash-consed expressions are only equal if they are identical.
+    Thus, scalars that compare equal but have different hashes (e.g. ``0.5``
+    and ``sympy.Float(0.5)``) result in different expressions.
+
+    Hash-consing is only enabled for the thread (or asyncio task) in which the
+    context is entered. It may be enabled permanently (for all threads) by
+    setting ``Expression.hash_consing = True``.
+
+    Example:
+
+        >>> from qnet.algebra.operator_algebra import (
+        ...     OperatorSymbol, OperatorPlus)
+        >>> A = OperatorSymbol('A', hs=0)
+        >>> B = OperatorSymbol('B', hs=0)
+        >>> with hash_consing():
+        ...     expr1 = A + B
+        ...     with temporary_instance_cache(OperatorPlus):
+        ...         expr2 = A + B
+        >>> expr1 is expr2
+        True
+    """
+    # this assumes that no sub-class of Expression shadows
+    # Expression.hash_consing
+    with _override(Expression, hash_consing=True):
+        yield
+
+
 @contextmanager
 def no_instance_caching():
     """Temporarily disable the caching of instances through
-    :meth:`Expression.create`
+    :meth:`Expression.create` (in the current thread, or asyncio task)
     """
     # this assumes that no sub-class of Expression shadows
     # Expression.instance_caching
-    orig_flag = Expression.instance_caching
-    Expression.instance_caching = False
-    yield
-    Expression.instance_caching = orig_flag
+    with _override(Expression, instance_caching=False):
+        yield
+
+
+def set_instance_cache(cache, cls=None):
+    """Install `cache` as the backend for caching the instances obtained from
+    the `create` method of `cls` (and any of its subclasses that do not have
+    their own cache). Unlike :func:`temporary_instance_cache`, this affects
+    all threads.
+
+    Args:
+        cache (MutableMapping or None): The new cache, usually an
+            :class:`~qnet.algebra.instance_cache.InstanceCache` or
+            :class:`~qnet.algebra.instance_cache.WeakInstanceCache` instance.
+            If None, install a new unbounded
+            :class:`~qnet.algebra.instance_cache.InstanceCache`.
+        cls (class or None): Subclass of :class:`Expression` for which to
+            set the cache. If None, set the global cache, i.e. the cache for
+            :class:`Expression`.
+
+    Returns:
+        The original cache for `cls`, which may be passed to
+        :func:`set_instance_cache` at a later point in order to restore it.
+
+    Example:
+
+        >>> from qnet.algebra.operator_algebra import OperatorTimes
+        >>> orig_cache = set_instance_cache(
+        ...     InstanceCache(maxsize=1000), cls=OperatorTimes)
+        >>> OperatorTimes._instances.maxsize
+        1000
+        >>> __ = set_instance_cache(orig_cache, cls=OperatorTimes)
+    """
+    if cls is None:
+        cls = Expression
+    if cache is None:
+        cache = InstanceCache()
+    orig_cache = cls._instances
+    attr = _ContextAttribute(cache)
+    attr.__set_name__(cls, '_instances')
+    with _OVERRIDES_LOCK:
+        setattr(cls, '_instances', attr)
+    return orig_cache
+
+
+def _empty_cache_like(cache):
+    """Return a new empty cache of the same type and settings as `cache`"""
+    try:
+        return cache.empty_copy()
+    except AttributeError:
+        return cache.__class__()
 
 
 @contextmanager
 def temporary_instance_cache(cls):
     """Use a temporary cache for instances obtained from the `create` method of
     the given `cls`. That is, no cached instances from outside of the managed
-    context will be used within the managed context, and vice versa"""
-    orig_instances = cls._instances
-    cls._instances = {}
-    yield
-    cls._instances = orig_instances
+    context will be used within the managed context, and vice versa. The
+    temporary cache is only used in the current thread (or asyncio task)"""
+    with _override(cls, _instances=_empty_cache_like(cls._instances)):
+        yield
 
 
 @contextmanager
 def extra_rules(cls, rules):
     """Context manager that temporarily adds the given rules to `cls` (to be
-    processed by `match_replace`. Implies `temporary_instance_cache`.
+    processed by `match_replace`. Implies `temporary_instance_cache`. The
+    rules are only added in the current thread (or asyncio task).
     """
-    orig_rules = copy(cls._rules)
-    rules = check_rules_dict(rules)
-    cls._rules.update(check_rules_dict(rules))
-    orig_instances = cls._instances
-    cls._instances = {}
-    yield
-    cls._rules = orig_rules
-    cls._instances = orig_instances
+    new_rules = copy(cls._rules)
+    new_rules.update(check_rules_dict(rules))
+    with _override(
+            cls, _rules=new_rules,
+            _instances=_empty_cache_like(cls._instances)):
+        yield
 
 
 @contextmanager
 def extra_binary_rules(cls, rules):
     """Context manager that temporarily adds the given rules to `cls` (to be
     processed by `match_replace_binary`. Implies `temporary_instance_cache`.
+    The rules are only added in the current thread (or asyncio task).
     """
-    orig_rules = copy(cls._binary_rules)
-    cls._binary_rules.update(check_rules_dict(rules))
-    orig_instances = cls._instances
-    cls._instances = {}
-    yield
-    cls._binary_rules = orig_rules
-    cls._instances = orig_instances
+    new_rules = copy(cls._binary_rules)
+    new_rules.update(check_rules_dict(rules))
+    with _override(
+            cls, _binary_rules=new_rules,
+            _instances=_empty_cache_like(cls._instances)):
+        yield
 
 
 @contextmanager
 def no_rules(cls):
     """Context manager that temporarily disables all rules (processed by
     `match_replace` or `match_replace_binary`) for the given `cls`. Implies
-    `temporary_instance_cache`.
+    `temporary_instance_cache`. The rules are only disabled in the current
+    thread (or asyncio task).
     """
-    has_rules = True
-    has_binary_rules = True
-    orig_instances = cls._instances
-    cls._instances = {}
-    try:
-        orig_rules = cls._rules
-        cls._rules = OrderedDict([])
-    except AttributeError:
-        has_rules = False
-    try:
-        orig_binary_rules = cls._binary_rules
-        cls._binary_rules = OrderedDict([])
-    except AttributeError:
-        has_binary_rules = False
-    yield
-    if has_rules:
-        cls._rules = orig_rules
-    if has_binary_rules:
-        cls._binary_rules = orig_binary_rules
-    cls._instances = orig_instances
+    attrs = {'_instances': _empty_cache_like(cls._instances)}
+    if hasattr(cls, '_rules'):
+        attrs['_rules'] = OrderedDict([])
+    if hasattr(cls, '_binary_rules'):
+        attrs['_binary_rules'] = OrderedDict([])
+    with _override(cls, **attrs):
+        yield
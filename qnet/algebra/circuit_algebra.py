@@ -48,8 +48,11 @@ from .abstract_algebra import (
 from .singleton import Singleton, singleton_object
 from .operator_algebra import (
         Operator, ScalarTimesOperator, IdentityOperator, Create,
-        Destroy, get_coeffs, ZeroOperator, OperatorSymbol,
-        adjoint, LocalProjector, LocalSigma, OperatorPlus)
+        Destroy, get_coeffs, get_coeffs_matrix, ZeroOperator, OperatorSymbol,
+        adjoint, LocalProjector, LocalSigma, OperatorPlus,
+        simplify_scalar_strategy)
+from .parallel import parallel_workers
+from .context_vars import ContextVar
 from .matrix_algebra import (
         Matrix, block_matrix, zerosm, permutation_matrix, Im, ImAdjoint,
         vstackm, identity_matrix)
@@ -72,7 +75,8 @@ __all__ = [
     'extract_signal', 'extract_signal_circuit', 'getABCD',
     'get_common_block_structure', 'map_signals', 'map_signals_circuit',
     'move_drive_to_H', 'pad_with_identity', 'prepare_adiabatic_limit',
-    'try_adiabatic_elimination', 'CIdentity', 'CircuitZero']
+    'set_circuit_cache', 'try_adiabatic_elimination', 'CIdentity',
+    'CircuitZero']
 
 __private__ = [  # anything not in __all__ must be in __private__
     'check_cdims']
@@ -113,6 +117,80 @@ class CannotEliminateAutomatically(AlgebraError):
     """Raised when attempted automatic adiabatic elimination fails."""
 
 
+###############################################################################
+# Persistent cache
+###############################################################################
+
+
+_CIRCUIT_CACHE = None
+
+_IN_CACHED_CALL = ContextVar('IN_CACHED_CALL', default=False)
+
+
+def set_circuit_cache(cache):
+    """Install `cache` for storing the results of :meth:`Circuit.toSLH`,
+    :meth:`Circuit.creduce`, :func:`connect`, and :meth:`SLH.expand` and
+    :meth:`SLH.simplify_scalar`. This affects all threads.
+
+    The cache is a mapping of keys ``(operation, *args)`` to results, where
+    `operation` is the name of the operation (e.g. ``'toSLH'``), and `args` are
+    the circuit and any further arguments of the operation. Only the outermost
+    operation is looked up: e.g. the conversion of the components of a circuit
+    to SLH within :meth:`toSLH` is not cached separately. Usually, the cache
+    is a :class:`~qnet.misc.disk_cache.DiskCache`, so that the results are
+    available to any later process::
+
+        >>> import tempfile
+        >>> from qnet.misc.disk_cache import DiskCache
+        >>> tmpdir = tempfile.TemporaryDirectory()
+        >>> orig_cache = set_circuit_cache(
+        ...     DiskCache(tmpdir.name, maxsize=10**9))
+        >>> # ... some calculation ...
+        >>> __ = set_circuit_cache(orig_cache)
+        >>> tmpdir.cleanup()
+
+    Args:
+        cache (MutableMapping or None): The new cache. If None, no results are
+            cached (the default)
+
+    Returns:
+        The original cache, which may be passed to :func:`set_circuit_cache`
+        at a later point in order to restore it.
+    """
+    global _CIRCUIT_CACHE
+    orig_cache = _CIRCUIT_CACHE
+    _CIRCUIT_CACHE = cache
+    return orig_cache
+
+
+def _cached(operation, args, compute):
+    """Return the result of `compute()` for the given `operation` and `args`
+    from the cache installed by :func:`set_circuit_cache`, or compute and
+    store it"""
+    cache = _CIRCUIT_CACHE
+    if cache is None or _IN_CACHED_CALL.get():
+        return compute()
+    key = (operation, ) + tuple(args)
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+    except TypeError:
+        # the cache cannot handle the key (e.g. a DiskCache cannot calculate
+        # the structural digest of a Sympy Dummy): do not cache the result
+        return compute()
+    token = _IN_CACHED_CALL.set(True)
+    try:
+        result = compute()
+    finally:
+        _IN_CACHED_CALL.reset(token)
+    try:
+        cache[key] = result
+    except TypeError:
+        pass  # the result cannot be stored (e.g. serialized)
+    return result
+
+
 ###############################################################################
 # Algebraic properties
 ###############################################################################
@@ -305,7 +383,9 @@ class Circuit(metaclass=ABCMeta):
         yields an increasingly fine-grained decomposition of a circuit into its
         most primitive elements.
         """
-        return self._creduce()
+        if isinstance(self, SLH):
+            return self._creduce()
+        return _cached('creduce', (self, ), self._creduce)
 
     @abstractmethod
     def _creduce(self) -> 'Circuit':
@@ -317,7 +397,9 @@ class Circuit(metaclass=ABCMeta):
         left in the expression or if the circuit includes *non-passive* ABCD
         models (cf. [1]_)
         """
-        return self._toSLH()
+        if isinstance(self, SLH):
+            return self._toSLH()
+        return _cached('toSLH', (self, ), self._toSLH)
 
     @abstractmethod
     def _toSLH(self) -> 'SLH':
@@ -445,7 +527,7 @@ class SLH(Circuit, Expression):
         args_spaces = (self.S.space, self.L.space, self.H.space)
         return ProductSpace.create(*args_spaces)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         """Set of all symbols occcuring in S, L, or H"""
         return set_union(self.S.all_symbols(), self.L.all_symbols(),
                          self.H.all_symbols())
@@ -486,18 +568,41 @@ class SLH(Circuit, Expression):
     def _toSLH(self):
         return self
 
-    def expand(self):
+    def expand(self, workers=None):
         """Expand out all operator expressions within S, L and H and return a
         new SLH object with these expanded expressions.
+
+        If `workers` is given, the elements of S and L are expanded in
+        parallel, see :func:`~qnet.algebra.parallel.parallel_workers`.
         """
-        return SLH(self.S.expand(), self.L.expand(), self.H.expand())
+        with parallel_workers(workers):
+            return _cached('expand', (self, ), lambda: SLH(
+                self.S.expand(), self.L.expand(), self.H.expand()))
 
-    def simplify_scalar(self):
+    def simplify_scalar(self, strategy=None, workers=None):
         """Simplify all scalar expressions within S, L and H and return a new
         SLH object with the simplified expressions.
+
+        The `strategy` determines how sympy scalars are simplified, see
+        :func:`~qnet.algebra.operator_algebra.simplify_scalar`. If `workers`
+        is given, the elements of S and L and the terms of H are simplified in
+        parallel, see :func:`~qnet.algebra.parallel.parallel_workers`.
         """
-        return SLH(self.S.simplify_scalar(), self.L.simplify_scalar(),
-                   self.H.simplify_scalar())
+        def compute():
+            return SLH(
+                self.S.simplify_scalar(), self.L.simplify_scalar(),
+                self.H.simplify_scalar())
+
+        with simplify_scalar_strategy(strategy) as strategy:
+            with parallel_workers(workers):
+                if not isinstance(strategy, str):
+                    # a callable strategy is not a meaningful cache key
+                    return compute()
+                if strategy == 'simplify':
+                    args = (self, )
+                else:
+                    args = (self, strategy)
+                return _cached('simplify_scalar', args, compute)
 
     def _series_inverse(self):
         return SLH(self.S.adjoint(), - self.S.adjoint() * self.L, -self.H)
@@ -772,7 +877,7 @@ class CircuitSymbol(Circuit, Expression):
     def args(self):
         return self._name, self._cdim
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return {}
 
     @property
@@ -1123,7 +1228,7 @@ class CIdentity(Circuit, Expression, metaclass=Singleton):
         return ABCD(zerosm((0, 0)), zerosm((0, 2)), zerosm((2, 0)),
                     identity_matrix(2), zerosm((1, 1)), TrivialSpace)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return {self}
 
     @property
@@ -1167,7 +1272,7 @@ class CircuitZero(Circuit, Expression, metaclass=Singleton):
     def _creduce(self):
         return self
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return {}
 
     @property
@@ -1375,7 +1480,8 @@ class Feedback(Circuit, Operation):
         self.out_port = int(out_port)
         self.in_port = int(in_port)
         operands = [circuit, ]
-        super().__init__(*operands)
+        super().__init__(*operands, out_port=self.out_port,
+                         in_port=self.in_port)
 
     @property
     def kwargs(self):
@@ -1972,41 +2078,47 @@ def getABCD(slh, a0=None, doubled_up=True):
     eoms = [slh_displaced.symbolic_heisenberg_eom(Destroy(hs=s), noises=noises)
             for s in modes]
 
+    # the terms whose coefficients make up the matrices
+    mode_terms = ([IdentityOperator] + [Destroy(hs=s) for s in modes] +
+                  [Create(hs=s) for s in modes])
+    noise_terms = noises + [dA.dag() for dA in noises]
+
     # use the coefficients to generate A, B matrices
-    for jj in range(len(modes)):
-        coeffsjj = get_coeffs(eoms[jj])
-        a[jj] = coeffsjj[IdentityOperator]
+    coeffs = get_coeffs_matrix(eoms, mode_terms + noise_terms)
+    for jj in range(ncav):
+        a[jj] = coeffs[jj, 0]
         if doubled_up:
-            a[jj+ncav] = coeffsjj[IdentityOperator].conjugate()
+            a[jj+ncav] = coeffs[jj, 0].conjugate()
 
-        for kk, skk in enumerate(modes):
-            A[jj, kk] = coeffsjj[Destroy(hs=skk)]
+        for kk in range(ncav):
+            A[jj, kk] = coeffs[jj, 1+kk]
             if doubled_up:
-                A[jj+ncav, kk+ncav] = coeffsjj[Destroy(hs=skk)].conjugate()
-                A[jj, kk + ncav] = coeffsjj[Create(hs=skk)]
-                A[jj+ncav, kk] = coeffsjj[Create(hs=skk)].conjugate()
+                A[jj+ncav, kk+ncav] = coeffs[jj, 1+kk].conjugate()
+                A[jj, kk + ncav] = coeffs[jj, 1+ncav+kk]
+                A[jj+ncav, kk] = coeffs[jj, 1+ncav+kk].conjugate()
 
-        for kk, dAkk in enumerate(noises):
-            B[jj, kk] = coeffsjj[dAkk]
+        for kk in range(cdim):
+            B[jj, kk] = coeffs[jj, 1+2*ncav+kk]
             if doubled_up:
-                B[jj+ncav, kk+cdim] = coeffsjj[dAkk].conjugate()
-                B[jj, kk+cdim] = coeffsjj[dAkk.dag()]
-                B[jj + ncav, kk] = coeffsjj[dAkk.dag()].conjugate()
+                B[jj+ncav, kk+cdim] = coeffs[jj, 1+2*ncav+kk].conjugate()
+                B[jj, kk+cdim] = coeffs[jj, 1+2*ncav+cdim+kk]
+                B[jj + ncav, kk] = (
+                    coeffs[jj, 1+2*ncav+cdim+kk].conjugate())
 
     # use the coefficients in the L vector to generate the C, D
     # matrices
-    for jj, Ljj in enumerate(slh_displaced.Ls):
-        coeffsjj = get_coeffs(Ljj)
-        c[jj] = coeffsjj[IdentityOperator]
+    coeffs = get_coeffs_matrix(slh_displaced.Ls, mode_terms)
+    for jj in range(cdim):
+        c[jj] = coeffs[jj, 0]
         if doubled_up:
-            c[jj+cdim] = coeffsjj[IdentityOperator].conjugate()
+            c[jj+cdim] = coeffs[jj, 0].conjugate()
 
-        for kk, skk in enumerate(modes):
-            C[jj, kk] = coeffsjj[Destroy(hs=skk)]
+        for kk in range(ncav):
+            C[jj, kk] = coeffs[jj, 1+kk]
             if doubled_up:
-                C[jj+cdim, kk+ncav] = coeffsjj[Destroy(hs=skk)].conjugate()
-                C[jj, kk+ncav] = coeffsjj[Create(hs=skk)]
-                C[jj+cdim, kk] = coeffsjj[Create(hs=skk)].conjugate()
+                C[jj+cdim, kk+ncav] = coeffs[jj, 1+kk].conjugate()
+                C[jj, kk+ncav] = coeffs[jj, 1+ncav+kk]
+                C[jj+cdim, kk] = coeffs[jj, 1+ncav+kk].conjugate()
 
     return map(SympyMatrix, (A, B, C, D, a, c))
 
@@ -2043,10 +2155,11 @@ def move_drive_to_H(slh, which=[]):
     does not contain any inhomogeneities, it is invariant under the
     transformation.
     '''
+    coeffs = get_coeffs_matrix(slh.Ls, [IdentityOperator])
     scalarcs = []
-    for jj, L in enumerate(slh.Ls):
+    for jj in range(slh.cdim):
         if not which or jj in which:
-            scalarcs.append(-get_coeffs(L.expand())[IdentityOperator])
+            scalarcs.append(-coeffs[jj, 0])
         else:
             scalarcs.append(0)
 
@@ -2182,16 +2295,32 @@ def connect(components, connections, force_SLH=False, expand_simplify=True):
         expand_simplify (bool): If the result is an SLH object, expand and
             simplify the circuit after each feedback connection is added
     """
+    components = tuple(components)
+    connections = tuple(
+        ((_component_index(components, c1), op),
+         (_component_index(components, c2), ip))
+        for ((c1, op), (c2, ip)) in connections)
+    return _cached(
+        'connect', (components, connections, force_SLH, expand_simplify),
+        lambda: _connect(components, connections, force_SLH, expand_simplify))
+
+
+def _component_index(components, c):
+    """Index of the component `c` (or `c` itself, if it is an index)"""
+    if isinstance(c, int):
+        return c
+    return components.index(c)
+
+
+def _connect(components, connections, force_SLH, expand_simplify):
+    """Implementation of :func:`connect`, for `connections` given in terms of
+    indices into `components`"""
     combined = Concatenation.create(*components)
     cdims = [c.cdim for c in components]
     offsets = _cumsum([0] + cdims[:-1])
     imap = []
     omap = []
     for (c1, op), (c2, ip) in connections:
-        if not isinstance(c1, int):
-            c1 = components.index(c1)
-        if not isinstance(c2, int):
-            c2 = components.index(c2)
         op_idx = offsets[c1] + op
         ip_idx = offsets[c2] + ip
         imap.append(ip_idx)
@@ -0,0 +1,87 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+r"""Context variables (:pep:`567`) for the settings that may be overridden
+within the current thread (or asyncio task) only, e.g. through
+:func:`~qnet.algebra.abstract_algebra.temporary_instance_cache`.
+
+On Python 3.7 and newer (or with the ``contextvars`` backport installed),
+:class:`ContextVar` is :class:`contextvars.ContextVar`. On older versions of
+Python, it falls back to an equivalent implementation based on
+:class:`threading.local`, whose values are local to the current thread (but
+shared between asyncio tasks running in that thread).
+"""
+import threading
+
+__all__ = []
+
+__private__ = ['ContextVar']  # anything not in __all__ must be in __private__
+
+_MISSING = object()
+
+
+class _Token():
+    """Token returned by :meth:`_ThreadLocalVar.set`, for restoring the
+    previous value"""
+
+    __slots__ = ('var', 'old_value')
+
+    def __init__(self, var, old_value):
+        self.var = var
+        self.old_value = old_value
+
+
+class _ThreadLocalVar():
+    """Thread-local replacement for :class:`contextvars.ContextVar`"""
+
+    def __init__(self, name, *, default=_MISSING):
+        self.name = name
+        self._default = default
+        self._local = threading.local()
+
+    def get(self, default=_MISSING):
+        try:
+            return self._local.value
+        except AttributeError:
+            if default is not _MISSING:
+                return default
+            if self._default is not _MISSING:
+                return self._default
+            raise LookupError(self)
+
+    def set(self, value):
+        token = _Token(self, getattr(self._local, 'value', _MISSING))
+        self._local.value = value
+        return token
+
+    def reset(self, token):
+        if token.var is not self:
+            raise ValueError("%r was created by a different ContextVar" % token)
+        if token.old_value is _MISSING:
+            del self._local.value
+        else:
+            self._local.value = token.old_value
+
+    def __repr__(self):
+        return "<%s name=%r>" % (self.__class__.__name__, self.name)
+
+
+try:
+    from contextvars import ContextVar
+except ImportError:  # Python < 3.7
+    ContextVar = _ThreadLocalVar
@@ -23,10 +23,20 @@ This module defines some simple classes to describe simple and
 Hilbert spaces of quantum systems.
 
 For more details see :ref:`hilbert_space_algebra`.
+
+Internally, every :class:`LocalSpace` is assigned a unique bit (by its index
+in a registry of all local spaces), and every Hilbert space stores the
+bitmask of its local factors. This turns tests for disjointness, tensor
+factors, and intersections into bitwise operations on integers. The registry
+does not keep local spaces alive: the bit of a local space is recycled once
+no equal local space is in use anymore.
 """
 import re
+import heapq
 import operator
 import functools
+import threading
+import weakref
 from collections import OrderedDict
 from abc import ABCMeta, abstractmethod, abstractproperty
 from itertools import product as cartesian_product
@@ -44,6 +54,60 @@ __private__ = [  # anything not in __all__ must be in __private__
     'convert_to_spaces', 'empty_trivial']
 
 
+class _LocalSpaceIndex():
+    """Index of the bit that represents a LocalSpace in the `_bitmask`
+    attribute of any Hilbert space. Every LocalSpace holds a reference to its
+    index, which is shared by all equal local spaces. When it is no longer
+    referenced, the index is released for re-use."""
+
+    __slots__ = ('index', '__weakref__')
+
+    def __init__(self, index):
+        self.index = index
+
+    def __del__(self):
+        try:
+            # list.append is atomic, so no lock is required (a lock would
+            # deadlock if the garbage collector ran this while it is held)
+            _RELEASED_LOCAL_SPACE_INDICES.append(self.index)
+        except (NameError, AttributeError):  # interpreter shutdown
+            pass
+
+
+# map of LocalSpace instance keys -> _LocalSpaceIndex. The keys do not
+# reference the local spaces, so that an entry disappears when all equal
+# local spaces are gone
+_LOCAL_SPACE_INDICES = weakref.WeakValueDictionary()
+_LOCAL_SPACE_INDICES_LOCK = threading.Lock()
+_FREE_LOCAL_SPACE_INDICES = []  # heap of indices available for re-use
+_RELEASED_LOCAL_SPACE_INDICES = []  # indices released since the last call
+_NEXT_LOCAL_SPACE_INDEX = 0
+
+
+def _local_space_index(local_space):
+    """Return the :class:`_LocalSpaceIndex` for the given LocalSpace,
+    registering it if necessary. Released indices are re-used (smallest
+    first), so that bitmasks stay as small as the number of local spaces in
+    use"""
+    global _NEXT_LOCAL_SPACE_INDEX
+    key = local_space._instance_key
+    with _LOCAL_SPACE_INDICES_LOCK:
+        local_space_index = _LOCAL_SPACE_INDICES.get(key)
+        if local_space_index is None:
+            while _RELEASED_LOCAL_SPACE_INDICES:
+                heapq.heappush(
+                    _FREE_LOCAL_SPACE_INDICES,
+                    _RELEASED_LOCAL_SPACE_INDICES.pop())
+            if _FREE_LOCAL_SPACE_INDICES:
+                index = heapq.heappop(_FREE_LOCAL_SPACE_INDICES)
+            else:
+                index = _NEXT_LOCAL_SPACE_INDEX
+                _NEXT_LOCAL_SPACE_INDEX += 1
+            local_space_index = _LocalSpaceIndex(index)
+            _LOCAL_SPACE_INDICES[key] = local_space_index
+    return local_space_index
+
+
 ###############################################################################
 # Exceptions
 ###############################################################################
@@ -82,7 +146,14 @@ def empty_trivial(cls, ops, kwargs):
 
 
 class HilbertSpace(metaclass=ABCMeta):
-    """Basic Hilbert space class from which concrete classes are derived."""
+    """Basic Hilbert space class from which concrete classes are derived.
+
+    Every subclass must provide a `_bitmask` attribute: an integer in which
+    exactly the bits of the local factors (see :func:`_local_space_index`)
+    are set, or -1 (all bits set) for the :obj:`FullSpace`.
+    """
+
+    __slots__ = ()
 
     def tensor(self, *others):
         """Tensor product between Hilbert spaces
@@ -116,10 +187,10 @@ class HilbertSpace(metaclass=ABCMeta):
         other Hilbert space, while `TrivialSpace` *is* disjoint with any other
         HilbertSpace (even itself)
         """
-        if other == FullSpace:
+        if self is FullSpace or other is FullSpace:
             return False
         else:
-            return set(self.local_factors).isdisjoint(set(other.local_factors))
+            return not (self._bitmask & other._bitmask)
 
     def is_tensor_factor_of(self, other):
         """Test if a space is included within a larger tensor product space.
@@ -129,7 +200,7 @@ class HilbertSpace(metaclass=ABCMeta):
         :type other: HilbertSpace
         :rtype: bool
         """
-        return self <= other
+        return (self._bitmask & other._bitmask) == self._bitmask
 
     def is_strict_tensor_factor_of(self, other):
         """Test if a space is included within a larger tensor product space.
@@ -173,6 +244,18 @@ class HilbertSpace(metaclass=ABCMeta):
         raise BasisNotSetError(
             "Hilbert space %s has no defined basis" % str(self))
 
+    def basis_index(self, label):
+        """Return the (zero-based) index of the basis state with the given
+        label, i.e. ``basis_labels.index(label)``, without searching through
+        the basis labels.
+
+        Raises:
+            BasisNotSetError: if the Hilbert space has no defined basis
+            ValueError: if there is no basis state with the given label
+        """
+        raise BasisNotSetError(
+            "Hilbert space %s has no defined basis" % str(self))
+
     @property
     def basis_labels(self):
         """Tuple of basis labels.
@@ -242,6 +325,12 @@ class LocalSpace(HilbertSpace, Expression):
             from left to right be increasing `order_index`; Hilbert spaces
             without an explicit `order_index` are sorted by their label
     """
+
+    __slots__ = (
+        '_label', '_order_key', '_basis', '_dimension', '_local_identifiers',
+        '_order_index', '_kwargs', '_minimal_kwargs', '_bitmask',
+        '_basis_indices', '_local_space_index')
+
     _rx_label = re.compile('^[A-Za-z0-9.+-]+(_[A-Za-z0-9().+-]+)?$')
 
     def __init__(
@@ -312,6 +401,8 @@ class LocalSpace(HilbertSpace, Expression):
             label, basis=basis, dimension=dimension,
             local_identifiers=sorted_local_identifiers,
             order_index=order_index)
+        self._local_space_index = _local_space_index(self)
+        self._bitmask = 1 << self._local_space_index.index
 
     @property
     def args(self):
@@ -357,6 +448,26 @@ class LocalSpace(HilbertSpace, Expression):
             else:
                 raise KeyError(str(exc_info))
 
+    def basis_index(self, label):
+        """Return the (zero-based) index of the basis state with the given
+        label. The mapping of labels to indices is calculated only once.
+
+        Raises:
+            BasisNotSetError: if the Hilbert space has no defined basis
+            ValueError: if there is no basis state with the given label
+        """
+        try:
+            basis_indices = self._basis_indices
+        except AttributeError:
+            basis_indices = {
+                label: i for (i, label) in enumerate(self.basis_labels)}
+            self._basis_indices = basis_indices
+        try:
+            return basis_indices[label]
+        except KeyError:
+            raise ValueError(
+                "%r is not a basis label of Hilbert space %s" % (label, self))
+
     @property
     def basis_labels(self):
         """Tuple of basis labels.
@@ -390,7 +501,7 @@ class LocalSpace(HilbertSpace, Expression):
     def minimal_kwargs(self):
         return self._minimal_kwargs
 
-    def all_symbols(self):
+    def _all_symbols(self):
         """Empty list"""
         return {}
 
@@ -400,7 +511,7 @@ class LocalSpace(HilbertSpace, Expression):
         return self
 
     def intersect(self, other):
-        if self in other.local_factors:
+        if self._bitmask & other._bitmask:
             return self
         return TrivialSpace
 
@@ -409,12 +520,9 @@ class LocalSpace(HilbertSpace, Expression):
         return (self, )
 
     def is_strict_subfactor_of(self, other):
-        if isinstance(other, ProductSpace) and self in other.operands:
-            assert len(other.operands) > 1
-            return True
-        if other is FullSpace:
-            return True
-        return False
+        # `other` is a ProductSpace containing `self`, or the FullSpace
+        return bool(self._bitmask & other._bitmask) and (
+            other._bitmask != self._bitmask)
 
     def next_basis_label_or_index(self, label_or_index, n=1):
         """Given the label or index of a basis state, return the label/index of
@@ -448,7 +556,7 @@ class LocalSpace(HilbertSpace, Expression):
                                      % (new_index, self._basis))
             return new_index
         elif isinstance(label_or_index, str):
-            label_index = self.basis_labels.index(label_or_index)
+            label_index = self.basis_index(label_or_index)
             new_index = label_index + n
             if (new_index < 0) or (new_index >= len(self._basis)):
                 raise IndexError("index %d out of range for basis %s"
@@ -461,6 +569,9 @@ class TrivialSpace(HilbertSpace, Expression, metaclass=Singleton):
     """The 'nullspace', i.e. a one dimensional Hilbert space, which is a factor
     space of every other Hilbert space."""
 
+    _order_key = KeyTuple((-2, '_'))
+    _bitmask = 0
+
     def __hash__(self):
         return hash(self.__class__)
 
@@ -469,10 +580,6 @@ class TrivialSpace(HilbertSpace, Expression, metaclass=Singleton):
         """Empty tuple (no arguments)"""
         return ()
 
-    @property
-    def _order_key(self):
-        return KeyTuple((-2, '_'))
-
     @property
     def dimension(self):
         return 1
@@ -509,12 +616,19 @@ class TrivialSpace(HilbertSpace, Expression, metaclass=Singleton):
                 raise KeyError("No label %d in basis for TrivialSpace"
                                 % index_or_label)
 
+    def basis_index(self, label):
+        """Return 0 for the label "0", and raise a ValueError for any other
+        label"""
+        if label == "0":
+            return 0
+        raise ValueError("No label %r in basis for TrivialSpace" % label)
+
     @property
     def basis_labels(self):
         """The one-element tuple containing the label '0'"""
         return tuple(["0", ])
 
-    def all_symbols(self):
+    def _all_symbols(self):
         """Empty set (no symbols)"""
         return set(())
 
@@ -557,6 +671,9 @@ class FullSpace(HilbertSpace, Expression, metaclass=Singleton):
     :class:`BasisNotSetError`
     """
 
+    _order_key = KeyTuple((-1, '_'))
+    _bitmask = -1
+
     @property
     def args(self):
         """Empty tuple (no arguments)"""
@@ -565,11 +682,7 @@ class FullSpace(HilbertSpace, Expression, metaclass=Singleton):
     def __hash__(self):
         return hash(self.__class__)
 
-    @property
-    def _order_key(self):
-        return KeyTuple((-1, '_'))
-
-    def all_symbols(self):
+    def _all_symbols(self):
         """Empty set (no symbols)"""
         return set(())
 
@@ -616,6 +729,8 @@ class ProductSpace(HilbertSpace, Operation):
     ('0,0', '0,1', '1,0', '1,1')
     """
 
+    __slots__ = ('_order_key', '_dimension', '_basis', '_bitmask')
+
     neutral_element = TrivialSpace
     _simplifications = [empty_trivial, assoc, convert_to_spaces, idem,
                         filter_neutral]
@@ -629,21 +744,32 @@ class ProductSpace(HilbertSpace, Operation):
                     [ls.dimension for ls in local_spaces], 1)
         except BasisNotSetError:
             self._dimension = None
-        # determine the basis labels automatically
-        try:
-            ls_bases = [ls.basis_labels for ls in local_spaces]
-            basis = []
-            for label_tuple in cartesian_product(*ls_bases):
-                basis.append(",".join([str(l) for l in label_tuple]))
-            self._basis = tuple(basis)
-        except BasisNotSetError:
-            self._basis = None
+        # the basis labels are determined automatically, when they are first
+        # requested (there are `dimension` of them)
+        self._basis = None
         op_keys = [space._order_key for space in local_spaces]
         self._order_key = KeyTuple([v for op_key in op_keys for v in op_key])
+        self._bitmask = functools.reduce(
+            operator.or_, [ls._bitmask for ls in local_spaces], 0)
         super().__init__(*local_spaces)  # Operation __init__
 
     @classmethod
     def create(cls, *local_spaces):
+        try:
+            bitmask = functools.reduce(
+                operator.or_, [ls._bitmask for ls in local_spaces], 0)
+        except AttributeError:  # e.g. labels instead of Hilbert spaces
+            pass
+        else:
+            # short-circuit if the product is the FullSpace, the
+            # TrivialSpace, or one of the factors (e.g. `hs * hs`)
+            if bitmask == -1:
+                return FullSpace
+            if bitmask == 0:
+                return TrivialSpace
+            for local_space in local_spaces:
+                if local_space._bitmask == bitmask:
+                    return local_space
         if any(local_space is FullSpace for local_space in local_spaces):
             return FullSpace
         return super().create(*local_spaces)
@@ -652,7 +778,7 @@ class ProductSpace(HilbertSpace, Operation):
     def has_basis(self):
         """True if the all the local factors of the `ProductSpace` have a
         defined basis"""
-        return self._basis is not None
+        return self._dimension is not None
 
     @property
     def basis_states(self):
@@ -680,12 +806,21 @@ class ProductSpace(HilbertSpace, Operation):
             BasisNotSetError: if the Hilbert space has no defined basis
         """
         if self._basis is None:
-            raise BasisNotSetError(
-                "Hilbert space %s has no defined basis" % str(self))
+            if self._dimension is None:
+                raise BasisNotSetError(
+                    "Hilbert space %s has no defined basis" % str(self))
+            ls_bases = [ls.basis_labels for ls in self.local_factors]
+            self._basis = tuple([
+                ",".join(label_tuple)
+                for label_tuple in cartesian_product(*ls_bases)])
         return self._basis
 
     def basis_state(self, index_or_label):
-        """Return the basis state with the given index or label.
+        """Return the basis state with the given index or label. For an
+        index, the labels of the local basis states are obtained from the
+        digits of the index in a mixed-radix representation (with the
+        dimensions of the local factors as radices), without enumerating the
+        basis.
 
         Raises:
             BasisNotSetError: if the Hilbert space has no defined basis
@@ -694,14 +829,20 @@ class ProductSpace(HilbertSpace, Operation):
         """
         from qnet.algebra.state_algebra import BasisKet, TensorKet
         if isinstance(index_or_label, int):  # index
-            ls_bases = [ls.basis_labels for ls in self.local_factors]
-            label_tuple = list(cartesian_product(*ls_bases))[index_or_label]
-            try:
-                return TensorKet(
-                    *[BasisKet(label, hs=ls) for (ls, label)
-                        in zip(self.local_factors, label_tuple)])
-            except ValueError as exc_info:
-                raise IndexError(str(exc_info))
+            index = index_or_label
+            if index < 0:  # index from the end, as for `basis_labels`
+                index += self.dimension
+            if not (0 <= index < self.dimension):
+                raise IndexError(
+                    "Index %d out of range for Hilbert space %s of "
+                    "dimension %d" % (index_or_label, self, self.dimension))
+            local_indices = []
+            for ls in reversed(self.local_factors):
+                index, local_index = divmod(index, ls.dimension)
+                local_indices.append(local_index)
+            return TensorKet(
+                *[BasisKet(ls.basis_labels[i], hs=ls) for (ls, i)
+                  in zip(self.local_factors, reversed(local_indices))])
         else:  # label
             local_labels = index_or_label.split(",")
             if len(local_labels) != len(self.local_factors):
@@ -715,6 +856,25 @@ class ProductSpace(HilbertSpace, Operation):
             except ValueError as exc_info:
                 raise KeyError(str(exc_info))
 
+    def basis_index(self, label):
+        """Return the (zero-based) index of the basis state with the given
+        label, calculated from the indices of the labels of the local basis
+        states (see :meth:`basis_state`).
+
+        Raises:
+            BasisNotSetError: if the Hilbert space has no defined basis
+            ValueError: if there is no basis state with the given label
+        """
+        local_labels = label.split(",")
+        if len(local_labels) != len(self.local_factors):
+            raise ValueError(
+                "label %s for Hilbert space %s must be comma-separated "
+                "concatenation of local labels" % (label, self))
+        index = 0
+        for (ls, local_label) in zip(self.local_factors, local_labels):
+            index = index * ls.dimension + ls.basis_index(local_label)
+        return index
+
     @property
     def dimension(self):
         """Dimension of the Hilbert space.
@@ -732,14 +892,11 @@ class ProductSpace(HilbertSpace, Operation):
         """Remove a particular factor from a tensor product space."""
         if other is FullSpace:
             return TrivialSpace
-        if other is TrivialSpace:
+        bitmask = self._bitmask & ~other._bitmask
+        if bitmask == self._bitmask:
             return self
-        if isinstance(other, ProductSpace):
-            oops = set(other.operands)
-        else:
-            oops = {other}
         return ProductSpace.create(
-                *sorted(set(self.operands).difference(oops)))
+            *[ls for ls in self.operands if ls._bitmask & bitmask])
 
     @property
     def local_factors(self):
@@ -754,23 +911,19 @@ class ProductSpace(HilbertSpace, Operation):
 
     def intersect(self, other):
         """Find the mutual tensor factors of two Hilbert spaces."""
-        if other is FullSpace:
+        bitmask = self._bitmask & other._bitmask
+        if bitmask == self._bitmask:  # includes `other` being the FullSpace
             return self
-        if other is TrivialSpace:
+        if bitmask == 0:
             return TrivialSpace
-        if isinstance(other, ProductSpace):
-            other_ops = set(other.operands)
-        else:
-            other_ops = {other}
+        if bitmask == other._bitmask:
+            return other
         return ProductSpace.create(
-                *sorted(set(self.operands).intersection(other_ops)))
+            *[ls for ls in self.operands if ls._bitmask & bitmask])
 
     def is_strict_subfactor_of(self, other):
         """Test if a space is included within a larger tensor product space.
         Not ``True`` if ``self == other``."""
-        if isinstance(other, ProductSpace):
-            return set(self.operands) < set(other.operands)
-        if other is FullSpace:
-            return True
-        return False
+        return ((self._bitmask & other._bitmask) == self._bitmask and
+                other._bitmask != self._bitmask)
 
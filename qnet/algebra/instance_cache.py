@@ -0,0 +1,322 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+r"""Cache backends for the instances created through
+:meth:`~qnet.algebra.abstract_algebra.Expression.create`.
+
+By default, every call to `create` is memoized in an unbounded cache. For
+long-running computations that produce a large number of intermediary
+expressions, a bounded cache may be installed instead, either globally or for
+specific classes, through
+:func:`~qnet.algebra.abstract_algebra.set_instance_cache`::
+
+    >>> from qnet.algebra.abstract_algebra import set_instance_cache
+    >>> from qnet.algebra.operator_algebra import OperatorPlus
+    >>> orig_cache = set_instance_cache(
+    ...     InstanceCache(maxsize=10000), cls=OperatorPlus)
+    >>> # ... some calculation ...
+    >>> __ = set_instance_cache(orig_cache, cls=OperatorPlus)
+
+Alternatively, a :class:`WeakInstanceCache` only holds on to expressions that
+are still referenced somewhere else, so that the memory used by the cache
+tracks the working set of live expressions.
+
+Any object implementing the :class:`collections.abc.MutableMapping` interface
+may serve as a cache backend. Both caches defined here may be shared between
+threads (although their statistics are not guaranteed to be exact when they
+are).
+"""
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from .singleton import Singleton
+
+__all__ = ['InstanceCache', 'WeakInstanceCache']
+
+__private__ = []  # anything not in __all__ must be in __private__
+
+
+def _is_singleton_key(key, value):
+    """Check whether `value` is a singleton and `key` is its own instance
+    key"""
+    if not isinstance(value.__class__, Singleton):
+        return False
+    try:
+        return key == value._instance_key
+    except AttributeError:
+        return False
+
+
+class InstanceCache(MutableMapping):
+    """Mapping of instance keys to instances with an optional limit on the
+    number of cached entries. When the limit is exceeded, the least recently
+    used entries are evicted.
+
+    The entry for the own instance key of a singleton (e.g.
+    :obj:`~qnet.algebra.operator_algebra.ZeroOperator`) is kept permanently
+    and does not count towards the limit, unless `pin_singletons` is False.
+    Any other entry that maps to a singleton (e.g. the key for ``A - A``) is
+    evicted like all other entries.
+
+    Args:
+        maxsize (int or None): The maximum number of (non-pinned) entries.
+            If None, the cache is unbounded.
+        pin_singletons (bool): Whether to keep the entries for the instance
+            keys of singletons permanently
+
+    Attributes:
+        hits (int): number of successful lookups
+        misses (int): number of failed lookups
+        evictions (int): number of entries that were evicted from the cache
+    """
+
+    def __init__(self, maxsize=None, pin_singletons=True):
+        if maxsize is not None:
+            maxsize = int(maxsize)
+            if maxsize < 0:
+                raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self.pin_singletons = pin_singletons
+        self._data = OrderedDict()
+        self._pinned = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getitem__(self, key):
+        try:
+            value = self._pinned[key]
+        except KeyError:
+            if self.maxsize is None:
+                # lookups do not modify an unbounded cache: no need to lock
+                try:
+                    value = self._data[key]
+                except KeyError:
+                    self.misses += 1
+                    raise
+            else:
+                with self._lock:
+                    try:
+                        value = self._data[key]
+                    except KeyError:
+                        self.misses += 1
+                        raise
+                    self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if self.pin_singletons and _is_singleton_key(key, value):
+                self._data.pop(key, None)
+                self._pinned[key] = value
+                return
+            self._pinned.pop(key, None)
+            self._data[key] = value
+            if self.maxsize is not None:
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+
+    def __delitem__(self, key):
+        with self._lock:
+            try:
+                del self._pinned[key]
+            except KeyError:
+                del self._data[key]
+
+    def __contains__(self, key):
+        # does not count as a hit or miss, and does not affect LRU order
+        return key in self._pinned or key in self._data
+
+    def __iter__(self):
+        with self._lock:
+            keys = list(self._pinned) + list(self._data)
+        yield from keys
+
+    def __len__(self):
+        return len(self._pinned) + len(self._data)
+
+    def __repr__(self):
+        return "%s(maxsize=%r, pin_singletons=%r)" % (
+            self.__class__.__name__, self.maxsize, self.pin_singletons)
+
+    def clear(self):
+        """Remove all entries (including pinned entries). This does not reset
+        the statistics"""
+        with self._lock:
+            self._data.clear()
+            self._pinned.clear()
+
+    def empty_copy(self):
+        """Return a new, empty cache with the same settings"""
+        return self.__class__(
+            maxsize=self.maxsize, pin_singletons=self.pin_singletons)
+
+    def stats(self):
+        """Return a dict of cache statistics, with keys 'hits', 'misses',
+        'evictions', 'size' (total number of entries), 'pinned' (number of
+        pinned entries) and 'maxsize'"""
+        return {
+            'hits': self.hits, 'misses': self.misses,
+            'evictions': self.evictions, 'size': len(self),
+            'pinned': len(self._pinned), 'maxsize': self.maxsize}
+
+    def reset_stats(self):
+        """Reset the hit, miss, and eviction counters to zero"""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+def _key_references(key, value):
+    """Check whether `value` occurs anywhere in `key`, i.e. in the (possibly
+    nested) tuple `key`, or in the instance keys of the expressions it
+    contains"""
+    seen = set()
+    stack = [key]
+    while stack:
+        item = stack.pop()
+        if item is value:
+            return True
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, tuple):
+            stack.extend(item)
+        else:
+            item_key = getattr(item, '_instance_key', None)
+            if isinstance(item_key, tuple):
+                stack.extend(item_key)
+    return False
+
+
+class WeakInstanceCache(MutableMapping):
+    """Mapping of instance keys to instances that does not keep the instances
+    alive: an entry disappears as soon as the instance it maps to is no longer
+    referenced anywhere else. As long as an expression is alive, creating an
+    equal expression still returns the cached instance.
+
+    Values that cannot be weakly referenced (e.g. scalars), values that occur
+    anywhere in their own key (e.g. when ``Adjoint.create(Adjoint(A))``
+    returns ``A``), and singletons under any key but their own instance key
+    (e.g. ``ZeroOperator`` for the key of ``A - A``) are not stored, as the
+    entry would never be removed. The entry for the own instance key of a
+    singleton is kept permanently, unless `pin_singletons` is False.
+
+    Args:
+        pin_singletons (bool): Whether to keep the entries for the instance
+            keys of singletons permanently
+
+    Attributes:
+        hits (int): number of successful lookups
+        misses (int): number of failed lookups
+        skipped (int): number of values that were not stored
+    """
+
+    def __init__(self, pin_singletons=True):
+        self.pin_singletons = pin_singletons
+        self._data = weakref.WeakValueDictionary()
+        self._pinned = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+
+    def __getitem__(self, key):
+        try:
+            value = self._pinned[key]
+        except KeyError:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                raise
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if self.pin_singletons and _is_singleton_key(key, value):
+                self._data.pop(key, None)
+                self._pinned[key] = value
+                return
+            self._pinned.pop(key, None)
+            if (isinstance(value.__class__, Singleton) or
+                    _key_references(key, value)):
+                self._data.pop(key, None)
+                self.skipped += 1
+                return
+            try:
+                self._data[key] = value
+            except TypeError:
+                # value does not support weak references
+                self._data.pop(key, None)
+                self.skipped += 1
+
+    def __delitem__(self, key):
+        with self._lock:
+            try:
+                del self._pinned[key]
+            except KeyError:
+                del self._data[key]
+
+    def __contains__(self, key):
+        return key in self._pinned or key in self._data
+
+    def __iter__(self):
+        with self._lock:
+            keys = list(self._pinned) + list(self._data.keys())
+        yield from keys
+
+    def __len__(self):
+        return len(self._pinned) + len(self._data)
+
+    def __repr__(self):
+        return "%s(pin_singletons=%r)" % (
+            self.__class__.__name__, self.pin_singletons)
+
+    def clear(self):
+        """Remove all entries (including pinned entries). This does not reset
+        the statistics"""
+        with self._lock:
+            self._data.clear()
+            self._pinned.clear()
+
+    def empty_copy(self):
+        """Return a new, empty cache with the same settings"""
+        return self.__class__(pin_singletons=self.pin_singletons)
+
+    def stats(self):
+        """Return a dict of cache statistics, with keys 'hits', 'misses',
+        'skipped', 'size' (total number of entries), 'pinned' (number of
+        pinned entries) and 'maxsize' (always None)"""
+        return {
+            'hits': self.hits, 'misses': self.misses,
+            'skipped': self.skipped, 'size': len(self),
+            'pinned': len(self._pinned), 'maxsize': None}
+
+    def reset_stats(self):
+        """Reset the hit, miss, and skip counters to zero"""
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
@@ -17,6 +17,7 @@
 #
 ###########################################################################
 """Matrices of Operators"""
+from functools import partial
 
 from numpy import (
         array as np_array, ndarray, conjugate as np_conjugate,
@@ -27,7 +28,9 @@ from sympy import Basic as SympyBasic, I, sympify
 from .scalar_types import SCALAR_TYPES
 from .abstract_algebra import (
         Expression, Operation, substitute)
-from .operator_algebra import Operator, scalar_free_symbols, simplify_scalar
+from .operator_algebra import (
+    Operator, scalar_free_symbols, simplify_scalar, simplify_scalar_strategy)
+from .parallel import parallel_map, parallel_workers
 from .hilbert_space_algebra import TrivialSpace, ProductSpace
 from .permutations import check_permutation
 
@@ -227,6 +230,13 @@ class Matrix(Expression):
         emat = [method(o) for o in self.matrix.ravel()]
         return Matrix(np_array(emat).reshape(s))
 
+    def _parallel_element_wise(self, func):
+        """Like :meth:`element_wise`, but evaluate the picklable `func`
+        through :func:`~qnet.algebra.parallel.parallel_map`"""
+        s = self.shape
+        emat = parallel_map(func, self.matrix.ravel())
+        return Matrix(np_array(emat).reshape(s))
+
     def series_expand(self, param, about, order):
         """Expand the matrix expression as a truncated power series in a scalar
         parameter.
@@ -245,13 +255,15 @@ class Matrix(Expression):
                       for o in self.matrix.ravel()])
         return tuple((Matrix(np_array(em).reshape(s)) for em in emats))
 
-    def expand(self):
+    def expand(self, workers=None):
         """Expand each matrix element distributively.
+        :param workers: If given, expand the elements in parallel, see
+            :func:`~qnet.algebra.parallel.parallel_workers`
         :return: Expanded matrix.
         :rtype: Matrix
         """
-        return self.element_wise(
-            lambda o: o.expand() if isinstance(o, Operator) else o)
+        with parallel_workers(workers):
+            return self._parallel_element_wise(_expand_element)
 
     def _substitute(self, var_map):
         if self in var_map:
@@ -259,7 +271,7 @@ class Matrix(Expression):
         else:
             return self.element_wise(lambda o: substitute(o, var_map))
 
-    def all_symbols(self):
+    def _all_symbols(self):
         ret = set()
         for o in self.matrix.ravel():
             if isinstance(o, Operator):
@@ -278,11 +290,24 @@ class Matrix(Expression):
         else:
             return ProductSpace.create(*arg_spaces)
 
-    def simplify_scalar(self):
+    def simplify_scalar(self, strategy=None, workers=None):
         """
         Simplify all scalar expressions appearing in the Matrix.
+
+        The `strategy` determines how sympy scalars are simplified, see
+        :func:`~qnet.algebra.operator_algebra.simplify_scalar`. If `workers`
+        is given, the elements are simplified in parallel, see
+        :func:`~qnet.algebra.parallel.parallel_workers`.
         """
-        return self.element_wise(simplify_scalar)
+        with simplify_scalar_strategy(strategy) as strategy:
+            with parallel_workers(workers):
+                return self._parallel_element_wise(
+                    partial(simplify_scalar, strategy=strategy))
+
+
+def _expand_element(o):
+    """Expand a matrix element"""
+    return o.expand() if isinstance(o, Operator) else o
 
 
 def hstackm(matrices):
@@ -26,10 +26,15 @@ documentation for the basic :py:class:`Operator` class.
 import re
 from abc import ABCMeta, abstractmethod, abstractproperty
 from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
+from functools import partial
 from itertools import product as cartesian_product
 
+import numpy as np
+
 from sympy import (
-    exp, sqrt, I, sympify, Basic as SympyBasic, series as sympy_series)
+    exp, sqrt, I, sympify, Basic as SympyBasic, series as sympy_series,
+    expand as sympy_expand, cancel as sympy_cancel)
 
 from .scalar_types import SCALAR_TYPES
 from .abstract_algebra import (
@@ -37,11 +42,16 @@ from .abstract_algebra import (
     match_replace_binary, match_replace, set_union, substitute,
     CannotSimplify, check_rules_dict)
 from .singleton import Singleton, singleton_object
+from .instance_cache import InstanceCache
+from .parallel import parallel_map, parallel_workers
+from .context_vars import ContextVar
 from .hilbert_space_algebra import (
-    TrivialSpace, HilbertSpace, LocalSpace, ProductSpace, BasisNotSetError)
+    TrivialSpace, FullSpace, HilbertSpace, LocalSpace, ProductSpace,
+    BasisNotSetError)
 from .pattern_matching import wc, pattern_head, pattern
 from .ordering import (
-    KeyTuple, DisjunctCommutativeHSOrder, FullCommutativeHSOrder)
+    KeyTuple, DisjunctCommutativeHSOrder, FullCommutativeHSOrder,
+    scalar_times_order_key)
 
 sympyOne = sympify(1)
 
@@ -59,12 +69,13 @@ __all__ = [
     'Squeeze', 'Jmjmcoeff', 'Jpjmcoeff', 'Jzjmcoeff', 'LocalProjector',
     'X', 'Y', 'Z', 'adjoint', 'create_operator_pm_cc', 'decompose_space',
     'expand_operator_pm_cc', 'factor_coeff', 'factor_for_trace', 'get_coeffs',
-    'scalar_free_symbols', 'simplify_scalar', 'space', 'II',
+    'get_coeffs_matrix', 'scalar_free_symbols', 'set_simplify_scalar_cache',
+    'simplify_scalar', 'simplify_scalar_stats', 'space', 'II',
     'IdentityOperator', 'ZeroOperator', 'Commutator']
 
 __private__ = [  # anything not in __all__ must be in __private__
     'implied_local_space',  'delegate_to_method', 'disjunct_hs_zero',
-    'scalars_to_op', 'commutator_order']
+    'scalars_to_op', 'commutator_order', 'simplify_scalar_strategy']
 
 
 
@@ -151,16 +162,17 @@ def disjunct_hs_zero(cls, ops, kwargs):
     """Return ZeroOperator if all the operators in `ops` have a disjunct
     Hilbert space, or an unchanged `ops`, `kwargs` otherwise
     """
-    hilbert_spaces = []
-    for op in ops:
+    bitmask = 0  # local factors of the Hilbert spaces of all previous ops
+    for (i, op) in enumerate(ops):
         try:
             hs = op.space
         except AttributeError:  # scalars
             hs = TrivialSpace
-        for hs_prev in hilbert_spaces:
-            if not hs.isdisjoint(hs_prev):
-                return ops, kwargs
-        hilbert_spaces.append(hs)
+        if i > 0 and (hs is FullSpace or bitmask == -1 or
+                      hs._bitmask & bitmask):
+            # same as `not hs.isdisjoint(hs_prev)` for any previous space
+            return ops, kwargs
+        bitmask |= hs._bitmask
     return ZeroOperator
 
 
@@ -187,6 +199,8 @@ class Operator(metaclass=ABCMeta):
     on which it is taken to act non-trivially.
     """
 
+    __slots__ = ()
+
     @abstractproperty
     def space(self):
         """The :class:`HilbertSpace` on which the operator acts
@@ -274,13 +288,19 @@ class Operator(metaclass=ABCMeta):
     def _expand(self):
         raise NotImplementedError(self.__class__.__name__)
 
-    def simplify_scalar(self):
+    def simplify_scalar(self, strategy=None, workers=None):
         """Simplify all scalar coefficients within the Operator expression.
 
+        :param strategy: How to simplify sympy scalars, see
+            :func:`simplify_scalar`
+        :param workers: If given, simplify the terms of a sum in parallel,
+            see :func:`~qnet.algebra.parallel.parallel_workers`. This
+            requires a `strategy` that can be pickled.
         :return: The simplified expression.
         :rtype: Operator
         """
-        return self._simplify_scalar()
+        with simplify_scalar_strategy(strategy), parallel_workers(workers):
+            return self._simplify_scalar()
 
     def _simplify_scalar(self):
         return self
@@ -384,6 +404,8 @@ class LocalOperator(Operator, Expression, metaclass=ABCMeta):
         'b^(1)'
     """
 
+    __slots__ = ('_hs', '_order_key')
+
     _simplifications = [implied_local_space(keys=['hs', ]), ]
 
     _identifier = None  # must be overridden by subclasses!
@@ -408,7 +430,10 @@ class LocalOperator(Operator, Expression, metaclass=ABCMeta):
             try:
                 args_vals.append(float(arg))
             except (TypeError, ValueError):
-                args_vals.append("~%s" % str(arg))
+                if isinstance(arg, str):
+                    args_vals.append("~" + arg)
+                else:
+                    args_vals.append(arg)
         self._order_key = KeyTuple(
             [self.__class__.__name__, 1.0] + args_vals)
         super().__init__(*args, hs=hs)
@@ -464,7 +489,7 @@ class LocalOperator(Operator, Expression, metaclass=ABCMeta):
     def _series_expand(self, param, about, order):
         return (self,) + ((0,) * order)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         """Set of symbols used in the operator"""
         return set()
 
@@ -475,6 +500,8 @@ class OperatorOperation(Operator, Operation, metaclass=ABCMeta):
     operands.
     """
 
+    __slots__ = ('_space', '_order_key')
+
     def __init__(self, *operands, **kwargs):
         op_spaces = [o.space for o in operands]
         self._space = ProductSpace.create(*op_spaces)
@@ -494,6 +521,8 @@ class OperatorOperation(Operator, Operation, metaclass=ABCMeta):
 class SingleOperatorOperation(Operator, Operation, metaclass=ABCMeta):
     """Base class for Operations that act on a single Operator"""
 
+    __slots__ = ('_space', '_order_key')
+
     def __init__(self, op, **kwargs):
         self._space = op.space
         self._order_key = op._order_key + KeyTuple((self.__class__.__name__, ))
@@ -528,6 +557,9 @@ class OperatorSymbol(Operator, Expression):
         hs (HilbertSpace): associated Hilbert space (can be a
             :class:`~qnet.algebra.hilbert_space_algebra.ProductSpace`)
     """
+
+    __slots__ = ('identifier', '_hs', '_order_key')
+
     # Not a LocalOperator subclass because an OperatorSymbol may be defined for
     # a ProductSpace
 
@@ -568,7 +600,7 @@ class OperatorSymbol(Operator, Expression):
     def _series_expand(self, param, about, order):
         return (self,) + ((0,) * order)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return {self}
 
 
@@ -576,15 +608,13 @@ class OperatorSymbol(Operator, Expression):
 class IdentityOperator(Operator, Expression, metaclass=Singleton):
     """``IdentityOperator`` constant (singleton) object."""
 
+    _order_key = KeyTuple(('~~', 'IdentityOperator', 1.0))
+
     @property
     def space(self):
         """TrivialSpace"""
         return TrivialSpace
 
-    @property
-    def _order_key(self):
-        return KeyTuple(('~~', self.__class__.__name__, 1.0))
-
     @property
     def args(self):
         return tuple()
@@ -606,7 +636,7 @@ class IdentityOperator(Operator, Expression, metaclass=Singleton):
             return other == 1
         return self is other
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return set(())
 
 
@@ -617,15 +647,13 @@ II = IdentityOperator
 class ZeroOperator(Operator, Expression, metaclass=Singleton):
     """``ZeroOperator`` constant (singleton) object."""
 
+    _order_key = KeyTuple(('~~', 'ZeroOperator', 1.0))
+
     @property
     def space(self):
         """TrivialSpace"""
         return TrivialSpace
 
-    @property
-    def _order_key(self):
-        return KeyTuple(('~~', self.__class__.__name__, 1.0))
-
     @property
     def args(self):
         return tuple()
@@ -647,7 +675,7 @@ class ZeroOperator(Operator, Expression, metaclass=Singleton):
             return other == 0
         return self is other
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return set(())
 
 
@@ -662,6 +690,9 @@ class Destroy(LocalOperator):
         >>> Destroy(hs=1) * Create(hs=2) - Create(hs=2) * Destroy(hs=1)
         ZeroOperator
     """
+
+    __slots__ = ()
+
     _identifier = 'a'
     _dagger = False
     _rx_identifier = re.compile('^[A-Za-z][A-Za-z0-9]*$')
@@ -698,6 +729,9 @@ class Create(LocalOperator):
     """Bosonic creation operator acting on a particular :class:`LocalSpace`
     `hs`. It is the adjoint of :class:`Destroy`.
     """
+
+    __slots__ = ()
+
     _identifier = 'a'
     _dagger = True
     _rx_identifier = re.compile('^[A-Za-z][A-Za-z0-9]*$')
@@ -750,6 +784,9 @@ class Jz(LocalOperator):
     A custom identifier may be define using `hs`'s `local_identifiers`
     argument.
     """
+
+    __slots__ = ()
+
     _identifier = 'J_z'
 
     def __init__(self, *, hs):
@@ -776,6 +813,9 @@ class Jplus(LocalOperator):
     A custom identifier may be define using `hs`'s `local_identifiers`
     argument.
     """
+
+    __slots__ = ()
+
     _identifier = 'J_+'
 
     def __init__(self, *, hs):
@@ -802,6 +842,9 @@ class Jminus(LocalOperator):
     A custom identifier may be define using `hs`'s `local_identifiers`
     argument.
     """
+
+    __slots__ = ()
+
     _identifier = 'J_-'
 
     def __init__(self, *, hs):
@@ -827,6 +870,9 @@ class Phase(LocalOperator):
     A custom identifier may be define using `hs`'s `local_identifiers`
     argument.
     """
+
+    __slots__ = ('phi', )
+
     _identifier = 'Phase'
     _nargs = 1
     _rules = OrderedDict()  # see end of module
@@ -854,7 +900,7 @@ class Phase(LocalOperator):
     def _simplify_scalar(self):
         return Phase.create(simplify_scalar(self.phi), hs=self.space)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return scalar_free_symbols(self.space)
 
 
@@ -878,6 +924,9 @@ class Displace(LocalOperator):
     A custom identifier may be define using `hs`'s `local_identifiers`
     argument.
     """
+
+    __slots__ = ('alpha', )
+
     _identifier = 'D'
     _nargs = 1
     _rules = OrderedDict()  # see end of module
@@ -904,7 +953,7 @@ class Displace(LocalOperator):
     def _simplify_scalar(self):
         return Displace.create(simplify_scalar(self.alpha), hs=self.space)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return scalar_free_symbols(self.space)
 
 
@@ -928,6 +977,9 @@ class Squeeze(LocalOperator):
     A custom identifier may be define using `hs`'s `local_identifiers`
     argument.
     """
+
+    __slots__ = ('eta', )
+
     _identifier = "Squeeze"
     _nargs = 1
     _rules = OrderedDict()  # see end of module
@@ -952,7 +1004,7 @@ class Squeeze(LocalOperator):
     def _simplify_scalar(self):
         return Squeeze(simplify_scalar(self.eta), hs=self.space)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         r'''List of arguments of the operator, containing the squeezing
         parameter $\eta$ as the only element'''
         return scalar_free_symbols(self.space)
@@ -990,6 +1042,9 @@ class LocalSigma(LocalOperator):
         >>> LocalSigma(0, 0, hs=0).identifier
         'sigma'
     '''
+
+    __slots__ = ('j', 'k')
+
     _identifier = "sigma"
     _rx_identifier = re.compile('^[A-Za-z][A-Za-z0-9]*$')
     _nargs = 2
@@ -1036,7 +1091,7 @@ class LocalSigma(LocalOperator):
         if isinstance(self.j, int):
             return self.j
         else:
-            return self.space.basis_labels.index(self.j)
+            return self.space.basis_index(self.j)
 
     @property
     def index_k(self):
@@ -1044,7 +1099,7 @@ class LocalSigma(LocalOperator):
         if isinstance(self.k, int):
             return self.k
         else:
-            return self.space.basis_labels.index(self.k)
+            return self.space.basis_index(self.k)
 
     def raise_jk(self, j_incr=0, k_incr=0):
         r'''Return a new :class:`LocalSigma` instance with incremented `j`,
@@ -1087,6 +1142,9 @@ class LocalProjector(LocalSigma):
             is projected
         hs (HilbertSpace): The Hilbert space on which the operator acts
     """
+
+    __slots__ = ()
+
     _identifier = "Pi"
     _nargs = 2  # must be 2 because that's how we call super().__init__
 
@@ -1111,6 +1169,9 @@ class OperatorPlus(OperatorOperation):
     Args:
         operands (list): Operator summands
     """
+
+    __slots__ = ()
+
     neutral_element = ZeroOperator
     _binary_rules = OrderedDict()
     _simplifications = [assoc, scalars_to_op, orderby, filter_neutral,
@@ -1119,8 +1180,12 @@ class OperatorPlus(OperatorOperation):
     order_key = FullCommutativeHSOrder
 
     def _expand(self):
-        summands = [o.expand() for o in self.operands]
-        return OperatorPlus.create(*summands)
+        return _terms_to_operator(_expand_terms(self, {}))
+
+    def _simplify_scalar(self):
+        simplify = partial(
+            simplify_scalar, strategy=_SIMPLIFY_SCALAR_STRATEGY.get())
+        return self.create(*parallel_map(simplify, self.operands))
 
     def _series_expand(self, param, about, order):
         tuples = (o.series_expand(param, about, order) for o in self.operands)
@@ -1139,6 +1204,8 @@ class OperatorTimes(OperatorOperation):
         operands (list): Operator factors
     """
 
+    __slots__ = ()
+
     neutral_element = IdentityOperator
     _binary_rules = OrderedDict()  # see end of module
     _simplifications = [assoc, orderby, filter_neutral, match_replace_binary]
@@ -1160,21 +1227,7 @@ class OperatorTimes(OperatorOperation):
                 OperatorTimes.create(*ops_not_on_spc))
 
     def _expand(self):
-        eops = [o.expand() for o in self.operands]
-        # store tuples of summands of all expanded factors
-        eopssummands = [eo.operands if isinstance(eo, OperatorPlus) else (eo,)
-                        for eo in eops]
-        # iterate over a cartesian product of all factor summands, form product
-        # of each tuple and sum over result
-        summands = []
-        for combo in cartesian_product(*eopssummands):
-            summand = OperatorTimes.create(*combo)
-            summands.append(summand)
-        ret = OperatorPlus.create(*summands)
-        if isinstance(ret, OperatorPlus):
-            return ret.expand()
-        else:
-            return ret
+        return _terms_to_operator(_expand_terms(self, {}))
 
     def _series_expand(self, param, about, order):
         assert len(self.operands) > 1
@@ -1201,6 +1254,9 @@ class ScalarTimesOperator(Operator, Operation):
         coeff (SCALAR_TYPES): coefficient
         term (Operator): operator
     """
+
+    __slots__ = ('_cached_order_key', )
+
     _rules = OrderedDict()
     _simplifications = [match_replace, ]
 
@@ -1217,12 +1273,12 @@ class ScalarTimesOperator(Operator, Operation):
 
     @property
     def _order_key(self):
-        t = self.term._order_key
         try:
-            c = abs(float(self.coeff))  # smallest coefficients first
-        except (ValueError, TypeError):
-            c = float('inf')
-        return KeyTuple(t[:2] + (c, ) + t[3:] + (str(self.coeff), ))
+            return self._cached_order_key
+        except AttributeError:
+            self._cached_order_key = scalar_times_order_key(
+                self.coeff, self.term._order_key)
+            return self._cached_order_key
 
     @property
     def space(self):
@@ -1237,12 +1293,7 @@ class ScalarTimesOperator(Operator, Operation):
         return self.operands[1]
 
     def _expand(self):
-        c, t = self.operands
-        et = t.expand()
-        if isinstance(et, OperatorPlus):
-            summands = [c * eto for eto in et.operands]
-            return OperatorPlus.create(*summands)
-        return c * et
+        return _terms_to_operator(_expand_terms(self, {}))
 
     def _series_expand(self, param, about, order):
         te = self.term.series_expand(param, about, order)
@@ -1310,7 +1361,7 @@ class ScalarTimesOperator(Operator, Operation):
         coeff, term = self.operands
         return simplify_scalar(coeff) * term.simplify_scalar()
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return scalar_free_symbols(self.coeff) | self.term.all_symbols()
 
 
@@ -1322,6 +1373,9 @@ class Commutator(OperatorOperation):
         [\Op{A}, \Op{B}] = \Op{A}\Op{B} - \Op{A}\Op{B}
 
     '''
+
+    __slots__ = ('_hs', )
+
     _rules = OrderedDict()
     _simplifications = [disjunct_hs_zero, commutator_order, match_replace]
 
@@ -1385,6 +1439,9 @@ class OperatorTrace(SingleOperatorOperation):
         over_space (HilbertSpace): The degrees of freedom to trace over
         op (Opwerator): The operator to take the trace of.
     '''
+
+    __slots__ = ('_over_space', )
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [implied_local_space(keys=['over_space', ]),
                         match_replace, ]
@@ -1424,7 +1481,7 @@ class OperatorTrace(SingleOperatorOperation):
         return tuple(OperatorTrace.create(opet, over_space=self._over_space)
                      for opet in ope)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return self.operand.all_symbols()
 
     def _diff(self, sym):
@@ -1439,6 +1496,9 @@ class Adjoint(SingleOperatorOperation):
     :param op: The operator to take the adjoint of.
     :type op: Operator
     """
+
+    __slots__ = ()
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [match_replace, delegate_to_method('_adjoint')]
 
@@ -1459,6 +1519,8 @@ class Adjoint(SingleOperatorOperation):
 class OperatorPlusMinusCC(SingleOperatorOperation):
     """An operator plus or minus its complex conjugate"""
 
+    __slots__ = ('_sign', )
+
     def __init__(self, op, *, sign=+1):
         self._sign = sign
         super().__init__(op, sign=sign)
@@ -1501,6 +1563,9 @@ class PseudoInverse(SingleOperatorOperation):
     :param X: The operator to take the adjoint of.
     :type X: Operator
     """
+
+    __slots__ = ()
+
     _rules = OrderedDict()  # see end of module
     _delegate_to_method = (ScalarTimesOperator, Squeeze, Displace,
                            ZeroOperator.__class__, IdentityOperator.__class__)
@@ -1526,6 +1591,8 @@ class NullSpaceProjector(SingleOperatorOperation):
     :type X: Operator
     """
 
+    __slots__ = ()
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [match_replace, ]
 
@@ -1679,15 +1746,92 @@ def get_coeffs(expr, expand=False, epsilon=0.):
     operands = expr.operands if isinstance(expr, OperatorPlus) else [expr]
     for e in operands:
         c, t = _coeff_term(e)
-        try:
-            if abs(complex(c)) < epsilon:
-                continue
-        except TypeError:
-            pass
+        if epsilon > 0:
+            try:
+                if abs(complex(c)) < epsilon:
+                    continue
+            except TypeError:
+                pass
         ret[t] += c
     return ret
 
 
+def get_coeffs_matrix(exprs, basis_terms, epsilon=0., sparse=False,
+                      dtype=None):
+    """Extract the coefficients of the `basis_terms` in each of the `exprs`
+    (understood as sums) into a matrix
+
+    All expressions are expanded in a single pass that shares the expansion
+    of common sub-expressions, so that e.g. the coefficients of all
+    equations of motion of a network can be obtained at once.
+
+    Args:
+        exprs (list): Operators (or scalars, which are understood as
+            multiples of the identity) to get the coefficients from
+        basis_terms (list): The operator terms whose coefficients should be
+            extracted. Each term must be a single term without a scalar
+            coefficient, e.g. ``Create(hs=1) * Destroy(hs=1)`` or
+            ``IdentityOperator``. Terms in `exprs` that are not in
+            `basis_terms` are ignored.
+        epsilon (float): If non-zero, drop all coefficients that have
+            absolute value less than epsilon.
+        sparse (bool): If True, return a :class:`scipy.sparse.csr_matrix`,
+            which requires all coefficients to be numeric.
+        dtype: The dtype of the result. Defaults to `object` for a dense
+            array (keeping symbolic coefficients), and to `complex` for a
+            sparse matrix.
+
+    Returns:
+        numpy.ndarray or scipy.sparse.csr_matrix: A matrix of shape
+        ``(len(exprs), len(basis_terms))`` whose entry ``[i, j]`` is the
+        coefficient of ``basis_terms[j]`` in ``exprs[i]``
+
+    Raises:
+        ValueError: If any of the `basis_terms` is not a single term
+    """
+    memo = {}
+    columns = {}
+    for (j, basis_term) in enumerate(basis_terms):
+        terms = _expand_terms(basis_term, memo)
+        if len(terms) != 1 or list(terms.values())[0] != 1:
+            raise ValueError("%s is not a single term" % str(basis_term))
+        columns.setdefault(list(terms.keys())[0], []).append(j)
+    rows, cols, data = [], [], []
+    for (i, expr) in enumerate(exprs):
+        if isinstance(expr, SCALAR_TYPES):
+            terms = {IdentityOperator: expr}
+        else:
+            terms = _expand_terms(expr, memo)
+        for (term, coeff) in terms.items():
+            try:
+                term_cols = columns[term]
+            except KeyError:
+                continue
+            if epsilon > 0:
+                try:
+                    if abs(complex(coeff)) < epsilon:
+                        continue
+                except TypeError:
+                    pass
+            for j in term_cols:
+                rows.append(i)
+                cols.append(j)
+                data.append(coeff)
+    shape = (len(exprs), len(basis_terms))
+    if sparse:
+        from scipy.sparse import csr_matrix
+        if dtype is None:
+            dtype = complex
+        return csr_matrix((np.array(data, dtype=dtype), (rows, cols)),
+                          shape=shape)
+    if dtype is None:
+        dtype = object
+    matrix = np.zeros(shape, dtype=dtype)
+    for (i, j, coeff) in zip(rows, cols, data):
+        matrix[i, j] = coeff
+    return matrix
+
+
 def space(obj):
     """Gives the associated HilbertSpace with an object. Also works for
     `SCALAR_TYPES`"""
@@ -1699,23 +1843,142 @@ def space(obj):
         raise ValueError(str(obj))
 
 
-def simplify_scalar(s):
+def _sympy_simplify(s):
+    return s.simplify()
+
+
+def _sympy_expand_cancel(s):
+    return sympy_cancel(sympy_expand(s))
+
+
+_SIMPLIFY_SCALAR_STRATEGIES = {
+    'simplify': _sympy_simplify,
+    'expand_cancel': _sympy_expand_cancel,
+}
+
+_SIMPLIFY_SCALAR_STRATEGY = ContextVar(
+    'SIMPLIFY_SCALAR_STRATEGY', default='simplify')
+
+_SIMPLIFY_SCALAR_CACHE = InstanceCache(maxsize=10000)
+
+
+@contextmanager
+def simplify_scalar_strategy(strategy):
+    """Context manager that sets the `strategy` for the simplification of
+    sympy scalars by :func:`simplify_scalar` (in the current thread). If
+    `strategy` is None, the current strategy is kept. Yields the strategy in
+    effect."""
+    if strategy is None:
+        yield _SIMPLIFY_SCALAR_STRATEGY.get()
+        return
+    if not (strategy in _SIMPLIFY_SCALAR_STRATEGIES or callable(strategy)):
+        raise ValueError(
+            "Unknown strategy %r for the simplification of scalars (must be "
+            "one of %s, or a callable)"
+            % (strategy, ", ".join(sorted(_SIMPLIFY_SCALAR_STRATEGIES))))
+    token = _SIMPLIFY_SCALAR_STRATEGY.set(strategy)
+    try:
+        yield strategy
+    finally:
+        _SIMPLIFY_SCALAR_STRATEGY.reset(token)
+
+
+def set_simplify_scalar_cache(cache):
+    """Install `cache` for memoizing the simplification of sympy scalars in
+    :func:`simplify_scalar`. This affects all threads.
+
+    The same coefficients tend to appear many times across the components of
+    a network, so by default, the results are memoized in an
+    :class:`~qnet.algebra.instance_cache.InstanceCache` that holds on to the
+    10000 most recently used results.
+
+    Args:
+        cache (MutableMapping or None): The new cache, mapping keys
+            ``(strategy, scalar)`` to the simplified scalar. If None, scalars
+            are not cached.
+
+    Returns:
+        The original cache, which may be passed to
+        :func:`set_simplify_scalar_cache` at a later point in order to restore
+        it.
+    """
+    global _SIMPLIFY_SCALAR_CACHE
+    orig_cache = _SIMPLIFY_SCALAR_CACHE
+    _SIMPLIFY_SCALAR_CACHE = cache
+    return orig_cache
+
+
+def simplify_scalar_stats():
+    """Return a dict of statistics for the cache installed by
+    :func:`set_simplify_scalar_cache` (see e.g.
+    :meth:`.InstanceCache.stats`), with the additional key 'hit_rate' (the
+    fraction of successful lookups, or None if there have not been any
+    lookups). The dict is empty if no cache is installed."""
+    cache = _SIMPLIFY_SCALAR_CACHE
+    if cache is None:
+        return {}
+    try:
+        stats = cache.stats()
+    except AttributeError:
+        stats = {}
+    hits = stats.get('hits', 0)
+    lookups = hits + stats.get('misses', 0)
+    stats['hit_rate'] = hits / lookups if lookups > 0 else None
+    return stats
+
+
+def simplify_scalar(s, strategy=None):
     """Simplify all occurences of scalar expressions in s
 
+    Sympy scalars are simplified according to `strategy`:
+
+    * 'simplify' (default): :func:`sympy.simplify.simplify.simplify`
+    * 'expand_cancel': :func:`sympy.core.function.expand` followed by
+      :func:`sympy.polys.polytools.cancel`. This is much cheaper than
+      'simplify', but does not e.g. apply trigonometric identities.
+    * a callable that receives and returns a sympy expression
+
+    The results are memoized in the cache installed by
+    :func:`set_simplify_scalar_cache`. The cache statistics are available
+    from :func:`simplify_scalar_stats`.
+
     :param s: The expression to simplify.
     :type s: Expression or SympyBasic
+    :param strategy: How to simplify sympy scalars. If None, the strategy of
+        any enclosing call to :func:`simplify_scalar` or 'simplify'.
     :return: The simplified version.
     :rtype: Expression or SympyBasic
     """
     try:
-        return s.simplify_scalar()
+        return s.simplify_scalar(strategy=strategy)
     except AttributeError:
         pass
     if isinstance(s, SympyBasic):
-        return s.simplify()
+        with simplify_scalar_strategy(strategy) as strategy:
+            return _simplify_sympy_scalar(s, strategy)
     return s
 
 
+def _simplify_sympy_scalar(s, strategy):
+    """Simplify the sympy expression `s` with the given `strategy`, using
+    the cache installed by :func:`set_simplify_scalar_cache`"""
+    if s.is_Atom:
+        return s
+    simplify = _SIMPLIFY_SCALAR_STRATEGIES.get(strategy, strategy)
+    cache = _SIMPLIFY_SCALAR_CACHE
+    if cache is None or not isinstance(strategy, str):
+        # a callable strategy is not a meaningful cache key
+        return simplify(s)
+    key = (strategy, s)
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+    result = simplify(s)
+    cache[key] = result
+    return result
+
+
 def scalar_free_symbols(*operands):
     """Return all free symbols from any symbolic operand"""
     if len(operands) > 1:
@@ -1741,6 +2004,210 @@ def _coeff_term(op):
         return 1, op
 
 
+_LADDER_PRODUCT = object()  # memo key prefix for normal-ordered products
+
+
+def _expand_terms(op, memo):
+    """Expand `op` into its normal form: a dict that maps every term (an
+    operator that is neither a sum nor a scalar multiple, e.g. a product of
+    local operators ordered by their Hilbert space) to its scalar
+    coefficient. The expansion of sums, products, and scalar multiples, and
+    the collection of terms happens in this representation, which is only
+    converted back into an operator in :func:`_terms_to_operator`.
+
+    The `memo` dict caches the normal forms of sub-expressions and products
+    of terms. It should only be used for a single expansion.
+
+    The returned dict must not be modified.
+    """
+    try:
+        return memo[op]
+    except KeyError:
+        pass
+    if isinstance(op, OperatorPlus):
+        terms = {}
+        for operand in op.operands:
+            _add_terms(terms, _expand_terms(operand, memo))
+    elif isinstance(op, ScalarTimesOperator):
+        terms = {}
+        _add_terms(terms, _expand_terms(op.term, memo), op.coeff)
+    elif isinstance(op, OperatorTimes):
+        factors = [_expand_terms(operand, memo) for operand in op.operands]
+        if all(_is_term(operand, factor)
+               for (operand, factor) in zip(op.operands, factors)):
+            terms = _product_terms(OperatorTimes.create(*op.operands), memo)
+        else:
+            terms = factors[0]
+            for factor in factors[1:]:
+                terms = _multiply_terms(terms, factor, memo)
+    elif op is ZeroOperator:
+        terms = {}
+    else:
+        # any other operator takes care of its own expansion
+        expanded = op._expand()
+        terms = {}
+        if isinstance(expanded, OperatorPlus):
+            summands = expanded.operands
+        else:
+            summands = (expanded, )
+        for summand in summands:
+            coeff, term = _coeff_term(summand)
+            if term is not ZeroOperator:
+                _add_terms(terms, {term: 1}, coeff)
+    memo[op] = terms
+    return terms
+
+
+def _is_term(op, terms):
+    """Check whether `terms` is the normal form of an `op` that is a single
+    term"""
+    return len(terms) == 1 and terms.get(op, 0) == 1
+
+
+def _product_terms(product, memo):
+    """Normal form of the result of multiplying two or more terms"""
+    if isinstance(product, OperatorTimes):
+        if all(_is_term(operand, _expand_terms(operand, memo))
+               for operand in product.operands):
+            return {product: 1}
+    return _expand_terms(product, memo)
+
+
+def _multiply_terms(terms1, terms2, memo):
+    """Multiply two normal forms"""
+    result = {}
+    for (term1, coeff1) in terms1.items():
+        for (term2, coeff2) in terms2.items():
+            key = (OperatorTimes, term1, term2)
+            try:
+                product = memo[key]
+            except KeyError:
+                product = _ladder_product_terms(term1, term2, memo)
+                if product is None:
+                    product = _product_terms(
+                        OperatorTimes.create(term1, term2), memo)
+                memo[key] = product
+            _add_terms(result, product, coeff1 * coeff2)
+    return result
+
+
+def _ladder_product_terms(term1, term2, memo):
+    """Normal form of the product of two terms, if on all Hilbert spaces on
+    which both terms act, they consist only of :class:`Create` and
+    :class:`Destroy` operators. On these Hilbert spaces, the product is
+    normal-ordered in closed form (see :func:`_normal_order_ladder`), instead
+    of commuting one pair of operators at a time. Return None if the terms
+    have no Hilbert spaces in common, or if they act on a common Hilbert
+    space with any other operators. The resulting terms are cached in `memo`.
+    """
+    factors = OrderedDict()  # LocalSpace => list of factors, in order
+    term_spaces = []
+    for term in (term1, term2):
+        spaces = set()
+        if term is not IdentityOperator:
+            if isinstance(term, OperatorTimes):
+                operands = term.operands
+            else:
+                operands = (term, )
+            for operand in operands:
+                hs = operand.space
+                if not isinstance(hs, LocalSpace):
+                    return None
+                spaces.add(hs)
+                factors.setdefault(hs, []).append(operand)
+        term_spaces.append(spaces)
+    common_spaces = term_spaces[0] & term_spaces[1]
+    if len(common_spaces) == 0:
+        return None
+    for hs in common_spaces:
+        if not all(isinstance(f, (Create, Destroy)) for f in factors[hs]):
+            return None
+    # for every Hilbert space, a list of alternatives (factors, coeff)
+    hs_summands = []
+    for (hs, hs_factors) in factors.items():
+        if hs in common_spaces:
+            a_dag, a = Create.create(hs=hs), Destroy.create(hs=hs)
+            hs_summands.append([
+                ([a_dag] * n_create + [a] * n_destroy, coeff)
+                for ((n_create, n_destroy), coeff)
+                in _normal_order_ladder(hs_factors).items()])
+        else:
+            hs_summands.append([(hs_factors, 1)])
+    terms = {}
+    for combo in cartesian_product(*hs_summands):
+        term_factors = [_LADDER_PRODUCT]
+        coeff = 1
+        for (hs_factors, hs_coeff) in combo:
+            term_factors.extend(hs_factors)
+            coeff *= hs_coeff
+        key = tuple(term_factors)
+        try:
+            term = memo[key]
+        except KeyError:
+            term = OperatorTimes.create(*term_factors[1:])
+            memo[key] = term
+        _add_terms(terms, {term: coeff})
+    return terms
+
+
+def _normal_order_ladder(ladder_ops):
+    r"""Normal-order the product of a list of :class:`Create` and
+    :class:`Destroy` operators acting on the same Hilbert space.
+
+    Return a dict that maps a tuple ``(n_create, n_destroy)`` to the integer
+    coefficient of the normal-ordered product of `n_create` creation
+    operators and `n_destroy` annihilation operators. The products are
+    calculated in closed form, from
+
+    .. math::
+
+        \Op{a}^q \Op{a}^{\dagger r} = \sum_{j=0}^{\min(q, r)}
+            \binom{q}{j} \binom{r}{j} j! \,
+            \Op{a}^{\dagger (r-j)} \Op{a}^{q-j}
+    """
+    # split into blocks a^{dagger r} a^s
+    blocks = []
+    (r, s) = (0, 0)
+    for op in ladder_ops:
+        if isinstance(op, Create):
+            if s > 0:
+                blocks.append((r, s))
+                (r, s) = (0, 0)
+            r += 1
+        else:
+            s += 1
+    blocks.append((r, s))
+    poly = {(0, 0): 1}
+    for (r, s) in blocks:
+        new_poly = {}
+        for ((p, q), coeff) in poly.items():
+            for j in range(min(q, r) + 1):
+                key = (p + r - j, q + s - j)
+                new_poly[key] = new_poly.get(key, 0) + coeff
+                # binom(q, j+1) binom(r, j+1) (j+1)! from the j'th term
+                coeff = coeff * (q - j) * (r - j) // (j + 1)
+        poly = new_poly
+    return poly
+
+
+def _add_terms(terms, other_terms, coeff=1):
+    """In-place addition of `coeff` times the normal form `other_terms` to
+    the normal form `terms`"""
+    for (term, other_coeff) in other_terms.items():
+        if coeff != 1:
+            other_coeff = coeff * other_coeff
+        try:
+            terms[term] = terms[term] + other_coeff
+        except KeyError:
+            terms[term] = other_coeff
+
+
+def _terms_to_operator(terms):
+    """Convert a normal form (see :func:`_expand_terms`) to an operator"""
+    return OperatorPlus.create(
+        *[coeff * term for (term, coeff) in terms.items()])
+
+
 def factor_coeff(cls, ops, kwargs):
     """Factor out coefficients of all factors."""
     coeffs, nops = zip(*map(_coeff_term, ops))
@@ -1788,7 +2255,7 @@ def Jpjmcoeff(ls, m, shift=False):
         s = sympify(n-1)/2
         assert n == int(2*s + 1)
         if isinstance(m, str):
-            m = ls.basis.index(m) - s  # m is now Sympy expression
+            m = ls.basis_index(m) - s  # m is now Sympy expression
         elif isinstance(m, int):
             if shift:
                 assert 0 <= m < n
@@ -1813,7 +2280,7 @@ def Jzjmcoeff(ls, m, shift):
         s = sympify(n-1)/2
         assert n == int(2*s + 1)
         if isinstance(m, str):
-            return ls.basis.index(m) - s
+            return ls.basis_index(m) - s
         elif isinstance(m, int):
             if shift:
                 assert 0 <= m < n
@@ -1839,7 +2306,7 @@ def Jmjmcoeff(ls, m, shift):
         s = sympify(n-1)/2
         assert n == int(2*s + 1)
         if isinstance(m, str):
-            m = ls.basis.index(m) - s  # m is now Sympy expression
+            m = ls.basis_index(m) - s  # m is now Sympy expression
         elif isinstance(m, int):
             if shift:
                 assert 0 <= m < n
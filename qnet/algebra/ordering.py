@@ -29,7 +29,13 @@ value that `expr_order_key` returns for each object. Note that `expr_order_key`
 defers to the object's `_order_key` property, if available. This property
 should be defined for all QNET Expressions, generally ordering objects
 according to their type, then their label (if any), then their pre-factor then
-any other properties.
+any other properties. It should be calculated only once per instance.
+
+A `KeyTuple` may contain elements of different types. For comparison, it is
+mapped to a canonical plain tuple in which numbers sort before strings, strings
+before (nested) tuples, tuples before None, and None before Sympy expressions
+(which are ordered by their `sort_key`). Thus, sorting never requires the
+string representation of any object.
 
 We assume that quantum operations have either full commutativity (sums, or
 products of states), or commutativity of objects only in different Hilbert
@@ -44,40 +50,78 @@ their replacements to all the desired algebraic classes.
 """
 
 from collections import OrderedDict
+from numbers import Real
+
+from sympy import Basic as SympyBasic
 
 from .scalar_types import SCALAR_TYPES
 
 __all__ = []
 
 __private__ = [  # anything not in __all__ must be in __private__
-    'KeyTuple', 'expr_order_key', 'DisjunctCommutativeHSOrder',
-    'FullCommutativeHSOrder'
+    'KeyTuple', 'expr_order_key', 'scalar_times_order_key',
+    'DisjunctCommutativeHSOrder', 'FullCommutativeHSOrder'
 ]
 
 
+def _canonical(value):
+    """Map an element of a :class:`KeyTuple` to a plain tuple that can be
+    compared to the canonical value of any other element"""
+    if isinstance(value, KeyTuple):
+        return (2, value.canonical)
+    elif isinstance(value, str):
+        return (1, value)
+    elif isinstance(value, Real) and not isinstance(value, SympyBasic):
+        return (0, value)
+    elif isinstance(value, (tuple, list)):
+        return (2, tuple([_canonical(v) for v in value]))
+    elif value is None:
+        return (3, )
+    elif isinstance(value, SympyBasic):
+        return (4, value.sort_key())
+    elif isinstance(value, complex):
+        return (5, (value.real, value.imag))
+    else:
+        return (6, value.__class__.__name__, str(value))
+
+
 class KeyTuple(tuple):
     """A tuple that allows for ordering, facilitating the default ordering of
-    Operations. It differs from a normal tuple in that it falls back to string
-    comparison if any elements are not directly comparable"""
+    Operations. It differs from a normal tuple in that elements of different
+    types may be compared, see :attr:`canonical`"""
+
+    @property
+    def canonical(self):
+        """Plain tuple that has the same ordering as the `KeyTuple`, but in
+        which all elements are comparable. It is calculated only once"""
+        try:
+            return self._canonical
+        except AttributeError:
+            self._canonical = tuple([_canonical(v) for v in self])
+            return self._canonical
+
     def __lt__(self, other):
         if isinstance(other, (SCALAR_TYPES, str)):
             return False
-        for (a, b) in zip(self, other):
-            try:
-                if a < b:
-                    return True
-                elif a > b:
-                    return False
-            except (TypeError, ValueError):
-                if str(a) < str(b):
-                    return True
-                elif str(a) > str(b):
-                    return False
-        if len(self) < len(other):
+        if not isinstance(other, KeyTuple):
+            other = KeyTuple(other)
+        return self.canonical < other.canonical
+
+    def __gt__(self, other):
+        if isinstance(other, (SCALAR_TYPES, str)):
             return True
-        elif len(self) > len(other):
-            return False
-        return None
+        if not isinstance(other, KeyTuple):
+            other = KeyTuple(other)
+        return self.canonical > other.canonical
+
+    def __add__(self, other):
+        return KeyTuple(tuple.__add__(self, other))
+
+    def __getitem__(self, index):
+        item = tuple.__getitem__(self, index)
+        if isinstance(index, slice):
+            return KeyTuple(item)
+        return item
 
     def __repr__(self):
         return self.__class__.__name__ + tuple.__repr__(self)
@@ -99,6 +143,21 @@ def expr_order_key(expr):
         return str(expr)
 
 
+def scalar_times_order_key(coeff, term_key):
+    """Order key for the product of the scalar `coeff` and an expression with
+    the order key `term_key`. The coefficient replaces the third element of
+    `term_key`, with the smallest coefficients first, and is also appended
+    to the key, to distinguish between different symbolic coefficients"""
+    if isinstance(coeff, SympyBasic) and not coeff.is_number:
+        c = float('inf')  # avoid numerical evaluation of symbolic expressions
+    else:
+        try:
+            c = abs(float(coeff))  # smallest coefficients first
+        except (ValueError, TypeError):
+            c = float('inf')
+    return KeyTuple(term_key[:2] + (c, ) + term_key[3:] + (coeff, ))
+
+
 class DisjunctCommutativeHSOrder():
     """Auxiliary class that generates the correct pseudo-order relation for
     operator products.  Only operators acting on disjoint Hilbert spaces
@@ -131,10 +190,10 @@ class DisjunctCommutativeHSOrder():
 
     def __lt__(self, other):
         if self.trivial and other.trivial:
-            return self._op_order < other._op_order
+            return _lt(self._op_order, other._op_order)
         else:
             if self.space.isdisjoint(other.space):
-                return self._space_order < other._space_order
+                return _lt(self._space_order, other._space_order)
         return None  # no ordering
 
 
@@ -164,6 +223,14 @@ class FullCommutativeHSOrder():
 
     def __lt__(self, other):
         if self.space == other.space:
-            return self._op_order < other._op_order
+            return _lt(self._op_order, other._op_order)
         else:
-            return self._space_order < other._space_order
+            return _lt(self._space_order, other._space_order)
+
+
+def _lt(key1, key2):
+    """Compare two order keys (usually instances of :class:`KeyTuple`)"""
+    try:
+        return key1.canonical < key2.canonical
+    except AttributeError:
+        return key1 < key2
@@ -0,0 +1,155 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+r"""Opt-in parallel processing of the independent parts of large expressions
+(e.g. the elements of a matrix, or the terms of a sum) in a pool of worker
+processes.
+
+Parallel processing is enabled either for a single call, through the
+`workers` argument of e.g.
+:meth:`~qnet.algebra.matrix_algebra.Matrix.simplify_scalar`,
+:meth:`~qnet.algebra.matrix_algebra.Matrix.expand`,
+:meth:`~qnet.algebra.operator_algebra.Operator.simplify_scalar`, or
+:meth:`~qnet.algebra.circuit_algebra.SLH.simplify_scalar`, or for all calls,
+by installing an executor through :func:`set_parallel_executor`::
+
+    >>> from concurrent.futures import ProcessPoolExecutor
+    >>> orig_executor = set_parallel_executor(ProcessPoolExecutor(4))
+    >>> # ... some calculation ...
+    >>> set_parallel_executor(orig_executor).shutdown()
+
+The parts of an expression are sent to the worker processes and back by
+pickling. Unpickling re-creates every expression through its `create` method,
+so that the results are interned in the instance cache of the main process.
+Only the outermost operation is distributed: within the worker processes, all
+work is serial.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from .context_vars import ContextVar
+
+__all__ = ['set_parallel_executor']
+
+__private__ = [  # anything not in __all__ must be in __private__
+    'parallel_map', 'parallel_workers']
+
+# (executor, pid) of the executor installed by set_parallel_executor, or None
+_EXECUTOR = None
+
+# (executor, pid) of the executor activated by `parallel_workers`, or None
+# to fall back to _EXECUTOR. An executor of None means serial processing.
+_ACTIVE_EXECUTOR = ContextVar('ACTIVE_EXECUTOR', default=None)
+
+
+def set_parallel_executor(executor):
+    """Install `executor` for processing the independent parts of
+    expressions in parallel, for any operation that supports it and is not
+    given an explicit `workers` argument. This affects all threads.
+
+    Args:
+        executor (concurrent.futures.Executor or None): The new executor,
+            usually a :class:`concurrent.futures.ProcessPoolExecutor`. If
+            None, all work is serial (the default)
+
+    Returns:
+        The original executor, which may be passed to
+        :func:`set_parallel_executor` at a later point in order to restore it.
+        The caller is responsible for shutting down any executor that is no
+        longer in use.
+    """
+    global _EXECUTOR
+    orig_executor = None if _EXECUTOR is None else _EXECUTOR[0]
+    _EXECUTOR = None if executor is None else (executor, os.getpid())
+    return orig_executor
+
+
+def _current_executor():
+    """Return the executor to be used by :func:`parallel_map`, or None for
+    serial processing"""
+    active = _ACTIVE_EXECUTOR.get()
+    if active is None:
+        active = _EXECUTOR
+    if active is None:
+        return None
+    executor, pid = active
+    if pid != os.getpid():
+        # a forked worker process inherits the executor of its parent
+        return None
+    return executor
+
+
+@contextmanager
+def parallel_workers(workers):
+    """Context manager that selects the executor for :func:`parallel_map` (in
+    the current thread)
+
+    Args:
+        workers (None, int, or concurrent.futures.Executor): If None, keep
+            the current executor. If an integer greater than 1, use a
+            :class:`concurrent.futures.ProcessPoolExecutor` with the given
+            number of worker processes, which is shut down when leaving the
+            context. If 0 or 1, process everything serially. Otherwise, use
+            the given executor.
+    """
+    if workers is None:
+        yield
+        return
+    shutdown = False
+    if isinstance(workers, int):
+        if workers < 0:
+            raise ValueError("workers must be >= 0")
+        if workers > 1:
+            executor = ProcessPoolExecutor(workers)
+            shutdown = True
+        else:
+            executor = None
+    else:
+        executor = workers
+    token = _ACTIVE_EXECUTOR.set((executor, os.getpid()))
+    try:
+        yield
+    finally:
+        _ACTIVE_EXECUTOR.reset(token)
+        if shutdown:
+            executor.shutdown()
+
+
+def _serial_call(func, item):
+    """Call `func(item)` with parallel processing disabled"""
+    token = _ACTIVE_EXECUTOR.set((None, os.getpid()))
+    try:
+        return func(item)
+    finally:
+        _ACTIVE_EXECUTOR.reset(token)
+
+
+def parallel_map(func, items):
+    """Return the list ``[func(item) for item in items]``, evaluated by the
+    executor selected through :func:`parallel_workers` or
+    :func:`set_parallel_executor`, if any. For parallel evaluation, `func` and
+    `items` must be picklable. The evaluation of `func` is always serial."""
+    items = list(items)
+    executor = _current_executor()
+    if executor is None or len(items) < 2:
+        return [func(item) for item in items]
+    chunksize = max(1, len(items) // (4 * (os.cpu_count() or 1)))
+    return list(executor.map(
+        partial(_serial_call, func), items, chunksize=chunksize))
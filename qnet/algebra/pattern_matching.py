@@ -41,6 +41,26 @@ __all__ = [
 __private__ = ['ProtoExpr']  # anything not in __all__ must be in __private__
 
 
+class _WildcardConflict(KeyError):
+    """KeyError raised by :class:`MatchDict` when trying to set a key to a
+    value different from the existing one. The error message is only
+    generated when required."""
+
+    def __str__(self):
+        return repr('{} has already been set'.format(self.args[0]))
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, str(self))
+
+
+def _lazy_exc_str(exc):
+    """Return a function that returns ``str(exc)``, without keeping a
+    reference to `exc` (and thus its traceback)"""
+    exc_cls = exc.__class__
+    exc_args = exc.args
+    return lambda: str(exc_cls(*exc_args))
+
+
 class MatchDict(OrderedDict):
     """Dictionary of wildcard names to expressions. Once the value for a key is
     set, attempting to set it again with a different value raises a KeyError.
@@ -58,18 +78,32 @@ class MatchDict(OrderedDict):
         success (bool):  Value of the MatchDict object in a boolean context:
             ``bool(match) == match.success``
         reason (str):  If `success` is False, string explaining why the match
-            failed
+            failed. The reason may be set to a callable that returns the
+            string; in this case, the string is only generated when `reason` is
+            first accessed.
         merge_lists (int): Code that indicates how to combine multiple values
             that are lists
     """
 
     def __init__(self, *args):
         self.success = True
-        self.reason = ""
+        self._reason = ""
         self._len = 0
         self.merge_lists = 0
         super().__init__(*args)
 
+    @property
+    def reason(self):
+        reason = self._reason
+        if callable(reason):
+            reason = reason()
+            self._reason = reason
+        return reason
+
+    @reason.setter
+    def reason(self, value):
+        self._reason = value
+
     def __delitem__(self, key, **kwargs):
         raise KeyError('Read-only dictionary')
 
@@ -85,7 +119,7 @@ class MatchDict(OrderedDict):
             if self[key] == value:
                 return
             else:
-                raise KeyError('{} has already been set'.format(key))
+                raise _WildcardConflict(key)
         self._len += 1
         OrderedDict.__setitem__(self, key, value)
 
@@ -105,7 +139,10 @@ class MatchDict(OrderedDict):
             try:
                 if not other.success:
                     self.success = False
-                    self.reason = other.reason
+                    try:
+                        self._reason = other._reason  # keep lazy reason
+                    except AttributeError:
+                        self.reason = other.reason
             except AttributeError:
                 pass
 
@@ -234,6 +271,7 @@ class Pattern():
         else:
             self.conditions = conditions
         self._repr = None  # lazy evaluation
+        self._compiled = None  # see `compile` method
         self._arg_iterator = iter
         if self._non_single_arg_on_left:
             # When the non-single argument is on the left, we move through
@@ -297,21 +335,25 @@ class Pattern():
                 res.merge_lists = 1
             else:
                 res.merge_lists = -1
+        # Failure reasons are generated lazily, as failed matches are very
+        # common and `repr(expr)` can be expensive
         if self.head is not None:
             if not isinstance(expr, self.head):
-                res.reason = ("%s is not an instance of %s"
-                              % (repr(expr), self._repr_head()))
+                res.reason = lambda: (
+                    "%s is not an instance of %s"
+                    % (repr(expr), self._repr_head()))
                 res.success = False
                 return res
         for i_cond, condition in enumerate(self.conditions):
             if not condition(expr):
-                res.reason = ("%s does not meet condition %d"
-                              % (repr(expr), i_cond+1))
+                res.reason = lambda: (
+                    "%s does not meet condition %d" % (repr(expr), i_cond+1))
                 res.success = False
                 return res
         try:
             if self.args is not None:
                 arg_pattern = self.extended_arg_patterns()
+                current_arg_pattern = None
                 for arg in self._arg_iterator(expr.args):
                     current_arg_pattern = next(arg_pattern)
                     res.update(match_pattern(current_arg_pattern, arg))
@@ -330,22 +372,27 @@ class Pattern():
                     if not res.success:
                         return res
         except AttributeError as exc_info:
-            res.reason = ("%s is a scalar, not an Expression: %s"
-                          % (repr(expr), str(exc_info)))
+            exc_str = _lazy_exc_str(exc_info)
+            res.reason = lambda: (
+                "%s is a scalar, not an Expression: %s"
+                % (repr(expr), exc_str()))
             res.success = False
         except ValueError as exc_info:
-            res.reason = "%s: %s" % (repr(expr), str(exc_info))
+            exc_str = _lazy_exc_str(exc_info)
+            res.reason = lambda: "%s: %s" % (repr(expr), exc_str())
             res.success = False
         except StopIteration:
-            res.reason = ("%s has an too many positional arguments"
-                          % repr(expr))
+            res.reason = lambda: (
+                "%s has an too many positional arguments" % repr(expr))
+            res.success = False
+        except _WildcardConflict as exc_info:
+            exc_str = _lazy_exc_str(exc_info)
+            res.reason = lambda: "Double wildcard: %s" % exc_str()
             res.success = False
         except KeyError as exc_info:
-            if "has already been set" in str(exc_info):
-                res.reason = "Double wildcard: %s" % str(exc_info)
-            else:
-                res.reason = ("%s has no keyword argument %s"
-                              % (repr(expr), str(exc_info)))
+            exc_str = _lazy_exc_str(exc_info)
+            res.reason = lambda: (
+                "%s has no keyword argument %s" % (repr(expr), exc_str()))
             res.success = False
         if res.success:
             if self.wc_name is not None:
@@ -355,10 +402,33 @@ class Pattern():
                     else:
                         res[self.wc_name] = expr
                 except KeyError as exc_info:
-                    res.reason = "Double wildcard: %s" % str(exc_info)
+                    exc_str = _lazy_exc_str(exc_info)
+                    res.reason = lambda: "Double wildcard: %s" % exc_str()
                     res.success = False
         return res
 
+    def compile(self):
+        """Return a function that takes an expression and matches it against
+        the pattern. The function returns a dict of wildcard names to matched
+        (sub-)expressions if the match is successful, and None otherwise.
+        The result is equivalent to that of :func:`match_pattern` (except that
+        there is no failure reason), but the matching is considerably faster.
+
+        The compiled function is cached, so the pattern should not be modified
+        after calling this method.
+
+        >>> A = wc("A", head=int)
+        >>> B = wc("B", head=str)
+        >>> match = pattern_head(A, B).compile()
+        >>> match(ProtoExpr([1, 'b'], {})) == {'A': 1, 'B': 'b'}
+        True
+        >>> print(match(ProtoExpr([1, 2], {})))
+        None
+        """
+        if self._compiled is None:
+            self._compiled = _compile_pattern(self)
+        return self._compiled
+
     def findall(self, expr):
         """Return a list of all matching (sub-)expressions in `expr`"""
         result = []
@@ -568,6 +638,136 @@ class ProtoExpr(Sequence):
                     tuple(sorted(self.kwargs.items())))
 
 
+def _bind(match_dict, key, value, merge_lists):
+    """Set `key` in `match_dict` to `value`, with the same semantics as
+    :meth:`MatchDict.__setitem__`. Return False if the `key` is already set to
+    a different value"""
+    try:
+        existing = match_dict[key]
+    except KeyError:
+        match_dict[key] = value
+        return True
+    if isinstance(existing, list) and isinstance(value, list):
+        if merge_lists < 0:
+            existing.extend(value)
+            return True
+        elif merge_lists > 0:
+            existing[0:0] = value
+            return True
+    return bool(existing == value)
+
+
+def _compile_arg(arg):
+    """Return a compiled matcher for the (sub-)pattern or literal `arg`"""
+    if isinstance(arg, Pattern):
+        return arg.compile()
+    else:
+        def match_literal(expr):
+            if arg == expr:
+                return {}
+            return None
+        return match_literal
+
+
+def _compile_pattern(pat):
+    """Compile `pat` into a matcher function, see :meth:`Pattern.compile`"""
+    head = pat.head
+    conditions = tuple(pat.conditions)
+    wc_name = pat.wc_name
+    wc_is_list = pat.mode > Pattern.single
+    merge_lists = 0
+    if pat._has_non_single_arg:
+        merge_lists = 1 if pat._non_single_arg_on_left else -1
+    reverse = pat._non_single_arg_on_left
+
+    check_args = pat.args is not None
+    # `prefix` are the arg patterns (in the order in which they are applied)
+    # before the first non-single pattern `rep`, which matches all remaining
+    # args
+    prefix = []
+    rep = None
+    rep_min_count = 0  # 0 or 1, for zero_or_more / one_or_more
+    record_empty = False  # record [] for `rep` if it matches zero args?
+    if check_args:
+        ordered_args = list(pat._arg_iterator(pat.args))
+        for arg in ordered_args:
+            if isinstance(arg, Pattern) and arg.mode > Pattern.single:
+                rep = arg
+                break
+            prefix.append(arg)
+        if rep is not None:
+            # emulate Pattern._check_last_arg_pattern
+            current = prefix[-1] if len(prefix) > 0 else None
+            if rep.mode == Pattern.zero_or_more:
+                record_empty = (rep.wc_name is not None and rep != current)
+            elif rep != current:
+                rep_min_count = 1
+    n_prefix = len(prefix)
+    prefix_matchers = tuple([_compile_arg(arg) for arg in prefix])
+    rep_matcher = None
+    rep_wc_name = None
+    if rep is not None:
+        rep_matcher = rep.compile()
+        rep_wc_name = rep.wc_name
+    kwargs_matchers = None
+    if pat.kwargs is not None:
+        kwargs_matchers = tuple([
+            (key, _compile_arg(arg)) for (key, arg) in pat.kwargs.items()])
+
+    def match(expr):
+        if head is not None and not isinstance(expr, head):
+            return None
+        for condition in conditions:
+            if not condition(expr):
+                return None
+        result = {}
+        try:
+            if check_args:
+                args = expr.args
+                n = len(args)
+                if rep is None:
+                    if n != n_prefix:
+                        return None
+                elif n < n_prefix + rep_min_count:
+                    return None
+                if reverse:
+                    args = args[::-1]
+                for i in range(n):
+                    if i < n_prefix:
+                        sub_result = prefix_matchers[i](args[i])
+                    else:
+                        sub_result = rep_matcher(args[i])
+                    if sub_result is None:
+                        return None
+                    for key, val in sub_result.items():
+                        if not _bind(result, key, val, merge_lists):
+                            return None
+                if record_empty and n == n_prefix:
+                    if not _bind(result, rep_wc_name, [], merge_lists):
+                        return None
+            if kwargs_matchers is not None:
+                expr_kwargs = expr.kwargs
+                for kw, matcher in kwargs_matchers:
+                    sub_result = matcher(expr_kwargs[kw])
+                    if sub_result is None:
+                        return None
+                    for key, val in sub_result.items():
+                        if not _bind(result, key, val, merge_lists):
+                            return None
+        except (AttributeError, ValueError, KeyError, StopIteration):
+            return None
+        if wc_name is not None:
+            if wc_is_list:
+                value = [expr, ]
+            else:
+                value = expr
+            if not _bind(result, wc_name, value, merge_lists):
+                return None
+        return result
+
+    return match
+
+
 def match_pattern(expr_or_pattern: object, expr: object) -> MatchDict:
     """Recursively match `expr` with the given `expr_or_pattern`, which is
     either a direct expression (equal to `expr` for a successful match), or an
@@ -581,6 +781,7 @@ def match_pattern(expr_or_pattern: object, expr: object) -> MatchDict:
         else:
             res = MatchDict()
             res.success = False
-            res.reason = "Expressions '%s' and '%s' are not the same" % (
-                          repr(expr_or_pattern), repr(expr))
+            res.reason = lambda: (
+                "Expressions '%s' and '%s' are not the same"
+                % (repr(expr_or_pattern), repr(expr)))
             return res
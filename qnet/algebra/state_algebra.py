@@ -43,7 +43,8 @@ from .operator_algebra import (
     Operator, sympyOne, ScalarTimesOperator, OperatorTimes, OperatorPlus,
     IdentityOperator, ZeroOperator, LocalSigma, Create, Destroy, Jplus,
     Jminus, Jz, LocalOperator, Jpjmcoeff, Jzjmcoeff, Jmjmcoeff, Displace, Phase)
-from .ordering import KeyTuple, expr_order_key, FullCommutativeHSOrder
+from .ordering import (
+    KeyTuple, expr_order_key, scalar_times_order_key, FullCommutativeHSOrder)
 
 __all__ = [
     'OverlappingSpaces', 'SpaceTooLargeError', 'UnequalSpaces', 'BasisKet',
@@ -104,6 +105,8 @@ def check_op_ket_space(cls, ops, kwargs):
 class Ket(metaclass=ABCMeta):
     """Basic Ket algebra class to represent Hilbert Space states"""
 
+    __slots__ = ()
+
     @abstractproperty
     def space(self):
         """The associated HilbertSpace"""
@@ -177,6 +180,9 @@ class KetSymbol(Ket, Expression):
     :param hs: Associated Hilbert space.
     :type hs: HilbertSpace
     """
+
+    __slots__ = ('_label', '_hs', '_order_key')
+
     _rx_label = re.compile('^[A-Za-z0-9+-]+(_[A-Za-z0-9().+-]+)?$')
 
     def __init__(self, label, *, hs):
@@ -216,7 +222,7 @@ class KetSymbol(Ket, Expression):
     def _series_expand(self, param, about, order):
         return (self, ) + (0, ) * (order - 1)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return set([self, ])
 
 
@@ -225,6 +231,8 @@ class LocalKet(KetSymbol):
     not include operations, even if these operations only involve states acting
     on the same local space"""
 
+    __slots__ = ()
+
     def __init__(self, label, *, hs):
         if isinstance(hs, (str, int)):
             hs = LocalSpace(hs)
@@ -232,7 +240,7 @@ class LocalKet(KetSymbol):
             raise ValueError("hs must be a LocalSpace")
         super().__init__(label, hs=hs)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return set([])
 
 
@@ -240,6 +248,8 @@ class LocalKet(KetSymbol):
 class ZeroKet(Ket, Expression, metaclass=Singleton):
     """ZeroKet constant (singleton) object for the null-state."""
 
+    _order_key = KeyTuple(('~~', 'ZeroKet', 1.0))
+
     @property
     def space(self):
         return FullSpace
@@ -248,10 +258,6 @@ class ZeroKet(Ket, Expression, metaclass=Singleton):
     def args(self):
         return tuple()
 
-    @property
-    def _order_key(self):
-        return KeyTuple(('~~', self.__class__.__name__, 1.0))
-
     def _expand(self):
         return self
 
@@ -261,7 +267,7 @@ class ZeroKet(Ket, Expression, metaclass=Singleton):
     def __eq__(self, other):
         return self is other or other == 0
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return set([])
 
 
@@ -271,6 +277,8 @@ class TrivialKet(Ket, Expression, metaclass=Singleton):
     This is the neutral element under the state tensor-product.
     """
 
+    _order_key = KeyTuple(('~~', 'TrivialKet', 1.0))
+
     @property
     def space(self):
         return TrivialSpace
@@ -285,17 +293,13 @@ class TrivialKet(Ket, Expression, metaclass=Singleton):
     def args(self):
         return tuple()
 
-    @property
-    def _order_key(self):
-        return KeyTuple(('~~', self.__class__.__name__, 1.0))
-
     def _series_expand(self, param, about, order):
         return (self,) + (0,)*(order - 1)
 
     def __eq__(self, other):
         return self is other or other == 1
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return set([])
 
 
@@ -328,12 +332,15 @@ class BasisKet(LocalKet):
             >>> print(ascii(BasisKet(0, hs=hs)))
             |g>^(tls)
     """
+
+    __slots__ = ('_index', )
+
     def __init__(self, label_or_index, *, hs):
         if isinstance(hs, (str, int)):
             hs = LocalSpace(hs)
         if isinstance(label_or_index, str):
             label = label_or_index
-            ind = hs.basis_labels.index(label)  # raises BasisNotSetError
+            ind = hs.basis_index(label)  # raises BasisNotSetError
         elif isinstance(label_or_index, int):
             if hs.has_basis:
                 label = hs.basis_labels[label_or_index]
@@ -420,6 +427,9 @@ class CoherentStateKet(LocalKet):
     :param LocalSpace hs: The local Hilbert space degree of freedom.
     :param SCALAR_TYPES amp: The coherent displacement amplitude.
     """
+
+    __slots__ = ('_ampl', )
+
     _rx_label = re.compile('^.*$')
 
     def __init__(self, ampl, *, hs):
@@ -460,7 +470,7 @@ class CoherentStateKet(LocalKet):
 
         return CoherentStateKet(ampc, hs=hs)
 
-    def all_symbols(self):
+    def _all_symbols(self):
         if isinstance(self.ampl, SympyBasic):
             return set([self.ampl, ])
         else:
@@ -482,6 +492,9 @@ class KetPlus(Ket, Operation):
     :param summands: State summands.
     :type summands: Ket
     """
+
+    __slots__ = ('_order_key', )
+
     neutral_element = ZeroKet
     _binary_rules = OrderedDict()  # see end of module
     _simplifications = [assoc, orderby, filter_neutral, check_kets_same_space,
@@ -517,6 +530,9 @@ class TensorKet(Ket, Operation):
     :param factors: Ket factors.
     :type factors: Ket
     """
+
+    __slots__ = ('_space', '_label', '_order_key')
+
     _binary_rules = OrderedDict()  # see end of module
     neutral_element = TrivialKet
     _simplifications = [assoc, orderby, filter_neutral, match_replace_binary]
@@ -601,18 +617,20 @@ class ScalarTimesKet(Ket, Operation):
     :param term: The ket that is multiplied.
     :type term: Ket
     """
+
+    __slots__ = ('_cached_order_key', )
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [match_replace, ]
 
     @property
     def _order_key(self):
-        from qnet.printing import ascii
-        t = self.term._order_key
         try:
-            c = abs(float(self.coeff))  # smallest coefficients first
-        except (ValueError, TypeError):
-            c = float('inf')
-        return KeyTuple(t[:2] + (c, ) + t[3:] + (ascii(self.coeff), ))
+            return self._cached_order_key
+        except AttributeError:
+            self._cached_order_key = scalar_times_order_key(
+                self.coeff, self.term._order_key)
+            return self._cached_order_key
 
     @property
     def space(self):
@@ -662,14 +680,21 @@ class OperatorTimesKet(Ket, Operation):
     :param Operator op: The multiplying operator.
     :param Ket ket: The ket that is multiplied.
     """
+
+    __slots__ = ('_cached_order_key', )
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [match_replace, check_op_ket_space]
 
     @property
     def _order_key(self):
-        return KeyTuple(
-            (self.__class__.__name__, self.ket.__class__.__name__, 1.0) +
-            self.ket._order_key + self.operator._order_key)
+        try:
+            return self._cached_order_key
+        except AttributeError:
+            self._cached_order_key = KeyTuple(
+                (self.__class__.__name__, self.ket.__class__.__name__, 1.0) +
+                self.ket._order_key + self.operator._order_key)
+            return self._cached_order_key
 
     @property
     def space(self):
@@ -712,6 +737,9 @@ class Bra(Operation):
 
     :param Ket k: The state to represent as Bra.
     """
+
+    __slots__ = ('_order_key', )
+
     def __init__(self, ket):
         self._order_key = KeyTuple(
                 (self.__class__.__name__, ket.__class__.__name__, 1.0) +
@@ -796,6 +824,9 @@ class BraKet(Operator, Operation):
     :param Ket bra: The anti-linear state argument.
     :param Ket ket: The linear state argument.
     """
+
+    __slots__ = ('_order_key', )
+
     _rules = OrderedDict()  # see end of module
     _space = TrivialSpace
     _simplifications = [check_kets_same_space, match_replace]
@@ -841,6 +872,9 @@ class KetBra(Operator, Operation):
     :param Ket ket: The first state that defines the range of the operator.
     :param Ket bra: The second state that defines the Kernel of the operator.
     """
+
+    __slots__ = ('_order_key', )
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [check_kets_same_space, match_replace]
 
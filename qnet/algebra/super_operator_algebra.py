@@ -43,9 +43,11 @@ from .pattern_matching import wc, pattern_head, pattern
 from .hilbert_space_algebra import TrivialSpace, LocalSpace, ProductSpace
 from .operator_algebra import (
     Operator, sympyOne, ScalarTimesOperator, OperatorPlus, ZeroOperator,
-    IdentityOperator, simplify_scalar, Create, Destroy)
+    IdentityOperator, simplify_scalar, simplify_scalar_strategy, Create,
+    Destroy)
 from .ordering import (
-    KeyTuple, FullCommutativeHSOrder, DisjunctCommutativeHSOrder)
+    KeyTuple, scalar_times_order_key, FullCommutativeHSOrder,
+    DisjunctCommutativeHSOrder)
 from .matrix_algebra import Matrix
 
 
@@ -87,6 +89,8 @@ class SuperOperator(metaclass=ABCMeta):
     on which it is taken to act non-trivially.
     """
 
+    __slots__ = ()
+
     @abstractproperty
     def space(self):
         """The Hilbert space associated with the operator on which it acts
@@ -111,14 +115,17 @@ class SuperOperator(metaclass=ABCMeta):
         """
         return self._expand()
 
-    def simplify_scalar(self):
+    def simplify_scalar(self, strategy=None):
         """
         Simplify all scalar coefficients within the Operator expression.
 
+        :param strategy: How to simplify sympy scalars, see
+            :func:`~qnet.algebra.operator_algebra.simplify_scalar`
         :return: The simplified expression.
         :rtype: Operator
         """
-        return self._simplify_scalar()
+        with simplify_scalar_strategy(strategy):
+            return self._simplify_scalar()
 
     def _simplify_scalar(self):
         return self
@@ -169,6 +176,8 @@ class SuperOperator(metaclass=ABCMeta):
 class SuperOperatorOperation(SuperOperator, Operation, metaclass=ABCMeta):
     """Base class for Operations acting only on SuperOperator arguments."""
 
+    __slots__ = ('_space', '_order_key')
+
     def __init__(self, *operands):
         op_spaces = [o.space for o in operands]
         self._space = ProductSpace.create(*op_spaces)
@@ -207,6 +216,9 @@ class SuperOperatorSymbol(SuperOperator, Expression):
     :param hs: Associated Hilbert space.
     :type hs: HilbertSpace
     """
+
+    __slots__ = ('_label', '_hs', '_order_key')
+
     _rx_label = re.compile('^[A-Za-z][A-Za-z0-9]*(_[A-Za-z0-9().+-]+)?$')
 
     def __init__(self, label, *, hs):
@@ -242,7 +254,7 @@ class SuperOperatorSymbol(SuperOperator, Expression):
     def _expand(self):
         return self
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return {self}
 
 
@@ -250,14 +262,12 @@ class SuperOperatorSymbol(SuperOperator, Expression):
 class IdentitySuperOperator(SuperOperator, Expression, metaclass=Singleton):
     """IdentitySuperOperator constant (singleton) object."""
 
+    _order_key = KeyTuple(('~~', 'IdentitySuperOperator', 1.0))
+
     @property
     def space(self):
         return TrivialSpace
 
-    @property
-    def _order_key(self):
-        return KeyTuple(('~~', self.__class__.__name__, 1.0))
-
     @property
     def args(self):
         return tuple()
@@ -271,7 +281,7 @@ class IdentitySuperOperator(SuperOperator, Expression, metaclass=Singleton):
     def __eq__(self, other):
         return self is other or other == 1
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return set(())
 
 
@@ -279,14 +289,12 @@ class IdentitySuperOperator(SuperOperator, Expression, metaclass=Singleton):
 class ZeroSuperOperator(SuperOperator, Expression, metaclass=Singleton):
     """ZeroSuperOperator constant (singleton) object."""
 
+    _order_key = KeyTuple(('~~', 'ZeroSuperOperator', 1.0))
+
     @property
     def space(self):
         return TrivialSpace
 
-    @property
-    def _order_key(self):
-        return KeyTuple(('~~', self.__class__.__name__, 1.0))
-
     @property
     def args(self):
         return tuple()
@@ -300,7 +308,7 @@ class ZeroSuperOperator(SuperOperator, Expression, metaclass=Singleton):
     def __eq__(self, other):
         return self is other or other == 0
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return set(())
 
 
@@ -318,6 +326,9 @@ class SuperOperatorPlus(SuperOperatorOperation):
 
     :param SuperOperator summands: super-operator summands.
     """
+
+    __slots__ = ()
+
     neutral_element = ZeroSuperOperator
     _binary_rules = OrderedDict()  # see end of module
     _simplifications = [assoc, orderby, filter_neutral, match_replace_binary]
@@ -350,6 +361,9 @@ class SuperOperatorTimes(SuperOperatorOperation):
 
     :param SuperOperator factors: Super-operator factors.
     """
+
+    __slots__ = ()
+
     neutral_element = IdentitySuperOperator
     _binary_rules = OrderedDict()  # see end of module
     _simplifications = [assoc, orderby, filter_neutral, match_replace_binary]
@@ -385,6 +399,9 @@ class ScalarTimesSuperOperator(SuperOperator, Operation):
     :param term: The super-operator that is multiplied.
     :type term: SuperOperator
     """
+
+    __slots__ = ('_cached_order_key', )
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [match_replace, ]
 
@@ -394,13 +411,12 @@ class ScalarTimesSuperOperator(SuperOperator, Operation):
 
     @property
     def _order_key(self):
-        from qnet.printing import ascii
-        t = self.term._order_key
         try:
-            c = abs(float(self.coeff))  # smallest coefficients first
-        except (ValueError, TypeError):
-            c = float('inf')
-        return KeyTuple(t[:2] + (c, ) + t[3:] + (ascii(self.coeff), ))
+            return self._cached_order_key
+        except AttributeError:
+            self._cached_order_key = scalar_times_order_key(
+                self.coeff, self.term._order_key)
+            return self._cached_order_key
 
     @property
     def coeff(self):
@@ -466,6 +482,9 @@ class SuperAdjoint(SuperOperatorOperation):
     :param L: The super-operator to take the adjoint of.
     :type L: SuperOperator
     """
+
+    __slots__ = ()
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [match_replace, ]
 
@@ -492,6 +511,8 @@ class SPre(SuperOperator, Operation):
     Acting ``SPre(A)`` on an operator ``B`` just yields the product ``A * B``
     """
 
+    __slots__ = ('_order_key', )
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [match_replace, ]
 
@@ -522,6 +543,8 @@ class SPost(SuperOperator, Operation):
         product ``B * A``.
     """
 
+    __slots__ = ('_order_key', )
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [match_replace, ]
 
@@ -551,6 +574,9 @@ class SuperOperatorTimesOperator(Operator, Operation):
     :param SuperOperator sop: The super-operator to apply.
     :param Operator op: The operator it is applied to.
     """
+
+    __slots__ = ('_order_key', )
+
     _rules = OrderedDict()  # see end of module
     _simplifications = [match_replace, ]
 
@@ -89,7 +89,9 @@ class Component(Circuit, Expression, metaclass=ABCMeta):
             else:
                 del kwargs[pname]
                 print("Unknown parameter!")
-        super().__init__(name, **kwargs)
+        # the instance key must include the default values of all parameters
+        # that were not passed explicitly
+        super().__init__(name, **self.kwargs)
 
     @property
     def name(self):
@@ -191,7 +193,7 @@ class SubComponent(Circuit, Expression, metaclass=ABCMeta):
     def _creduce(self):
         return self
 
-    def all_symbols(self):
+    def _all_symbols(self):
         return self.parent_component.all_symbols()
 
     @property
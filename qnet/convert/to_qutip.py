@@ -251,9 +251,9 @@ def _convert_local_operator_to_qutip(expr, full_space, mapping):
         j = expr.j
         k = expr.k
         if isinstance(j, str):
-            j = expr.space.basis_labels.index(j)
+            j = expr.space.basis_index(j)
         if isinstance(k, str):
-            k = expr.space.basis_labels.index(k)
+            k = expr.space.basis_index(k)
         ket = qutip.basis(n, j)
         bra = qutip.basis(n, k).dag()
         return ket * bra
@@ -17,11 +17,13 @@
 #
 ###########################################################################
 
+import qnet.misc.disk_cache
 import qnet.misc.euler_mayurama
 import qnet.misc.kerr_model_matrices
 import qnet.misc.parse_circuit_strings
 import qnet.misc.parser
 import qnet.misc.qsd_codegen
+import qnet.misc.serialization
 import qnet.misc.testing_tools
 import qnet.misc.trajectory_data
 # circuit_visualization is not exposed: it causes a circular import and is
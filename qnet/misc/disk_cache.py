@@ -0,0 +1,226 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+r"""Persistent cache of expressions in a directory on disk, e.g. for the
+results of circuit reductions and SLH conversions, see
+:func:`~qnet.algebra.circuit_algebra.set_circuit_cache`.
+
+Every entry is stored in a separate file, in the format of
+:mod:`qnet.misc.serialization`. The name of the file is a hash of the key, so
+that the same key maps to the same file in any process (see
+:func:`~qnet.algebra.abstract_algebra.structural_digest`), and any number of
+processes may share the same cache directory.
+"""
+import os
+import tempfile
+from collections.abc import MutableMapping
+
+try:
+    from hashlib import blake2b
+except ImportError:  # Python < 3.6
+    from pyblake2 import blake2b
+
+import qnet
+from qnet.algebra.abstract_algebra import structural_digest
+from .serialization import dumps, loads
+
+__all__ = ['DiskCache']
+
+__private__ = []  # anything not in __all__ must be in __private__
+
+_SUFFIX = '.qnet'
+
+
+class DiskCache(MutableMapping):
+    """Mapping of keys to expressions, stored in the directory `path`, with an
+    optional limit on the total size of the stored files. When the limit is
+    exceeded, the least recently used entries are deleted.
+
+    Keys and values may be anything that can be serialized by
+    :func:`~qnet.misc.serialization.dumps`, typically tuples of expressions
+    and plain Python values, for which a
+    :func:`~qnet.algebra.abstract_algebra.structural_digest` can be
+    calculated. Since the hash of a key includes the version of QNET, entries
+    written by a different version of QNET are never used. Files that cannot
+    be read (e.g. because they are corrupted, or refer to classes outside of
+    the trusted modules, see :func:`~qnet.misc.serialization.load`) are
+    treated as missing.
+
+    Args:
+        path (str): The directory in which to store the entries. It is
+            created if it does not exist.
+        maxsize (int or None): The maximum total size of the stored entries,
+            in bytes. If None, the cache is unbounded.
+        trusted (list of str): The names of any modules (e.g. defining custom
+            circuit components) from which the classes in the stored entries
+            may be loaded, in addition to the modules registered through
+            :func:`~qnet.misc.serialization.register_trusted_module`
+
+    Attributes:
+        hits (int): number of successful lookups
+        misses (int): number of failed lookups
+        evictions (int): number of entries that were evicted from the cache
+    """
+
+    def __init__(self, path, maxsize=None, trusted=()):
+        if maxsize is not None:
+            maxsize = int(maxsize)
+            if maxsize < 0:
+                raise ValueError("maxsize must be >= 0")
+        self.path = os.path.abspath(str(path))
+        self.maxsize = maxsize
+        self.trusted = tuple(trusted)
+        os.makedirs(self.path, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _filename(self, key):
+        digest = blake2b(digest_size=20)
+        digest.update(qnet.__version__.encode('ascii') + b'\x00')
+        digest.update(structural_digest(key))
+        return os.path.join(self.path, digest.hexdigest() + _SUFFIX)
+
+    def _read(self, filename):
+        """Return the ``(key, value)`` stored in `filename`, or raise a
+        KeyError"""
+        try:
+            with open(filename, 'rb') as in_fh:
+                data = in_fh.read()
+        except FileNotFoundError:
+            raise KeyError(filename)
+        try:
+            return loads(data, trusted=self.trusted)
+        except Exception:
+            raise KeyError(filename)
+
+    def _entries(self):
+        """List of ``(mtime, size, filename)`` for all entries"""
+        entries = []
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # deleted by another process
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def __getitem__(self, key):
+        filename = self._filename(key)
+        try:
+            stored_key, value = self._read(filename)
+            if stored_key != key:  # hash collision
+                raise KeyError(key)
+        except KeyError:
+            self.misses += 1
+            raise KeyError(key)
+        try:
+            os.utime(filename)  # mark as recently used
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        filename = self._filename(key)
+        data = dumps((key, value))
+        # write to a temporary file first, so that other processes never see
+        # an incomplete file
+        fd, tmp_filename = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out_fh:
+                out_fh.write(data)
+            os.replace(tmp_filename, filename)
+        except BaseException:
+            os.remove(tmp_filename)
+            raise
+        if self.maxsize is not None:
+            self._evict(keep=filename)
+
+    def _evict(self, keep):
+        """Delete the least recently used entries other than `keep` until the
+        total size is within the limit"""
+        entries = sorted(self._entries())
+        total = sum(size for (__, size, __) in entries)
+        for (__, size, filename) in entries:
+            if total <= self.maxsize:
+                break
+            if filename == keep:
+                continue
+            try:
+                os.remove(filename)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def __delitem__(self, key):
+        try:
+            os.remove(self._filename(key))
+        except FileNotFoundError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        # does not count as a hit or miss, and does not affect LRU order
+        try:
+            stored_key, __ = self._read(self._filename(key))
+        except KeyError:
+            return False
+        return stored_key == key
+
+    def __iter__(self):
+        for (__, __, filename) in self._entries():
+            try:
+                key, __ = self._read(filename)
+            except KeyError:
+                continue
+            yield key
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __repr__(self):
+        return "%s(%r, maxsize=%r)" % (
+            self.__class__.__name__, self.path, self.maxsize)
+
+    def clear(self):
+        """Delete all entries. This does not reset the statistics"""
+        for (__, __, filename) in self._entries():
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """Return a dict of cache statistics, with keys 'hits', 'misses',
+        'evictions', 'size' (number of entries), 'nbytes' (total size of the
+        entries in bytes) and 'maxsize'"""
+        entries = self._entries()
+        return {
+            'hits': self.hits, 'misses': self.misses,
+            'evictions': self.evictions, 'size': len(entries),
+            'nbytes': sum(size for (__, size, __) in entries),
+            'maxsize': self.maxsize}
+
+    def reset_stats(self):
+        """Reset the hit, miss, and eviction counters to zero"""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
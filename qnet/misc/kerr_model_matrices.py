@@ -1,7 +1,7 @@
 import numpy as np
 from qnet.algebra.operator_algebra import (
     OperatorSymbol, ScalarTimesOperator, IdentityOperator, Create, Destroy,
-    get_coeffs)
+    get_coeffs_matrix)
 from qnet.algebra.hilbert_space_algebra import TrivialSpace
 from qnet.algebra.matrix_algebra import Matrix
 
@@ -109,34 +109,40 @@ def model_matrices(
 
 
     print("Extracting matrices")
+    # the terms whose coefficients make up the matrices; the kerr terms
+    # a_kk^dag a_kk a_jj are in a block of ncav x ncav columns
+    linear_terms = ([IdentityOperator] + [Destroy(hs=s) for s in modes] +
+                    inputs)
+    kerr_terms = [Create(hs=skk) * Destroy(hs=skk) * Destroy(hs=sjj)
+                  for sjj in modes for skk in modes]
+    n_lin = len(linear_terms)
+
     # use the coefficients to generate A, B matrices
-    for jj, sjj in enumerate(modes):
-        coeffsjj = get_coeffs(eoms[jj], epsilon=epsilon)
-        for kk, skk in enumerate(modes):
-            A[jj, kk] = coeffsjj[Destroy(hs=skk)]
-            chi_jjkk = (coeffsjj[Create(hs=skk) * Destroy(hs=skk) *
-                        Destroy(hs=sjj)])
+    coeffs = get_coeffs_matrix(eoms, linear_terms + noises + kerr_terms,
+                               epsilon=epsilon)
+    for jj in range(ncav):
+        for kk in range(ncav):
+            A[jj, kk] = coeffs[jj, 1+kk]
+            chi_jjkk = coeffs[jj, n_lin+cdim+jj*ncav+kk]
             if apply_kerr_diagonal_correction:
                 A[jj, kk] += -(1 + int(jj==kk)) * chi_jjkk / 2
             A_kerr[jj, kk] = chi_jjkk
-        for kk, dAkk in enumerate(noises):
-            B[jj, kk] = coeffsjj[dAkk]
-        for kk, u_kk in enumerate(inputs):
-            if inputs == 0:
-                continue
-            B_input[jj,kk] = coeffsjj[u_kk]
-        u_c[jj] = coeffsjj[IdentityOperator]
+        for kk in range(cdim):
+            B[jj, kk] = coeffs[jj, n_lin+kk]
+        for kk in range(ninputs):
+            B_input[jj,kk] = coeffs[jj, 1+ncav+kk]
+        u_c[jj] = coeffs[jj, 0]
 
     # use the coefficients in the L vector to generate the C, D
     # matrices
-    for jj, Ljj in enumerate(slh_input.L.matrix[:,0]):
-        coeffsjj = get_coeffs(Ljj)
-        for kk, skk in enumerate(modes):
-            C[jj,kk] = coeffsjj[Destroy(hs=skk)]
-        U_c[jj] = coeffsjj[IdentityOperator]
-
-        for kk, u_kk in enumerate(inputs):
-            D_input[jj, kk] = coeffsjj[u_kk]
+    coeffs = get_coeffs_matrix(slh_input.L.matrix[:,0], linear_terms)
+    for jj in range(cdim):
+        for kk in range(ncav):
+            C[jj,kk] = coeffs[jj, 1+kk]
+        U_c[jj] = coeffs[jj, 0]
+
+        for kk in range(ninputs):
+            D_input[jj, kk] = coeffs[jj, 1+ncav+kk]
 
     if return_eoms:
         # compute output processes
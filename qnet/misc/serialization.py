@@ -0,0 +1,646 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+r"""Compact binary serialization of QNET expressions (including
+:class:`~qnet.algebra.matrix_algebra.Matrix` and
+:class:`~qnet.algebra.circuit_algebra.SLH` objects).
+
+An expression is stored as a table of its unique sub-expressions (a directed
+acyclic graph), so that sub-expressions that occur repeatedly are stored only
+once. Sympy scalars are stored in the same table, without resorting to their
+string representation. Thus, large models can be written to and read from
+disk much faster than through :func:`~qnet.printing.srepr` and `eval`::
+
+    >>> from qnet.algebra.operator_algebra import OperatorSymbol
+    >>> A = OperatorSymbol('A', hs=0)
+    >>> B = OperatorSymbol('B', hs=0)
+    >>> data = dumps(A * B + B * A)
+    >>> loads(data) == A * B + B * A
+    True
+
+Loading an expression instantiates every sub-expression exactly as it was
+stored. Optionally, sub-expressions may be re-created through the `create`
+method of their class instead, so that they are shared with any existing equal
+expressions (through the instance cache). No code is evaluated, except for
+importing the modules that define the classes of the sub-expressions. When
+loading, only classes and singletons defined in QNET or Sympy (or in Python's
+`builtins` and `numbers` modules) are accepted by default. Classes defined
+elsewhere (e.g. custom circuit components) may be written, but are only
+resolved when loading if their module is trusted, either through the
+`trusted` argument of :func:`load` and :func:`loads`, or for all calls through
+:func:`register_trusted_module`.
+
+The format is independent of Python, and is defined as follows. All
+multi-byte numbers are little-endian; a "varint" is an unsigned integer in
+LEB128 encoding, and a "zigzag" integer is a signed integer mapped to a
+varint (0, -1, 1, -2, ... to 0, 1, 2, 3, ...).
+
+.. code-block:: none
+
+    file   := magic version:u16 names nodes root:value
+    magic  := "QNETDAG" 0x00
+    names  := n:varint (name:str){n}
+    nodes  := n:varint (node){n}
+    node   := 0x01 name:varint args:value kwargs:value  # QNET expression
+            | 0x02 name:varint n:varint (arg:value){n}  # Sympy expression
+            | 0x03 name:str n:varint (key:varint value){n}  # Sympy Symbol
+            | 0x04 name:str n:varint (arg:value){n}     # undefined function
+    value  := 0x00 | 0x01 | 0x02                 # None, False, True
+            | 0x03 zigzag                        # integer
+            | 0x04 f64 | 0x05 f64 f64            # float, complex
+            | 0x06 str
+            | 0x07 n:varint (value){n}           # tuple
+            | 0x08 n:varint (value){n}           # list
+            | 0x09 n:varint (key:str value){n}   # dict
+            | 0x0A index:varint                  # earlier node
+            | 0x0B dtype:str ndim:varint (dim:varint){ndim} (value){size}
+            | 0x0C name:varint                   # singleton
+            | 0x0D zigzag                        # Sympy Integer
+            | 0x0E p:zigzag q:varint             # Sympy Rational
+            | 0x0F sign:varint man:varint exp:zigzag bc:zigzag prec:varint
+    str    := n:varint (byte){n}                 # UTF-8
+
+The `names` refer to classes (for QNET and Sympy expressions) and singletons
+(e.g. :obj:`~qnet.algebra.operator_algebra.IdentityOperator`, or Sympy's
+``pi``), as ``"module:qualified_name"``, e.g.
+``"qnet.algebra.operator_algebra:OperatorPlus"``, ``"sympy:Add"``, or
+``"sympy:S.Pi"``. For a QNET expression, `args` is a tuple and `kwargs` is a
+dict (of the arguments for the `create` method). The `args` of a Sympy
+expression are passed to the named Sympy class, with ``evaluate=False``. The
+`assumptions` of a Symbol are given by the `name` of each assumption (e.g.
+``"positive"``) and its value. Arrays (code 0x0B) are numpy arrays with the
+given `dtype` (in the format of :attr:`numpy.dtype.str`, ``"|O"`` for
+arbitrary objects), and the elements in row-major order. Sympy floats (code
+0x0F) are given by their exact binary representation
+``(-1)**sign * man * 2**exp``, `bc` being the number of bits in `man`, and
+their precision `prec` (in bits). A value may only reference earlier nodes.
+The `root` value is the serialized expression.
+
+A file with a version newer than :data:`FORMAT_VERSION` cannot be loaded.
+"""
+import io
+import struct
+from importlib import import_module
+
+import numpy as np
+import sympy
+from sympy.core.function import AppliedUndef
+from sympy.core.singleton import Singleton as SympySingleton
+
+from qnet.algebra.abstract_algebra import (
+    Expression, _dag_table, _NodeRef, _NodeArray, _instantiate, _recreate)
+from qnet.algebra.singleton import Singleton
+
+__all__ = [
+    'FORMAT_VERSION', 'dump', 'dumps', 'load', 'loads',
+    'register_trusted_module']
+
+FORMAT_VERSION = 1
+
+_MAGIC = b'QNETDAG\x00'
+
+# node kinds
+_EXPRESSION = 0x01
+_SYMPY = 0x02
+_SYMBOL = 0x03
+_FUNCTION = 0x04
+
+# value tags
+_NONE = 0x00
+_FALSE = 0x01
+_TRUE = 0x02
+_INT = 0x03
+_FLOAT = 0x04
+_COMPLEX = 0x05
+_STR = 0x06
+_TUPLE = 0x07
+_LIST = 0x08
+_DICT = 0x09
+_REF = 0x0A
+_ARRAY = 0x0B
+_SINGLETON = 0x0C
+_SYMPY_INTEGER = 0x0D
+_SYMPY_RATIONAL = 0x0E
+_SYMPY_FLOAT = 0x0F
+
+_F64 = struct.Struct('<d')
+_U16 = struct.Struct('<H')
+
+# modules (or packages) whose classes and singletons may be referenced by the
+# stored names, see `register_trusted_module`
+_TRUSTED_MODULES = {'qnet', 'sympy', 'builtins', 'numbers'}
+
+
+def register_trusted_module(name):
+    """Allow :func:`load` and :func:`loads` to resolve the classes and
+    singletons defined in the module `name` (including its submodules, if it
+    is a package), in addition to those defined in QNET and Sympy. This
+    affects all threads.
+
+    Args:
+        name (str): The fully qualified name of the module or package, e.g.
+            the ``__module__`` of a custom circuit component
+    """
+    _TRUSTED_MODULES.add(str(name))
+
+
+def _is_trusted(module, trusted):
+    """Check whether `module` is one of, or a submodule of one of, the module
+    names in `trusted`"""
+    parts = module.split('.')
+    for i in range(1, len(parts) + 1):
+        if '.'.join(parts[:i]) in trusted:
+            return True
+    return False
+
+
+def _write_varint(out, n):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _write_zigzag(out, n):
+    _write_varint(out, 2 * n if n >= 0 else -2 * n - 1)
+
+
+def _write_str(out, s):
+    data = s.encode('utf-8')
+    _write_varint(out, len(data))
+    out += data
+
+
+def _qualified_name(cls):
+    return cls.__module__ + ':' + cls.__qualname__
+
+
+class _Writer():
+    """Encoder for the tables of names and nodes"""
+
+    def __init__(self):
+        self.names = {}  # name => index
+        self.nodes = []  # encoded nodes (bytearray)
+        self.expr_refs = {}  # index in _dag_table => index in nodes
+        self.sympy_refs = {}  # key of Sympy expression => index in nodes
+
+    def name(self, name):
+        try:
+            return self.names[name]
+        except KeyError:
+            self.names[name] = len(self.names)
+            return self.names[name]
+
+    def add_expression(self, expr):
+        """Add all the nodes for `expr`, and return a _NodeRef to the root"""
+        self.expr_refs = {}
+        table = _dag_table(expr)
+        for (i, (cls, args, kwargs)) in enumerate(table):
+            out = bytearray([_EXPRESSION])
+            _write_varint(out, self.name(_qualified_name(cls)))
+            self.value(out, args)
+            self.value(out, kwargs)
+            self.expr_refs[i] = len(self.nodes)
+            self.nodes.append(out)
+        return _NodeRef(len(table) - 1)
+
+    def value(self, out, value):
+        """Write the given `value` to `out`"""
+        if value is None:
+            out.append(_NONE)
+        elif value is True or value is False:
+            out.append(_TRUE if value else _FALSE)
+        elif isinstance(value, _NodeRef):
+            out.append(_REF)
+            _write_varint(out, self.expr_refs[value.index])
+        elif isinstance(value, Expression):
+            if isinstance(value.__class__, Singleton):
+                out.append(_SINGLETON)
+                name = value.__class__.__module__ + ':' + value.__name__
+                _write_varint(out, self.name(name))
+            else:  # only for the root
+                self.value(out, self.add_expression(value))
+        elif isinstance(value, sympy.Basic):
+            self.sympy_value(out, value)
+        elif isinstance(value, int):
+            out.append(_INT)
+            _write_zigzag(out, value)
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out += _F64.pack(value)
+        elif isinstance(value, complex):
+            out.append(_COMPLEX)
+            out += _F64.pack(value.real)
+            out += _F64.pack(value.imag)
+        elif isinstance(value, str):
+            out.append(_STR)
+            _write_str(out, value)
+        elif isinstance(value, (tuple, list)):
+            out.append(_TUPLE if isinstance(value, tuple) else _LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self.value(out, item)
+        elif isinstance(value, dict):
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for (key, item) in value.items():
+                _write_str(out, key)
+                self.value(out, item)
+        elif isinstance(value, _NodeArray):
+            self.array(out, '|O', value.shape, value.items)
+        elif isinstance(value, np.ndarray):
+            self.array(
+                out, value.dtype.str, value.shape, value.ravel().tolist())
+        elif isinstance(value, np.generic):
+            self.value(out, value.item())
+        else:
+            raise TypeError(
+                "Cannot serialize object of type %s" % value.__class__)
+
+    def array(self, out, dtype, shape, items):
+        out.append(_ARRAY)
+        _write_str(out, dtype)
+        _write_varint(out, len(shape))
+        for dim in shape:
+            _write_varint(out, dim)
+        for item in items:
+            self.value(out, item)
+
+    def sympy_value(self, out, value):
+        """Write the Sympy object `value` to `out`, and return a key that
+        uniquely identifies it. Unlike Sympy's equality, the key distinguishes
+        between e.g. ``Integer(1)`` and ``Float(1)``"""
+        if isinstance(value, sympy.Integer):
+            out.append(_SYMPY_INTEGER)
+            _write_zigzag(out, int(value.p))
+            return (sympy.Integer, value.p)
+        elif isinstance(value, sympy.Rational):
+            out.append(_SYMPY_RATIONAL)
+            _write_zigzag(out, int(value.p))
+            _write_varint(out, int(value.q))
+            return (sympy.Rational, value.p, value.q)
+        elif isinstance(value, sympy.Float):
+            sign, man, exp, bc = value._mpf_
+            out.append(_SYMPY_FLOAT)
+            _write_varint(out, sign)
+            _write_varint(out, int(man))
+            _write_zigzag(out, exp)
+            _write_zigzag(out, bc)
+            _write_varint(out, value._prec)
+            return (sympy.Float, value._mpf_, value._prec)
+        elif isinstance(value.__class__, SympySingleton):
+            name = value.__class__.__name__
+            if getattr(sympy.S, name, None) is not value:
+                raise TypeError("Cannot serialize %r" % value)
+            out.append(_SINGLETON)
+            _write_varint(out, self.name('sympy:S.' + name))
+            return (value.__class__, )
+        else:
+            node = bytearray()
+            if value.__class__ is sympy.Symbol:
+                node.append(_SYMBOL)
+                _write_str(node, value.name)
+                assumptions = sorted(value.assumptions0.items())
+                _write_varint(node, len(assumptions))
+                for (name, flag) in assumptions:
+                    _write_varint(node, self.name(name))
+                    self.value(node, flag)
+                key = (sympy.Symbol, value.name, tuple(assumptions))
+            else:
+                if isinstance(value, AppliedUndef):
+                    node.append(_FUNCTION)
+                    name = str(value.func)
+                    _write_str(node, name)
+                else:
+                    node.append(_SYMPY)
+                    name = value.__class__.__name__
+                    if (value.is_Atom or
+                            getattr(sympy, name, None) is not value.__class__):
+                        # e.g. Dummy, which could not be restored
+                        raise TypeError("Cannot serialize %r" % value)
+                    _write_varint(node, self.name('sympy:' + name))
+                _write_varint(node, len(value.args))
+                keys = [self.sympy_value(node, arg) for arg in value.args]
+                key = (node[0], name, tuple(keys))
+            try:
+                index = self.sympy_refs[key]
+            except KeyError:
+                index = len(self.nodes)
+                self.nodes.append(node)
+                self.sympy_refs[key] = index
+            out.append(_REF)
+            _write_varint(out, index)
+            return key
+
+    def write(self, fh, root):
+        """Write the complete data for the given `root` to `fh`"""
+        root_value = bytearray()
+        self.value(root_value, root)
+        header = bytearray(_MAGIC)
+        header += _U16.pack(FORMAT_VERSION)
+        _write_varint(header, len(self.names))
+        for name in sorted(self.names, key=self.names.get):
+            _write_str(header, name)
+        _write_varint(header, len(self.nodes))
+        fh.write(header)
+        for node in self.nodes:
+            fh.write(node)
+        fh.write(root_value)
+
+
+def _sympy_node(cls, args):
+    """Instantiate the Sympy class `cls` with the given `args`, without
+    evaluating it: the stored expression is restored exactly (even if it was
+    unevaluated), and no expensive evaluation can be triggered"""
+    try:
+        return cls(*args, evaluate=False)
+    except TypeError:
+        # classes without an `evaluate` flag (e.g. Tuple) do not evaluate
+        return cls(*args)
+
+
+class _Reader():
+    """Decoder for the data in the buffer `data`, followed by the data in the
+    binary file-like object `file` (if any), which is read in chunks of
+    `chunk_size` bytes. Only names from the modules in `trusted` are
+    resolved"""
+
+    def __init__(
+            self, data=b'', file=None, create=False, trusted=(),
+            chunk_size=65536):
+        self.data = memoryview(data)
+        self.file = file
+        self.chunk_size = chunk_size
+        self.create = create
+        self.trusted = _TRUSTED_MODULES.union(trusted)
+        self.pos = 0
+        self.names = []
+        self.resolved = {}  # index in names => object
+        self.nodes = []  # loaded nodes
+
+    def require(self, n):
+        """Ensure that at least `n` unread bytes are in the buffer"""
+        if self.pos + n <= len(self.data):
+            return
+        buffer = bytearray(self.data[self.pos:])
+        while len(buffer) < n and self.file is not None:
+            # a read may return fewer bytes than requested (e.g. from a pipe)
+            chunk = self.file.read(max(n - len(buffer), self.chunk_size))
+            if not chunk:
+                break
+            buffer += chunk
+        self.data = memoryview(bytes(buffer))
+        self.pos = 0
+        if len(self.data) < n:
+            raise ValueError("Unexpected end of data")
+
+    def unread(self):
+        """Return any data that was read from the file beyond the current
+        position to the file, if possible"""
+        remaining = len(self.data) - self.pos
+        if remaining > 0 and self.file is not None:
+            try:
+                self.file.seek(-remaining, io.SEEK_CUR)
+            except (AttributeError, OSError, ValueError):
+                pass  # not seekable
+
+    def byte(self):
+        if self.pos >= len(self.data):
+            self.require(1)
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def varint(self):
+        result = shift = 0
+        while True:
+            byte = self.byte()
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def zigzag(self):
+        n = self.varint()
+        return (n >> 1) if not (n & 1) else -((n + 1) >> 1)
+
+    def bytes(self, n):
+        self.require(n)
+        value = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return value
+
+    def str(self):
+        return str(self.bytes(self.varint()), 'utf-8')
+
+    def f64(self):
+        return _F64.unpack(self.bytes(_F64.size))[0]
+
+    def read(self):
+        """Read the complete data, and return the root value"""
+        try:
+            magic = bytes(self.bytes(len(_MAGIC)))
+        except ValueError:
+            magic = None
+        if magic != _MAGIC:
+            raise ValueError("Data is not in the QNET binary format")
+        version = _U16.unpack(self.bytes(_U16.size))[0]
+        if version > FORMAT_VERSION:
+            raise ValueError(
+                "Cannot load data in format version %d (newer than %d)"
+                % (version, FORMAT_VERSION))
+        self.names = [self.str() for i in range(self.varint())]
+        for i in range(self.varint()):
+            self.nodes.append(self.node())
+        root = self.value()
+        self.unread()
+        return root
+
+    def resolve(self, index):
+        """Return the object for the name with the given `index`"""
+        try:
+            return self.resolved[index]
+        except KeyError:
+            pass
+        try:
+            module, qualname = self.names[index].split(':')
+        except ValueError:
+            raise ValueError("Invalid name %r" % self.names[index])
+        if not _is_trusted(module, self.trusted):
+            raise ValueError(
+                "Name %r is not defined in any trusted module (%s); see "
+                "register_trusted_module" % (
+                    self.names[index], ", ".join(sorted(self.trusted))))
+        if '__' in qualname:
+            raise ValueError("Invalid name %r" % self.names[index])
+        obj = import_module(module)
+        for attr in qualname.split('.'):
+            obj = getattr(obj, attr)
+        self.resolved[index] = obj
+        return obj
+
+    def node(self):
+        kind = self.byte()
+        if kind == _EXPRESSION:
+            cls = self.resolve(self.varint())
+            if not (isinstance(cls, type) and issubclass(cls, Expression)):
+                raise ValueError("%r is not an Expression class" % cls)
+            args = self.value()
+            kwargs = self.value()
+            if self.create:
+                return _recreate(cls, args, kwargs)
+            return _instantiate(cls, args, kwargs)
+        elif kind == _SYMPY:
+            cls = self.resolve(self.varint())
+            if not (isinstance(cls, type) and issubclass(cls, sympy.Basic)):
+                raise ValueError("%r is not a Sympy class" % cls)
+            return _sympy_node(
+                cls, [self.value() for i in range(self.varint())])
+        elif kind == _SYMBOL:
+            name = self.str()
+            assumptions = {}
+            for i in range(self.varint()):
+                key = self.names[self.varint()]
+                assumptions[key] = self.value()
+            return sympy.Symbol(name, **assumptions)
+        elif kind == _FUNCTION:
+            func = sympy.Function(self.str())
+            return _sympy_node(
+                func, [self.value() for i in range(self.varint())])
+        else:
+            raise ValueError("Invalid node kind %d" % kind)
+
+    def value(self):
+        tag = self.byte()
+        if tag == _REF:
+            return self.nodes[self.varint()]
+        elif tag == _NONE:
+            return None
+        elif tag == _FALSE:
+            return False
+        elif tag == _TRUE:
+            return True
+        elif tag == _INT:
+            return self.zigzag()
+        elif tag == _FLOAT:
+            return self.f64()
+        elif tag == _COMPLEX:
+            return complex(self.f64(), self.f64())
+        elif tag == _STR:
+            return self.str()
+        elif tag in (_TUPLE, _LIST):
+            items = [self.value() for i in range(self.varint())]
+            return tuple(items) if tag == _TUPLE else items
+        elif tag == _DICT:
+            result = {}
+            for i in range(self.varint()):
+                key = self.str()
+                result[key] = self.value()
+            return result
+        elif tag == _ARRAY:
+            dtype = self.str()
+            shape = tuple([self.varint() for i in range(self.varint())])
+            size = int(np.prod(shape))
+            items = [self.value() for i in range(size)]
+            if dtype == '|O':
+                array = np.empty(size, dtype=object)
+                for (i, item) in enumerate(items):
+                    array[i] = item
+            else:
+                array = np.array(items, dtype=dtype)
+            return array.reshape(shape)
+        elif tag == _SINGLETON:
+            obj = self.resolve(self.varint())
+            if not isinstance(obj.__class__, (Singleton, SympySingleton)):
+                raise ValueError("%r is not a singleton" % obj)
+            return obj
+        elif tag == _SYMPY_INTEGER:
+            return sympy.Integer(self.zigzag())
+        elif tag == _SYMPY_RATIONAL:
+            p = self.zigzag()
+            return sympy.Rational(p, self.varint())
+        elif tag == _SYMPY_FLOAT:
+            sign, man = self.varint(), self.varint()
+            exp, bc = self.zigzag(), self.zigzag()
+            prec = self.varint()
+            return sympy.Float((sign, hex(man)[2:], exp, bc), precision=prec)
+        else:
+            raise ValueError("Invalid value tag %d" % tag)
+
+
+def dump(expr, file):
+    """Write `expr` to `file` in QNET's binary format.
+
+    Args:
+        expr: The expression to serialize (any
+            :class:`~qnet.algebra.abstract_algebra.Expression`, including
+            :class:`~qnet.algebra.matrix_algebra.Matrix` and
+            :class:`~qnet.algebra.circuit_algebra.SLH`, or a scalar)
+        file (str or file): The name of the file to write to, or a binary
+            file-like object (e.g. :class:`io.BytesIO`)
+
+    Raises:
+        TypeError: if `expr` contains an object that cannot be serialized
+    """
+    if isinstance(file, (str, bytes)) or hasattr(file, '__fspath__'):
+        with open(file, 'wb') as fh:
+            dump(expr, fh)
+    else:
+        _Writer().write(file, expr)
+
+
+def dumps(expr):
+    """Return `expr` in QNET's binary format, as :class:`bytes`. See
+    :func:`dump`"""
+    buffer = io.BytesIO()
+    dump(expr, buffer)
+    return buffer.getvalue()
+
+
+def load(file, create=False, trusted=()):
+    """Read an expression written by :func:`dump`.
+
+    Args:
+        file (str or file): The name of the file to read from, or a binary
+            file-like object. A file-like object is read incrementally; if
+            it is seekable, it is left positioned directly after the data of
+            the expression, so that e.g. several expressions may be read
+            from the same file in sequence
+        create (bool): If True, re-create all sub-expressions through the
+            `create` method of their class, so that they are shared with equal
+            expressions in the instance cache. This is slower than
+            instantiating them directly
+        trusted (list of str): The names of any modules (or packages), in
+            addition to those registered through
+            :func:`register_trusted_module`, from which the stored classes
+            and singletons may be resolved
+
+    Raises:
+        ValueError: if the data is not valid, or was written in a newer
+            version of the format than :data:`FORMAT_VERSION`
+    """
+    if isinstance(file, (str, bytes)) or hasattr(file, '__fspath__'):
+        with open(file, 'rb') as fh:
+            return load(fh, create=create, trusted=trusted)
+    return _Reader(file=file, create=create, trusted=trusted).read()
+
+
+def loads(data, create=False, trusted=()):
+    """Return the expression for `data` in QNET's binary format (a
+    :class:`bytes`-like object), see :func:`load`"""
+    return _Reader(data, create=create, trusted=trusted).read()
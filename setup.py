@@ -44,6 +44,7 @@ setup(
         'ply',
         'six',
         'numpy',
+        'pyblake2; python_version < "3.6"',
     ],
     extras_require={
         'dev': ['click', 'pytest>=3.3.0', 'sphinx', 'sphinx-autobuild',
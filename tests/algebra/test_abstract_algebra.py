@@ -24,11 +24,12 @@ import pytest
 
 from qnet.algebra.abstract_algebra import (
         Operation, assoc, orderby, filter_neutral, CannotSimplify,
-        match_replace_binary, idem)
+        match_replace_binary, idem, extra_binary_rules, _rule_index)
 from qnet.algebra.ordering import expr_order_key
-from qnet.algebra.pattern_matching import pattern_head, wc
+from qnet.algebra.pattern_matching import pattern_head, wc, ProtoExpr
 from qnet.algebra.operator_algebra import (
-        LocalSigma, LocalProjector, OperatorTimes, Displace, II)
+        LocalSigma, LocalProjector, OperatorTimes, Displace, II, Destroy,
+        Create, ZeroOperator, OperatorSymbol, OperatorPlus)
 from qnet.algebra.hilbert_space_algebra import LocalSpace
 
 
@@ -123,3 +124,133 @@ def test_match_replace_binary_complete():
            LocalProjector(0, hs=hs)]
     res = OperatorTimes.create(*ops)
     assert res == LocalProjector(0, hs=hs)
+
+
+def test_rule_index():
+    """Test that the rule index returns only (and all) rules that can match,
+    in the original order"""
+    hs = LocalSpace('f')
+    index = _rule_index(OperatorTimes, '_binary_rules')
+    ops = [Destroy(hs=hs), Create(hs=hs)]
+    keys = [key for (key, matcher, repl) in index.candidates(ops)]
+    assert 'hamosord' in keys
+    assert 'sig' not in keys
+    matching_keys = [
+        key for (key, (pat, repl)) in OperatorTimes._binary_rules.items()
+        if pat.match(ProtoExpr(ops, {}))]
+    assert set(matching_keys) <= set(keys)
+    all_keys = list(OperatorTimes._binary_rules.keys())
+    assert keys == [key for key in all_keys if key in keys]
+
+
+def test_rule_index_invalidation():
+    """Test that the rule index is rebuilt when the rules change"""
+    a_str = wc("a", head=str)
+    b_str = wc("b", head=str)
+
+    class Concat(Operation):
+        _binary_rules = OrderedDict()
+        neutral_element = ''
+        _simplifications = [assoc, match_replace_binary]
+
+    assert Concat.create("a", "b") == Concat("a", "b")
+    Concat._binary_rules['concat'] = (
+        pattern_head(a_str, b_str), lambda a, b: a + b)
+    # note that Concat("a", "b") is still in the instance cache
+    assert Concat.create("c", "de") == "cde"
+    # overwriting an existing rule does not change the number of rules
+    rule = (pattern_head(a_str, b_str), lambda a, b: b + a)
+    with extra_binary_rules(Concat, {'concat': rule}):
+        assert Concat.create("c", "de") == "dec"
+    assert Concat.create("c", "de") == "cde"
+    hs = LocalSpace('f')
+    with extra_binary_rules(OperatorTimes, {'extra': (
+            pattern_head(wc("A", head=Destroy), wc("B", head=Destroy)),
+            lambda A, B: ZeroOperator)}):
+        assert Destroy(hs=hs) * Destroy(hs=hs) == ZeroOperator
+    assert Destroy(hs=hs) * Destroy(hs=hs) != ZeroOperator
+
+
+def test_binary_rule_memo():
+    """Test that results of binary rules are memoized per operand pair, and
+    that the memo is discarded when the rules change"""
+    a_str = wc("a", head=str)
+    b_str = wc("b", head=str)
+    calls = []
+
+    def concat(a, b):
+        calls.append((a, b))
+        return a + b
+
+    class Concat(Operation):
+        _binary_rules = OrderedDict([
+            ('concat', (pattern_head(a_str, b_str), concat))])
+        neutral_element = ''
+        _simplifications = [assoc, match_replace_binary]
+
+    assert Concat.create("ab", "c", 1) == Concat("abc", 1)
+    assert Concat.create("ab", "c", 2) == Concat("abc", 2)
+    assert calls == [("ab", "c")]
+    memo = _rule_index(Concat, '_binary_rules').memo
+    assert memo.hits >= 1
+    # the memo distinguishes between operands that are equal, but of
+    # different type
+    assert (str, "abc", int, 1) in memo
+    assert (str, "abc", float, 1.0) not in memo
+    rule = (pattern_head(a_str, b_str), lambda a, b: b + a)
+    with extra_binary_rules(Concat, {'concat': rule}):
+        assert Concat.create("ab", "c", 3) == Concat("cab", 3)
+
+
+def test_match_replace_binary_long():
+    """Test that match_replace_binary can handle a large number of operands
+    (without running into the recursion limit)"""
+    hs = LocalSpace('f')
+    n = 20000
+    ops = [LocalSigma(i % 10, (i + 1) % 10, hs=hs) for i in range(n)]
+    assert OperatorTimes.create(*ops) == LocalProjector(0, hs=hs)
+    ops[n // 2] = LocalSigma(2, 2, hs=hs)
+    assert OperatorTimes.create(*ops) == ZeroOperator
+
+
+def test_all_symbols_cached(monkeypatch):
+    """Test that the set of symbols is calculated only once per expression,
+    and re-used for expressions containing it"""
+    hs = LocalSpace(0)
+    a, b = symbols('a b')
+    A = OperatorSymbol('A', hs=hs)
+    B = OperatorSymbol('B', hs=hs)
+    expr = a * A + B * Destroy(hs=hs)
+    symbols_set = expr.all_symbols()
+    assert isinstance(symbols_set, frozenset)
+    assert symbols_set == set([a, A, B])
+    assert expr.all_symbols() is symbols_set
+
+    calculated = []
+    orig_all_symbols = OperatorPlus._all_symbols
+
+    def all_symbols(self):
+        calculated.append(self)
+        return orig_all_symbols(self)
+
+    monkeypatch.setattr(OperatorPlus, '_all_symbols', all_symbols)
+    expr2 = OperatorTimes.create(b * expr, expr)
+    assert expr2.all_symbols() == set([a, b, A, B])
+    assert expr.all_symbols() is symbols_set
+    assert len(calculated) == 0
+
+
+def test_slots():
+    """Test that expressions do not carry an instance dictionary, and can
+    still be pickled and weakly referenced"""
+    import pickle
+    import weakref
+    hs = LocalSpace(0)
+    a = symbols('a')
+    sig = LocalSigma(0, 1, hs=hs)
+    exprs = [hs, sig, a * sig, sig * Destroy(hs=hs), sig + II,
+             OperatorSymbol('A', hs=hs), hs * LocalSpace(1)]
+    for expr in exprs:
+        assert not hasattr(expr, '__dict__')
+        assert pickle.loads(pickle.dumps(expr)) == expr
+        assert weakref.ref(expr)() is expr
@@ -294,6 +294,15 @@ def test_SLH_elements():
     check(S, L, H)
 
 
+def test_feedback_equality():
+    """Test that feedback with different ports does not compare equal"""
+    B, = get_symbols(3)
+    assert B.feedback(out_port=1, in_port=0) == B.feedback(
+        out_port=1, in_port=0)
+    assert B.feedback(out_port=1, in_port=0) != B.feedback(
+        out_port=0, in_port=1)
+
+
 def test_feedback():
     A, B, C, D, A1, A2 = get_symbols(3, 2, 1, 1, 1, 1)
     circuit_identity(1)
@@ -0,0 +1,87 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Test the collection of statistics for Expression.create"""
+
+import qnet.algebra.operator_algebra
+from qnet.algebra.abstract_algebra import (
+    CreateStatistics, create_statistics, temporary_instance_cache)
+from qnet.algebra.operator_algebra import OperatorSymbol, OperatorPlus
+
+
+PLUS = 'qnet.algebra.operator_algebra.OperatorPlus'
+
+
+def test_create_statistics():
+    """Test hit/miss counts and simplification counters"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    with temporary_instance_cache(OperatorPlus):
+        with create_statistics() as stats:
+            OperatorPlus.create(A, B)
+            OperatorPlus.create(A, B)
+        data = stats.as_dict()
+        assert data[PLUS]['misses'] == 1
+        assert data[PLUS]['hits'] == 1
+        assert data[PLUS]['instantiations'] == 1
+        simplifications = data[PLUS]['simplifications']
+        names = [simpl.__name__ for simpl in OperatorPlus._simplifications]
+        assert list(simplifications.keys()) == names
+        for name in names:
+            assert simplifications[name]['calls'] == 1
+            assert simplifications[name]['time'] >= 0
+        assert data[PLUS]['time'] == sum(
+            entry['time'] for entry in simplifications.values())
+        # no statistics are collected outside of the context
+        OperatorPlus.create(B, A)
+        assert stats.as_dict() == data
+
+
+def test_snapshot_reset():
+    """Test that snapshots are independent of the collector"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    stats = CreateStatistics()
+    with temporary_instance_cache(OperatorPlus):
+        with create_statistics(stats):
+            OperatorPlus.create(A, B)
+            snapshot = stats.snapshot()
+            OperatorPlus.create(A, B)
+    assert snapshot.as_dict()[PLUS]['hits'] == 0
+    assert stats.as_dict()[PLUS]['hits'] == 1
+    stats.reset()
+    assert stats.as_dict() == {}
+    assert PLUS in snapshot.as_dict()
+
+
+def test_same_class_names():
+    """Test that classes with the same name are reported separately"""
+
+    class OperatorSymbol(qnet.algebra.operator_algebra.OperatorSymbol):
+        pass
+
+    Base = qnet.algebra.operator_algebra.OperatorSymbol
+    with create_statistics() as stats:
+        Base.create('A', hs=0)
+        OperatorSymbol.create('A', hs=0)
+        OperatorSymbol.create('B', hs=0)
+    data = stats.as_dict()
+    base_key = 'qnet.algebra.operator_algebra.OperatorSymbol'
+    key = __name__ + '.test_same_class_names.<locals>.OperatorSymbol'
+    assert sorted(data.keys()) == sorted([base_key, key])
+    assert data[key]['instantiations'] == 2
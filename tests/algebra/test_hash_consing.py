@@ -0,0 +1,93 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Test hash-consing of expressions"""
+
+import pickle
+
+from qnet.algebra.abstract_algebra import (
+    Expression, hash_consing, temporary_instance_cache)
+from qnet.algebra.operator_algebra import (
+    OperatorSymbol, OperatorPlus, OperatorTimes, ScalarTimesOperator)
+
+
+def _deep_expr(A, B, depth):
+    expr = A
+    for i in range(depth):
+        expr = (expr + B) * A
+    return expr
+
+
+def test_hash_consing_identity():
+    """Test that structurally equal expressions are identical, even if they
+    are not shared through the instance cache"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    with hash_consing():
+        with temporary_instance_cache(OperatorPlus):
+            with temporary_instance_cache(OperatorTimes):
+                expr1 = _deep_expr(A, B, 50)
+        with temporary_instance_cache(OperatorPlus):
+            with temporary_instance_cache(OperatorTimes):
+                expr2 = _deep_expr(A, B, 50)
+        assert expr1 is expr2
+        assert expr1._hash is not None
+        assert 2 * expr1 is 2 * expr2
+    assert not Expression.hash_consing
+    # canonical instances are kept outside of the managed context
+    with temporary_instance_cache(OperatorPlus):
+        with hash_consing():
+            assert OperatorPlus.create(A, B) is OperatorPlus.create(A, B)
+            assert (A + B) is (B + A)
+
+
+def test_hash_consing_equality():
+    """Test equality between hash-consed expressions, and expressions that
+    were instantiated directly"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    with hash_consing():
+        expr1 = A + B
+        expr2 = A * B
+        assert expr1._interned and expr2._interned
+        assert expr1 != expr2
+        direct = OperatorPlus(A, B)
+        assert not direct._interned
+        assert direct is not expr1
+        assert direct == expr1
+        assert expr1 == direct
+        assert hash(direct) == hash(expr1)
+        assert {expr1: 1}[direct] == 1
+        # the canonical instance is also used on unpickling
+        assert pickle.loads(pickle.dumps(expr1)) is expr1
+        assert pickle.loads(pickle.dumps(direct)) is expr1
+    # outside of the managed context, unpickling returns the same instance
+    # as `create`
+    assert pickle.loads(pickle.dumps(expr1)) is A + B
+    with temporary_instance_cache(OperatorPlus):
+        unpickled = pickle.loads(pickle.dumps(expr1))
+        assert not unpickled._interned
+        assert unpickled == expr1
+
+
+def test_hash_consing_scalars():
+    """Test that scalar coefficients are part of the canonical instance"""
+    A = OperatorSymbol('A', hs=0)
+    with hash_consing():
+        assert (2 * A) is ScalarTimesOperator.create(2, A)
+        assert (2 * A) != (3 * A)
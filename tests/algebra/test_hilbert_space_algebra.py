@@ -173,6 +173,41 @@ def test_operations():
     assert h1 & h12 == h1
 
 
+def test_bitmask_operations():
+    """Test that the bitmask-based space operations agree with the
+    corresponding set operations on the local factors"""
+    from qnet.algebra.abstract_algebra import no_instance_caching
+    h1 = LocalSpace("h1")
+    h2 = LocalSpace("h2", dimension=2)
+    h3 = LocalSpace("h3")
+    with no_instance_caching():
+        h1_copy = LocalSpace("h1")
+    assert h1_copy is not h1
+    assert h1_copy._bitmask == h1._bitmask
+    assert LocalSpace("h1", dimension=2)._bitmask != h1._bitmask
+    spaces = [TrivialSpace, h1, h2, h3, h1 * h2, h1 * h3, h2 * h3,
+              h1 * h2 * h3]
+    for hs_a in spaces:
+        for hs_b in spaces:
+            a = set(hs_a.local_factors)
+            b = set(hs_b.local_factors)
+            assert set((hs_a & hs_b).local_factors) == a & b
+            assert set((hs_a * hs_b).local_factors) == a | b
+            assert hs_a.isdisjoint(hs_b) == a.isdisjoint(b)
+            assert hs_a.is_tensor_factor_of(hs_b) == (a <= b)
+            assert hs_a.is_strict_tensor_factor_of(hs_b) == (a < b)
+            if isinstance(hs_a, ProductSpace):
+                assert set((hs_a / hs_b).local_factors) == a - b
+        assert hs_a & FullSpace == hs_a
+        assert FullSpace & hs_a == hs_a
+        assert hs_a * FullSpace is FullSpace
+        assert not hs_a.isdisjoint(FullSpace)
+        assert hs_a.is_tensor_factor_of(FullSpace)
+        assert not FullSpace.is_tensor_factor_of(hs_a)
+    assert (h1 * h2) * h1_copy is h1 * h2
+    assert ProductSpace.create("h1", h2) == h1 * h2
+
+
 def test_hs_basis_states():
     """Test that we can obtain the basis states of a Hilbert space"""
     hs0 = LocalSpace('0')
@@ -237,3 +272,64 @@ def test_hs_basis_states():
         _ = FullSpace.dimension
     with pytest.raises(BasisNotSetError):
         _ = FullSpace.basis_states
+
+
+def test_basis_index():
+    """Test the mapping between basis labels and indices, in particular for
+    product spaces that are too large to enumerate their basis"""
+    hs1 = LocalSpace('1', basis=['g', 'e', 'r'])
+    hs2 = LocalSpace('2', dimension=2)
+    hs_prod = hs1 * hs2
+    for (i, label) in enumerate(hs_prod.basis_labels):
+        assert hs_prod.basis_index(label) == i
+        assert hs_prod.basis_state(i) == hs_prod.basis_state(label)
+    assert hs_prod.basis_state(-1) == hs_prod.basis_state('r,1')
+    assert hs1.basis_index('r') == 2
+    assert TrivialSpace.basis_index('0') == 0
+    with pytest.raises(ValueError):
+        hs1.basis_index('x')
+    with pytest.raises(ValueError):
+        hs_prod.basis_index('g')
+    with pytest.raises(BasisNotSetError):
+        LocalSpace('0').basis_index('0')
+    with pytest.raises(BasisNotSetError):
+        (LocalSpace('0') * hs1).basis_state(0)
+
+    hs_large = ProductSpace.create(
+        *[LocalSpace('q%d' % i, dimension=10) for i in range(12)])
+    assert hs_large.dimension == 10**12
+    label = "1,2,3,4,5,6,7,8,9,0,1,2"
+    assert hs_large.basis_index(label) == 123456789012
+    ket = hs_large.basis_state(123456789012)
+    assert ket == hs_large.basis_state(label)
+    with pytest.raises(IndexError):
+        hs_large.basis_state(10**12)
+    assert hs_large._basis is None  # the basis labels were not enumerated
+
+
+def test_bitmask_recycling():
+    """Test that the bits of local spaces that are no longer in use are
+    re-used, so that the registry of local spaces does not grow without
+    bounds"""
+    import gc
+    from qnet.algebra.abstract_algebra import no_instance_caching
+    from qnet.algebra.hilbert_space_algebra import _LOCAL_SPACE_INDICES
+    h1 = LocalSpace("recycle_1")
+    with no_instance_caching():
+        bitmasks = []
+        for i in range(100):
+            hs = LocalSpace("recycle_%d" % i, dimension=i+1)
+            bitmasks.append(hs._bitmask)
+            assert hs._bitmask != h1._bitmask
+            assert (hs * h1).isdisjoint(LocalSpace("other_%d" % i))
+            del hs
+        assert len(set(bitmasks)) <= 3
+        n_registered = len(_LOCAL_SPACE_INDICES)
+        for i in range(100):
+            LocalSpace("recycle_%d" % i, dimension=i+1)
+        gc.collect()
+        assert len(_LOCAL_SPACE_INDICES) <= n_registered
+        # equal local spaces share their bit as long as one of them is alive
+        h1_copy = LocalSpace("recycle_1")
+        assert h1_copy is not h1
+        assert h1_copy._bitmask == h1._bitmask
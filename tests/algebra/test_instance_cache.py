@@ -0,0 +1,193 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Test the bounded instance cache"""
+
+import gc
+
+import pytest
+
+from qnet.algebra.instance_cache import InstanceCache, WeakInstanceCache
+from qnet.algebra.abstract_algebra import (
+    set_instance_cache, temporary_instance_cache)
+from qnet.algebra.operator_algebra import (
+    OperatorSymbol, OperatorPlus, ZeroOperator, Adjoint)
+
+
+def test_lru_eviction():
+    """Test that the least recently used entries are evicted"""
+    cache = InstanceCache(maxsize=2)
+    cache['a'] = 1
+    cache['b'] = 2
+    assert cache['a'] == 1  # 'a' is now most recently used
+    cache['c'] = 3
+    assert 'b' not in cache
+    assert 'a' in cache and 'c' in cache
+    assert len(cache) == 2
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 1
+    with pytest.raises(KeyError):
+        cache['b']
+    assert cache.stats()['misses'] == 1
+    cache.reset_stats()
+    assert cache.hits == cache.misses == cache.evictions == 0
+
+
+def test_unbounded():
+    """Test that without maxsize, nothing is evicted"""
+    cache = InstanceCache()
+    for i in range(100):
+        cache[i] = i
+    assert len(cache) == 100
+    assert cache.evictions == 0
+    with pytest.raises(ValueError):
+        InstanceCache(maxsize=-1)
+
+
+def test_singletons_pinned():
+    """Test that the entries for the instance keys of singletons are never
+    evicted"""
+    zero_key = ZeroOperator._instance_key
+    cache = InstanceCache(maxsize=1)
+    cache[zero_key] = ZeroOperator
+    cache['a'] = 1
+    cache['b'] = 2
+    assert cache[zero_key] is ZeroOperator
+    assert len(cache) == 2
+    assert cache.stats()['pinned'] == 1
+    cache = InstanceCache(maxsize=1, pin_singletons=False)
+    cache[zero_key] = ZeroOperator
+    cache['a'] = 1
+    assert zero_key not in cache
+
+
+def test_singleton_values_evicted():
+    """Test that entries mapping to a singleton under any other key are
+    subject to the limit"""
+    orig_cache = set_instance_cache(InstanceCache(maxsize=100))
+    try:
+        cache = OperatorSymbol._instances
+        for i in range(500):
+            A = OperatorSymbol('A_%d' % i, hs=0)
+            assert A - A is ZeroOperator
+            assert 0 * A is ZeroOperator
+        stats = cache.stats()
+        assert stats['pinned'] <= 1
+        assert stats['size'] <= 101
+    finally:
+        set_instance_cache(orig_cache)
+
+
+def test_set_instance_cache():
+    """Test installing a bounded cache for a specific class"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    C = OperatorSymbol('C', hs=0)
+    orig_cache = set_instance_cache(InstanceCache(maxsize=1), OperatorPlus)
+    try:
+        cache = OperatorPlus._instances
+        assert isinstance(cache, InstanceCache)
+        assert cache is not orig_cache
+        expr1 = A + B
+        expr2 = A + C
+        assert len(cache) == 1
+        assert cache.evictions >= 1
+        # expressions are re-created correctly after eviction
+        assert A + B == expr1
+        assert A + C == expr2
+    finally:
+        set_instance_cache(orig_cache, OperatorPlus)
+    assert OperatorPlus._instances is orig_cache
+
+
+def test_temporary_cache_keeps_settings():
+    """Test that temporary_instance_cache creates a cache with the same
+    bound as the original cache"""
+    orig_cache = set_instance_cache(InstanceCache(maxsize=5), OperatorPlus)
+    try:
+        with temporary_instance_cache(OperatorPlus):
+            tmp_cache = OperatorPlus._instances
+            assert isinstance(tmp_cache, InstanceCache)
+            assert tmp_cache.maxsize == 5
+            assert len(tmp_cache) == 0
+        assert OperatorPlus._instances.maxsize == 5
+    finally:
+        set_instance_cache(orig_cache, OperatorPlus)
+
+
+def test_weak_cache():
+    """Test that the weak cache only keeps live expressions"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    C = OperatorSymbol('C', hs=0)
+    orig_cache = set_instance_cache(WeakInstanceCache(), OperatorPlus)
+    try:
+        cache = OperatorPlus._instances
+        expr = OperatorPlus.create(A, B)
+        assert OperatorPlus.create(A, B) is expr
+        assert cache.hits == 1
+        n_entries = len(cache)
+        assert n_entries >= 1
+        tmp = OperatorPlus.create(A, C)
+        assert len(cache) > n_entries
+        del tmp
+        gc.collect()
+        assert len(cache) == n_entries
+        del expr
+        gc.collect()
+        assert len(cache) == 0
+    finally:
+        set_instance_cache(orig_cache, OperatorPlus)
+
+
+def test_weak_cache_skipped_values():
+    """Test that values that would be kept alive by their own key, or that
+    cannot be weakly referenced, are not stored"""
+    A = OperatorSymbol('A', hs=0)
+    cache = WeakInstanceCache()
+    cache[(OperatorPlus, A)] = A
+    assert (OperatorPlus, A) not in cache
+    cache['one'] = 1
+    assert 'one' not in cache
+    assert cache.stats()['skipped'] == 2
+    cache['zero'] = ZeroOperator
+    assert 'zero' not in cache
+    assert cache.stats()['skipped'] == 3
+    cache[ZeroOperator._instance_key] = ZeroOperator
+    assert cache[ZeroOperator._instance_key] is ZeroOperator
+    assert cache.stats()['pinned'] == 1
+
+
+def test_weak_cache_nested_key_references():
+    """Test that the weak cache does not keep alive values that occur deep
+    inside their own key, e.g. for a collapsing double adjoint or product of
+    scalars"""
+    orig_cache = set_instance_cache(WeakInstanceCache())
+    try:
+        cache = OperatorSymbol._instances
+        n_entries = len(cache)
+        for i in range(200):
+            A = OperatorSymbol('A_%d' % i, hs=0)
+            assert Adjoint.create(Adjoint.create(A)) is A
+            assert (2 * A) * 0.5 == A
+        del A
+        gc.collect()
+        assert len(cache) == n_entries
+    finally:
+        set_instance_cache(orig_cache)
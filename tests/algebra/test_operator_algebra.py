@@ -19,17 +19,20 @@
 
 
 import unittest
+from math import factorial
 import pytest
 
 from numpy import (array as np_array, conjugate as np_conjugate,
                    int_ as np_int, float_ as np_float)
-from sympy import symbols, sqrt, I, exp, sympify
+from sympy import symbols, sqrt, I, exp, sympify, sin, cos
 
 from qnet.algebra.operator_algebra import (
         Displace, Create, Destroy, OperatorSymbol, IdentityOperator,
         ZeroOperator, OperatorPlus, LocalSigma, LocalProjector, OperatorTrace,
         Adjoint, X, Y, Z, ScalarTimesOperator, OperatorTimes, Jz,
-        Jplus, Jminus, Phase, LocalOperator)
+        Jplus, Jminus, Phase, LocalOperator, get_coeffs, get_coeffs_matrix,
+        simplify_scalar, set_simplify_scalar_cache, simplify_scalar_stats)
+from qnet.algebra.instance_cache import InstanceCache
 from qnet.algebra.matrix_algebra import Matrix, identity_matrix
 from qnet.algebra.hilbert_space_algebra import (
         LocalSpace, TrivialSpace, ProductSpace)
@@ -684,3 +687,137 @@ def test_custom_identifier():
         assert ascii(expr) == '1 + b^(0)H * b^(0)'
         expr = expr.substitute({hs: LocalSpace(0)})
         assert ascii(expr) == '1 + a^(0)H * a^(0)'
+
+
+def test_expand_collects_terms():
+    """Test that the expansion of a product of sums collects all terms, and
+    correctly normal-orders operators on the same Hilbert space even if they
+    are separated by operators on other Hilbert spaces"""
+    A = OperatorSymbol('A', hs=1)
+    B = OperatorSymbol('B', hs=2)
+    x = symbols('x')
+    expr = ((A + B) * (A - 2 * B) * (A + x * B)).expand()
+    assert expr == (
+        A * A * A + (x - 1) * A * A * B + (-x - 2) * A * B * B -
+        2 * x * B * B * B)
+    assert len(expr.operands) == 4
+
+    a0, a1, a2 = [Destroy(hs=i) for i in range(3)]
+    k0, k1, k2 = symbols('kappa_0:3', positive=True)
+    L = sqrt(k0) * a0 + sqrt(k1) * a1 + sqrt(k2) * a2
+    H = (I/2) * sqrt(k2) * (L.dag() * a2 - a2.dag() * L)
+    expr = (L.dag() * L * H).expand()
+    # a0^dag a2 a1 a2^dag = a0^dag a1 (1 + a2^dag a2)
+    assert (
+        expr.operands[[o.term if isinstance(o, ScalarTimesOperator) else o
+                       for o in expr.operands].index(a0.dag() * a1)].coeff
+        .expand() == (-I/2) * k2 * sqrt(k0) * sqrt(k1))
+
+
+def test_expand_normal_orders_ladder_operators():
+    """Test that the expansion of products of ladder operators yields the
+    closed-form normal-ordered result"""
+    a = Destroy(hs=1)
+    ad = a.dag()
+    b = Destroy(hs=2)
+    assert (a * a * a * ad * ad * ad).expand() == (
+        ad * ad * ad * a * a * a + 9 * ad * ad * a * a + 18 * ad * a + 6)
+    expr = ((a + ad)**4).expand()
+    assert expr == (
+        a * a * a * a + 4 * ad * a * a * a + 6 * a * a + 6 * ad * ad * a * a +
+        12 * ad * a + 3 + 4 * ad * ad * ad * a + 6 * ad * ad +
+        ad * ad * ad * ad)
+    assert len(expr.operands) == 9
+    # operators on other Hilbert spaces are left in place
+    B = OperatorSymbol('B', hs=1)
+    assert (a * b * ad * b.dag()).expand() == (
+        ad * b.dag() * a * b + ad * a + b.dag() * b + 1)
+    assert (B * a * ad).expand() == B + B * ad * a
+
+
+def test_expand_ladder_power():
+    """Test the expansion of (a + a^dag)^20 against the closed-form normal
+    ordering"""
+    a = Destroy(hs=1)
+    ad = a.dag()
+    n = 20
+    terms = []
+    for j in range(n // 2 + 1):
+        for p in range(n - 2 * j + 1):
+            q = n - 2 * j - p
+            coeff = factorial(n) // (
+                factorial(p) * factorial(q) * factorial(j) * 2**j)
+            terms.append(coeff * OperatorTimes.create(*([ad] * p + [a] * q)))
+    assert ((a + ad)**n).expand() == OperatorPlus.create(*terms)
+
+
+def test_get_coeffs_matrix():
+    """Test the extraction of coefficients of multiple operators into a
+    matrix"""
+    a = Destroy(hs=1)
+    b = Destroy(hs=2)
+    x = symbols('x')
+    exprs = [(a + b) * (a.dag() + x), 2 * a + 3, 0, ZeroOperator]
+    basis_terms = [IdentityOperator, a, b * a.dag(), a.dag() * a]
+    coeffs = get_coeffs_matrix(exprs, basis_terms)
+    assert coeffs.shape == (4, 4)
+    assert coeffs.dtype == object
+    assert list(coeffs[0, :]) == [1, x, 1, 1]
+    assert list(coeffs[1, :]) == [3, 2, 0, 0]
+    assert list(coeffs[2, :]) == list(coeffs[3, :]) == [0, 0, 0, 0]
+    expanded = exprs[0].expand()
+    for (j, term) in enumerate(basis_terms):
+        assert coeffs[0, j] == get_coeffs(expanded)[term]
+
+    coeffs = get_coeffs_matrix(
+        [2 * a + 3, 0.1 * a.dag() * a], basis_terms, epsilon=0.5,
+        sparse=True)
+    assert coeffs.shape == (2, 4)
+    assert coeffs.nnz == 2
+    assert (coeffs.toarray() == np_array(
+        [[3, 2, 0, 0], [0, 0, 0, 0]], dtype=complex)).all()
+
+    with pytest.raises(ValueError):
+        get_coeffs_matrix([a], [2 * a])
+    with pytest.raises(ValueError):
+        get_coeffs_matrix([a], [a + b])
+
+
+def test_simplify_scalar_cache():
+    """Test the simplification of scalars with different strategies, and the
+    memoization of the results"""
+    a = Destroy(hs=1)
+    x, y = symbols('x y', positive=True)
+    coeff = sin(x)**2 + cos(x)**2 + (x + y)**2 - x**2
+    orig_cache = set_simplify_scalar_cache(InstanceCache(maxsize=2))
+    try:
+        assert simplify_scalar(coeff) == 1 + 2 * x * y + y**2
+        assert (coeff * a).simplify_scalar() == (1 + 2 * x * y + y**2) * a
+        stats = simplify_scalar_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+        # 'expand_cancel' does not know trigonometric identities
+        assert ((coeff * a).simplify_scalar(strategy='expand_cancel') ==
+                (sin(x)**2 + cos(x)**2 + 2 * x * y + y**2) * a)
+        stats = simplify_scalar_stats()
+        assert stats['misses'] == 2
+        # callable strategies bypass the cache
+        assert simplify_scalar(
+            Matrix([[coeff * a, coeff]]), strategy=lambda s: x) == Matrix(
+            [[x * a, x]])
+        assert simplify_scalar_stats() == stats
+        assert simplify_scalar(
+            coeff, strategy=lambda s: s.expand()) == coeff.expand()
+        assert simplify_scalar_stats() == stats
+        assert simplify_scalar(coeff, strategy='expand_cancel') != 1
+        stats = simplify_scalar_stats()
+        assert stats['hits'] == 2
+        assert simplify_scalar(x) is x
+        with pytest.raises(ValueError):
+            simplify_scalar(coeff * a, strategy='foo')
+        set_simplify_scalar_cache(None)
+        assert simplify_scalar_stats() == {}
+        assert simplify_scalar(coeff) == 1 + 2 * x * y + y**2
+    finally:
+        set_simplify_scalar_cache(orig_cache)
@@ -0,0 +1,66 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Test the order keys that determine the order of operands"""
+
+import sympy
+
+from qnet.algebra.hilbert_space_algebra import LocalSpace
+from qnet.algebra.operator_algebra import (
+    OperatorSymbol, Destroy, LocalSigma, ScalarTimesOperator)
+from qnet.algebra.ordering import KeyTuple
+
+
+def test_key_tuple_mixed_types():
+    """Test that KeyTuples with elements of different types can be compared
+    without converting the elements to strings"""
+    x = sympy.symbols('x')
+    keys = [
+        KeyTuple(('a', None, 1.0)), KeyTuple(('a', 1, 1.0)),
+        KeyTuple(('a', '~b', 1.0)), KeyTuple(('a', x, 1.0)),
+        KeyTuple(('a', KeyTuple((1, )), 1.0)), KeyTuple(('a', 1))]
+    assert sorted(reversed(keys)) == [
+        keys[5], keys[1], keys[2], keys[4], keys[0], keys[3]]
+    assert KeyTuple(('a', 1)) < ('a', 2)
+    assert KeyTuple(('a', 1)) > 'a'
+    assert isinstance(KeyTuple((1, 2, 3))[:2], KeyTuple)
+    assert isinstance(KeyTuple((1, )) + (2, ), KeyTuple)
+
+
+def test_order_key_cached():
+    """Test that the order key of a scalar times an operator is calculated
+    only once"""
+    x = sympy.symbols('x')
+    expr = ScalarTimesOperator(x, OperatorSymbol('A', hs=0))
+    assert expr._order_key is expr._order_key
+    assert expr._order_key[-1] is x
+
+
+def test_sorted_operands():
+    """Test the order of the operands of a sum with mixed labels and
+    coefficients"""
+    x, y = sympy.symbols('x y')
+    hs = LocalSpace('q', basis=('g', 'e'))
+    a = Destroy(hs=LocalSpace('c'))
+    A = OperatorSymbol('A', hs=hs)
+    B = OperatorSymbol('B', hs=hs)
+    expr = (y * B + x * LocalSigma('e', 'g', hs=hs) + 2 * A +
+            LocalSigma(0, 1, hs=hs) + a + 0.5 * a.dag())
+    assert expr.operands == tuple(sorted(expr.operands, key=lambda o: (
+        o._order_key if hasattr(o, '_order_key') else o)))
+    assert expr.operands.index(2 * A) < expr.operands.index(y * B)
@@ -0,0 +1,103 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Test the parallel processing of matrix elements and terms of sums"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from sympy import symbols, sqrt
+
+from qnet.algebra.parallel import (
+    set_parallel_executor, parallel_map, parallel_workers)
+from qnet.algebra.operator_algebra import Destroy, OperatorSymbol
+from qnet.algebra.matrix_algebra import Matrix
+from qnet.algebra.circuit_algebra import SLH
+
+
+def _pid(item):
+    return os.getpid()
+
+
+def _nested_pids(item):
+    return parallel_map(_pid, [1, 2])
+
+
+@pytest.fixture
+def slh():
+    """A two-mode SLH model with coefficients that can be simplified"""
+    a = Destroy(hs=1)
+    b = Destroy(hs=2)
+    k1, k2, g = symbols('kappa_1 kappa_2 g', positive=True)
+    A = OperatorSymbol('A', hs=1)
+    return SLH(
+        Matrix([[1, 0], [0, 1]]),
+        Matrix([[sqrt(k1) * (a + A)], [(sqrt(k2 * g) / sqrt(g)) * b]]),
+        ((k1 + k2)**2 - k2**2) * a.dag() * a +
+        g * (a.dag() + b) * (a + b.dag()))
+
+
+def test_parallel_map():
+    """Test that parallel_map uses the selected executor, and is serial
+    within the worker processes"""
+    pid = os.getpid()
+    assert parallel_map(_pid, range(4)) == [pid] * 4
+    with parallel_workers(2):
+        pids = parallel_map(_pid, range(4))
+        assert pid not in pids
+        for nested_pids in parallel_map(_nested_pids, range(4)):
+            assert len(set(nested_pids)) == 1
+            assert pid not in nested_pids
+        with parallel_workers(1):
+            assert parallel_map(_pid, range(4)) == [pid] * 4
+    with pytest.raises(ValueError):
+        with parallel_workers(-1):
+            pass
+
+    executor = ProcessPoolExecutor(2)
+    orig_executor = set_parallel_executor(executor)
+    try:
+        assert pid not in parallel_map(_pid, range(4))
+        with parallel_workers(0):
+            assert parallel_map(_pid, range(4)) == [pid] * 4
+    finally:
+        set_parallel_executor(orig_executor)
+        executor.shutdown()
+    assert parallel_map(_pid, range(4)) == [pid] * 4
+
+
+def test_parallel_expand_simplify(slh):
+    """Test that expanding and simplifying in parallel gives the same
+    (interned) result as in serial"""
+    expanded = slh.expand()
+    expanded_parallel = slh.expand(workers=2)
+    assert expanded_parallel == expanded
+    assert slh.L.expand(workers=2) == expanded.L
+    for strategy in ('simplify', 'expand_cancel'):
+        simplified = expanded.simplify_scalar(strategy=strategy)
+        assert expanded.simplify_scalar(
+            strategy=strategy, workers=2) == simplified
+        assert expanded.H.simplify_scalar(
+            strategy=strategy, workers=2) == simplified.H
+        assert expanded.L.simplify_scalar(
+            strategy=strategy, workers=2) == simplified.L
+    # the results from the worker processes are re-created in the instance
+    # cache of the main process
+    for expr in (expanded_parallel.L[0, 0], expanded_parallel.L[1, 0]):
+        assert expr is expr.create(*expr.args, **expr.kwargs)
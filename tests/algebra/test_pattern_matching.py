@@ -25,7 +25,8 @@ import pytest
 from qnet.algebra.scalar_types import SCALAR_TYPES
 from qnet.algebra.operator_algebra import (
         OperatorSymbol, ScalarTimesOperator, OperatorTimes, Operator,
-        LocalOperator, Create)
+        LocalOperator, Create, Destroy, OperatorPlus, ZeroOperator,
+        IdentityOperator, LocalSigma, LocalProjector, Phase, Displace)
 from qnet.algebra.hilbert_space_algebra import (
         FullSpace, HilbertSpace, LocalSpace)
 from qnet.algebra.circuit_algebra import (
@@ -400,3 +401,96 @@ def test_findall():
     assert len(pattern(LocalOperator).findall(expr)) == 0
     assert len(pattern(LocalOperator)
                .findall(expr.substitute({c: c_local}))) == 2
+
+
+def test_lazy_reason():
+    """Test that the reason for a failed match is only generated on demand"""
+
+    class ExpensiveRepr():
+        n_repr = 0
+
+        def __repr__(self):
+            self.__class__.n_repr += 1
+            return 'ExpensiveRepr()'
+
+    expr = ExpensiveRepr()
+    match = wc('a', head=int).match(expr)
+    assert not match
+    d = MatchDict()
+    d.update(match)
+    assert not d
+    assert ExpensiveRepr.n_repr == 0
+    assert d.reason == "ExpensiveRepr() is not an instance of int"
+    assert match.reason == "ExpensiveRepr() is not an instance of int"
+    assert ExpensiveRepr.n_repr == 2
+    match = match_pattern(1, expr)
+    assert ExpensiveRepr.n_repr == 2
+    assert "'1' and 'ExpensiveRepr()' are not the same" in match.reason
+
+
+@pytest.mark.parametrize('pat, expr, matched, wc_dict', PATTERNS)
+def test_compiled_match(pat, expr, matched, wc_dict):
+    """Test that compiled patterns give the same result as `Pattern.match`"""
+    match = pat.compile()(expr)
+    if matched:
+        assert match == dict(pat.match(expr))
+        assert len(match) == len(wc_dict)
+        for key, val in wc_dict.items():
+            assert match[key] == val
+    else:
+        assert match is None
+
+
+def test_compiled_rules():
+    """Test that the compiled patterns for the algebraic rules of operator
+    products and sums give the same result as the uncompiled patterns"""
+    hs = LocalSpace('q')
+    alpha = Symbol('alpha')
+    operands = [
+        2, alpha, ZeroOperator, IdentityOperator, Destroy(hs=hs),
+        Create(hs=hs), LocalSigma(0, 1, hs=hs), LocalSigma(1, 1, hs=hs),
+        LocalProjector(0, hs=hs), Phase(alpha, hs=hs),
+        Displace(alpha, hs=hs), OperatorSymbol('A', hs=hs),
+        2 * OperatorSymbol('A', hs=hs), alpha * Destroy(hs=hs),
+        OperatorSymbol('A', hs=hs) + OperatorSymbol('B', hs=hs)]
+    n_matches = 0
+    for cls, attr in [(OperatorTimes, '_binary_rules'),
+                      (OperatorPlus, '_binary_rules'),
+                      (ScalarTimesOperator, '_rules')]:
+        for (pat, replacement) in getattr(cls, attr).values():
+            matcher = pat.compile()
+            for first in operands:
+                for second in operands:
+                    expr = ProtoExpr([first, second], {})
+                    match = match_pattern(pat, expr)
+                    compiled_match = matcher(expr)
+                    if match:
+                        n_matches += 1
+                        assert compiled_match == dict(match)
+                    else:
+                        assert compiled_match is None
+    assert n_matches > 0
+
+
+def test_match_no_args():
+    """Test matching an expression without any args against a pattern with
+    args"""
+    pat = pattern_head(pattern(int), wc('i___', head=int))
+    match = pat.match(ProtoExpr([], {}))
+    assert not match
+    assert 'insufficient number of arguments' in match.reason
+    assert pat.compile()(ProtoExpr([], {})) is None
+    pat = pattern_head(wc('i___', head=int))
+    assert pat.match(ProtoExpr([], {})) == {'i': []}
+    assert pat.compile()(ProtoExpr([], {})) == {'i': []}
+
+
+def test_compiled_raising_condition():
+    """Test that an exception raised by a condition propagates in the same
+    way from compiled patterns as from `Pattern.match`"""
+    A = OperatorSymbol('A', hs=0)
+    pat = pattern(OperatorSymbol, conditions=[lambda expr: expr.no_such_attr])
+    with pytest.raises(AttributeError):
+        pat.match(A)
+    with pytest.raises(AttributeError):
+        pat.compile()(A)
@@ -0,0 +1,141 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Test the pickling of expressions"""
+
+import pickle
+
+import sympy
+
+from qnet.algebra.abstract_algebra import (
+    _dag_table, no_instance_caching, temporary_instance_cache)
+from qnet.algebra.circuit_algebra import SLH
+from qnet.algebra.hilbert_space_algebra import LocalSpace
+from qnet.algebra.matrix_algebra import Matrix
+from qnet.algebra.operator_algebra import (
+    OperatorSymbol, OperatorPlus, OperatorTimes, ScalarTimesOperator, Destroy,
+    IdentityOperator, ZeroOperator)
+from qnet.circuit_components.mach_zehnder_cc import MachZehnder
+
+
+def _cascade(n):
+    """SLH model for a cascade of `n` cavities"""
+    slh = None
+    for i in range(n):
+        a = Destroy(hs=LocalSpace('c%d' % i))
+        kappa = sympy.symbols('kappa_%d' % i, positive=True)
+        cavity = SLH([[1]], [sympy.sqrt(kappa) * a], i * a.dag() * a)
+        slh = cavity if slh is None else cavity << slh
+    return slh.toSLH()
+
+
+def test_pickle_roundtrip():
+    """Test that expressions are restored after pickling"""
+    hs = LocalSpace('q', dimension=2)
+    A = OperatorSymbol('A', hs=hs)
+    B = OperatorSymbol('B', hs=hs)
+    exprs = [
+        A, A + B, 2 * A * B, sympy.symbols('g') * (A + IdentityOperator),
+        ZeroOperator, Matrix([[A, 0], [B, A * B]]), _cascade(3),
+        MachZehnder('Zender').creduce()]
+    for expr in exprs:
+        assert pickle.loads(pickle.dumps(expr)) == expr
+
+
+def test_pickle_interned():
+    """Test that unpickled (sub-)expressions are interned in the instance
+    cache"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    expr = 2 * A * B + A
+    with temporary_instance_cache(OperatorPlus):
+        unpickled = pickle.loads(pickle.dumps(expr))
+        assert unpickled is not expr
+        assert unpickled == expr
+        assert OperatorPlus.create(*unpickled.args) is unpickled
+        assert pickle.loads(pickle.dumps(expr)) is unpickled
+
+
+def test_pickle_not_normalized():
+    """Test that expressions that were instantiated directly (without
+    simplification) survive pickling"""
+    A = OperatorSymbol('A', hs=0)
+    expr = OperatorPlus(A, A)
+    unpickled = pickle.loads(pickle.dumps(expr))
+    assert isinstance(unpickled, OperatorPlus)
+    assert unpickled == expr
+    assert A + A == 2 * A
+
+
+class FailingOperatorSymbol(OperatorSymbol):
+    """Operator symbol whose `create` method always fails"""
+
+    @classmethod
+    def create(cls, *args, **kwargs):
+        raise ValueError("Cannot create %s" % cls.__name__)
+
+
+def test_pickle_failing_create():
+    """Test that an expression is instantiated directly when unpickling if
+    its `create` method raises an exception"""
+    A = FailingOperatorSymbol('A', hs=0)
+    expr = OperatorPlus(A, OperatorSymbol('B', hs=0))
+    unpickled = pickle.loads(pickle.dumps(expr))
+    assert unpickled == expr
+    assert isinstance(unpickled.operands[0], FailingOperatorSymbol)
+
+
+def test_pickle_sharing():
+    """Test that equal sub-expressions are pickled only once, even if they are
+    not the same object"""
+    with no_instance_caching():
+        slh = _cascade(5)
+    # The size of the pickle is not compared, as equal Sympy sub-objects
+    # (e.g. symbols) are only shared if Sympy's own cache made them identical
+    assert len(_dag_table(slh)) == len(_dag_table(_cascade(5)))
+    assert pickle.loads(pickle.dumps(slh)) == slh
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    with no_instance_caching():
+        expr1 = 2 * A * B
+        expr2 = 2 * A * B
+    assert expr1 == expr2 and expr1 is not expr2
+    table = _dag_table(OperatorPlus(expr1, expr2))
+    # LocalSpace, A, B, OperatorTimes, ScalarTimesOperator, OperatorPlus
+    assert len(table) == 6
+    assert table[-1][1][0] is table[-1][1][1]
+    # equal values of different types are not merged
+    table = _dag_table(OperatorPlus(
+        ScalarTimesOperator(1, A), ScalarTimesOperator(1.0, A)))
+    assert len(table) == 5
+
+
+def test_pickle_deep():
+    """Test that pickling deep expressions does not exceed the recursion
+    limit"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    expr = A
+    for i in range(5000):
+        expr = OperatorTimes(OperatorPlus(expr, B), A)
+    unpickled = pickle.loads(pickle.dumps(expr))
+    for i in range(5000):
+        assert isinstance(unpickled, OperatorTimes)
+        assert unpickled.operands[1] == A
+        unpickled = unpickled.operands[0].operands[0]
+    assert unpickled == A
@@ -22,7 +22,7 @@ from qnet.algebra.operator_algebra import (
     OperatorSymbol, ScalarTimesOperator, OperatorPlus, Operator,
     OperatorTimes)
 from qnet.algebra.abstract_algebra import (
-     extra_binary_rules, simplify, CannotSimplify)
+     Expression, extra_binary_rules, simplify, CannotSimplify)
 from qnet.algebra.pattern_matching import wc, pattern_head, pattern
 from qnet.printing import srepr
 
@@ -71,3 +71,37 @@ def test_simplify():
     assert (srepr(new_expr) ==
             "ScalarTimesOperator(2, OperatorSymbol('CommutAD', "
             "hs=LocalSpace('h1')))")
+
+
+def test_simplify_deep_expr():
+    """Test simplification of an expression nested deeper than the recursion
+    limit"""
+    hs = LocalSpace(0)
+    A = OperatorSymbol('A', hs=hs)
+    B = OperatorSymbol('B', hs=hs)
+    C = OperatorSymbol('C', hs=hs)
+    D = OperatorSymbol('D', hs=hs)
+
+    expr = A
+    for i in range(5000):
+        if i % 2 == 0:
+            expr = (expr + B) * C
+        else:
+            expr = expr * C + B
+
+    def symbol_names(expr):
+        names = set()
+        stack = [expr]
+        while len(stack) > 0:
+            expr = stack.pop()
+            if isinstance(expr, OperatorSymbol):
+                names.add(expr.identifier)
+            elif isinstance(expr, Expression):
+                stack.extend(expr.args)
+        return names
+
+    A_ = wc('A', head=OperatorSymbol,
+            conditions=[lambda A: A.identifier == 'A'])
+    rules = [(A_, lambda A: D)]
+    assert symbol_names(expr.simplify(rules)) == set(['B', 'C', 'D'])
+    assert symbol_names(simplify(expr, rules)) == set(['B', 'C', 'D'])
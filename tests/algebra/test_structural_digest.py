@@ -0,0 +1,116 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Test the process-independent structural digest of expressions"""
+
+import os
+import subprocess
+import sys
+
+import sympy
+import pytest
+
+from qnet.algebra.abstract_algebra import (
+    no_instance_caching, structural_digest)
+from qnet.algebra.circuit_algebra import SLH
+from qnet.algebra.hilbert_space_algebra import LocalSpace
+from qnet.algebra.matrix_algebra import Matrix
+from qnet.algebra.operator_algebra import (
+    OperatorSymbol, OperatorPlus, OperatorTimes, Destroy, IdentityOperator)
+from qnet.circuit_components.mach_zehnder_cc import MachZehnder
+
+
+def _cascade(n):
+    """SLH model for a cascade of `n` cavities"""
+    slh = None
+    for i in range(n):
+        a = Destroy(hs=LocalSpace('c%d' % i))
+        kappa = sympy.symbols('kappa_%d' % i, positive=True)
+        cavity = SLH([[1]], [sympy.sqrt(kappa) * a], i * a.dag() * a)
+        slh = cavity if slh is None else cavity << slh
+    return slh.toSLH()
+
+
+def test_digest_equal():
+    """Test that equal expressions have the same digest, even if they are
+    different objects"""
+    with no_instance_caching():
+        slh = _cascade(3)
+    assert slh is not _cascade(3)
+    assert slh.structural_digest() == _cascade(3).structural_digest()
+    assert len(slh.structural_digest()) == 32
+    # the digest is only calculated once
+    assert slh.structural_digest() is slh.structural_digest()
+
+
+def test_digest_different():
+    """Test that different expressions have different digests"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    x = sympy.symbols('x')
+    x_real = sympy.symbols('x', real=True)
+    exprs = [
+        A, B, OperatorSymbol('A', hs=1), A + B, A * B, B * A, 2 * A,
+        2.5 * A, sympy.Rational(1, 2) * A, 0.5 * A, x * A, x_real * A,
+        sympy.sqrt(x) * A, sympy.pi * A, IdentityOperator,
+        Matrix([[A, B]]), Matrix([[A], [B]]), Matrix([[1, 2]]),
+        Matrix([[1.0, 2.0]]), _cascade(2), _cascade(3),
+        MachZehnder('Zender'), MachZehnder('Zender', alpha=2),
+        MachZehnder('Zender').creduce()]
+    digests = set([structural_digest(expr) for expr in exprs])
+    assert len(digests) == len(exprs)
+
+
+def test_digest_values():
+    """Test the digest of scalars and containers"""
+    A = OperatorSymbol('A', hs=0)
+    assert structural_digest(A) == A.structural_digest()
+    assert structural_digest(1) != structural_digest(1.0)
+    assert structural_digest(1) != structural_digest(True)
+    assert structural_digest((1, A)) != structural_digest([1, A])
+    assert (structural_digest({'a': 1, 'b': A}) ==
+            structural_digest({'b': A, 'a': 1}))
+    with pytest.raises(TypeError):
+        structural_digest(sympy.Dummy('x') * A)
+    with pytest.raises(TypeError):
+        structural_digest(object())
+
+
+def test_digest_process_independent():
+    """Test that the digest is the same in a different process (with a
+    different seed for Python's hash randomization)"""
+    code = "\n".join([
+        "from qnet.circuit_components.mach_zehnder_cc import MachZehnder",
+        "slh = MachZehnder('Zender').toSLH()",
+        "print(slh.structural_digest().hex())"])
+    env = dict(os.environ)
+    env['PYTHONHASHSEED'] = '12345'
+    output = subprocess.check_output([sys.executable, '-c', code], env=env)
+    digest = MachZehnder('Zender').toSLH().structural_digest()
+    assert output.decode('ascii').strip() == digest.hex()
+
+
+def test_digest_deep():
+    """Test that the digest of deep expressions does not exceed the recursion
+    limit"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    expr = A
+    for i in range(5000):
+        expr = OperatorTimes(OperatorPlus(expr, B), A)
+    assert len(expr.structural_digest()) == 32
@@ -20,7 +20,7 @@
 from sympy import symbols
 import pytest
 
-from qnet.algebra.abstract_algebra import substitute
+from qnet.algebra.abstract_algebra import Expression, substitute
 from qnet.algebra.hilbert_space_algebra import LocalSpace, BasisNotSetError
 from qnet.algebra.matrix_algebra import Matrix
 from qnet.algebra.operator_algebra import (
@@ -182,3 +182,63 @@ def test_singleton_substitute():
     """Test that calling the substitute method on a Singleton returns the
     Singleton"""
     assert II.substitute({}) is II
+
+
+def _deep_expr(base, depth):
+    """Return an operator expression nested to the given `depth`, containing
+    `base` at the lowest level"""
+    hs = LocalSpace(0)
+    B = OperatorSymbol('B', hs=hs)
+    C = OperatorSymbol('C', hs=hs)
+    expr = base
+    for i in range(depth):
+        if i % 2 == 0:
+            expr = (expr + B) * C
+        else:
+            expr = expr * C + B
+    return expr
+
+
+def _symbol_names(expr):
+    """Set of the identifiers of all the OperatorSymbols in `expr`, obtained
+    without recursion"""
+    names = set()
+    stack = [expr]
+    while len(stack) > 0:
+        expr = stack.pop()
+        if isinstance(expr, OperatorSymbol):
+            names.add(expr.identifier)
+        elif isinstance(expr, Expression):
+            stack.extend(expr.args)
+    return names
+
+
+def test_substitute_deep_expr():
+    """Test substitution in an expression nested deeper than the recursion
+    limit"""
+    # Note that we cannot compare to an equivalent expression directly, as
+    # testing the equality of two distinct deep expressions is recursive
+    A = OperatorSymbol('A', hs=0)
+    D = OperatorSymbol('D', hs=0)
+    expr = _deep_expr(A, 30000)
+    assert _symbol_names(expr.substitute({A: D})) == set(['B', 'C', 'D'])
+    assert _symbol_names(substitute(expr, {A: D})) == set(['B', 'C', 'D'])
+
+
+def test_substitute_shared_subexpr():
+    """Test that a sub-expression that occurs several times in an expression
+    is only substituted once"""
+    hs = LocalSpace(0)
+    A = OperatorSymbol('A', hs=hs)
+    B = OperatorSymbol('B', hs=hs)
+    n_lookups = []
+
+    class CountingDict(dict):
+        def __contains__(self, key):
+            n_lookups.append(key)
+            return super().__contains__(key)
+
+    shared = A * B + B * A
+    expr = shared * shared + shared
+    assert expr.substitute(CountingDict({A: B})) == expr.substitute({A: B})
+    assert n_lookups.count(shared) == 1
@@ -0,0 +1,157 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Test the construction of expressions from several threads"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from qnet.algebra.abstract_algebra import (
+    Expression, extra_rules, hash_consing, no_instance_caching, no_rules,
+    temporary_instance_cache, set_instance_cache)
+from qnet.algebra.context_vars import _ThreadLocalVar
+from qnet.algebra.instance_cache import InstanceCache
+from qnet.algebra.operator_algebra import (
+    OperatorSymbol, OperatorPlus, OperatorTimes, ScalarTimesOperator,
+    IdentityOperator)
+from qnet.algebra.pattern_matching import wc, pattern_head
+
+
+def _sum_of_products(n, hs):
+    ops = [OperatorSymbol('A%d' % i, hs=hs) for i in range(n)]
+    expr = ops[0]
+    for (i, op) in enumerate(ops[1:]):
+        expr = expr + (i + 1) * op * ops[i]
+    return expr
+
+
+def test_concurrent_create():
+    """Test that threads sharing a bounded instance cache obtain equal
+    expressions"""
+    orig_cache = set_instance_cache(InstanceCache(maxsize=50))
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda __: _sum_of_products(30, 'threads'), range(32)))
+    finally:
+        set_instance_cache(orig_cache)
+    expected = _sum_of_products(30, 'threads')
+    for expr in results:
+        assert expr == expected
+
+
+def test_concurrent_hash_consing():
+    """Test that hash-consing in several threads results in a single canonical
+    instance"""
+
+    def construct(__):
+        with hash_consing():
+            with temporary_instance_cache(OperatorPlus):
+                with temporary_instance_cache(OperatorTimes):
+                    return _sum_of_products(20, 'consing')
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(construct, range(16)))
+    for expr in results:
+        assert expr is results[0]
+
+
+def _run_in_thread(fn):
+    """Run `fn` in a new thread while the calling thread waits, and return its
+    result"""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_context_local_rules():
+    """Test that temporary rules are only active in the thread that enters the
+    managed context"""
+    A = OperatorSymbol('A', hs=0)
+    rule = (pattern_head(wc('coeff'), wc('term', head=OperatorSymbol)),
+            lambda coeff, term: IdentityOperator)
+    with extra_rules(ScalarTimesOperator, {'extra': rule}):
+        assert 2 * A == IdentityOperator
+        assert ('extra', rule) in ScalarTimesOperator._rules.items()
+        assert _run_in_thread(lambda: 2 * A) != IdentityOperator
+        assert 'extra' not in _run_in_thread(
+            lambda: ScalarTimesOperator._rules)
+    assert 2 * A != IdentityOperator
+    with no_rules(OperatorPlus):
+        assert len(OperatorPlus._binary_rules) == 0
+        assert _run_in_thread(lambda: A + A) == 2 * A
+    assert len(OperatorPlus._binary_rules) > 0
+
+
+def test_context_local_instance_cache():
+    """Test that temporary instance caches and flags are only active in the
+    thread that enters the managed context"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    expr = A + B
+    with temporary_instance_cache(OperatorPlus):
+        tmp_cache = OperatorPlus._instances
+        assert len(tmp_cache) == 0
+        assert _run_in_thread(lambda: OperatorPlus._instances) is not tmp_cache
+        assert _run_in_thread(lambda: A + B) is expr
+        assert len(tmp_cache) == 0
+    with no_instance_caching():
+        assert not Expression.instance_caching
+        assert _run_in_thread(lambda: Expression.instance_caching)
+    with hash_consing():
+        assert not _run_in_thread(lambda: Expression.hash_consing)
+
+
+def test_set_instance_cache_global():
+    """Test that a cache installed with set_instance_cache is used by all
+    threads"""
+    cache = InstanceCache(maxsize=100)
+    orig_cache = set_instance_cache(cache, cls=OperatorPlus)
+    try:
+        assert _run_in_thread(lambda: OperatorPlus._instances) is cache
+        A = OperatorSymbol('A', hs=0)
+        B = OperatorSymbol('B', hs=0)
+        expr = _run_in_thread(lambda: A + B)
+        assert expr in cache.values()
+    finally:
+        set_instance_cache(orig_cache, cls=OperatorPlus)
+    assert OperatorPlus._instances is orig_cache
+
+
+def test_thread_local_var():
+    """Test the fallback for contextvars.ContextVar on Python < 3.7"""
+    var = _ThreadLocalVar('var', default=0)
+    assert var.get() == 0
+    token1 = var.set(1)
+    token2 = var.set(2)
+    assert var.get() == 2
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(var.get).result() == 0
+    var.reset(token2)
+    assert var.get() == 1
+    var.reset(token1)
+    assert var.get() == 0
+    with pytest.raises(ValueError):
+        _ThreadLocalVar('other').reset(token1)
+    with pytest.raises(LookupError):
+        _ThreadLocalVar('other').get()
+    assert _ThreadLocalVar('other').get(3) == 3
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Benchmark the memory used by a large instance cache.
+
+Run as::
+
+    python tests/benchmarks/bench_cache_memory.py [N]
+
+Fill the instance cache with `N` (default 10^6) new expressions: 50%
+:class:`~qnet.algebra.operator_algebra.LocalSigma`, 30%
+:class:`~qnet.algebra.operator_algebra.ScalarTimesOperator`, and 20%
+:class:`~qnet.algebra.operator_algebra.OperatorTimes` (including the operator
+symbols they are made of). Print the increase of the maximum resident set
+size of the process, and the size of a single instance of each class. This
+requires the :mod:`resource` module (i.e., a Unix system).
+"""
+import gc
+import resource
+import sys
+from timeit import default_timer
+
+from qnet.algebra.abstract_algebra import Expression
+from qnet.algebra.hilbert_space_algebra import LocalSpace
+from qnet.algebra.operator_algebra import (
+    LocalSigma, OperatorSymbol, OperatorTimes, ScalarTimesOperator)
+
+
+def max_rss():
+    """Maximum resident set size of the current process, in bytes"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return max_rss
+    return 1024 * max_rss  # in kilobytes on Linux
+
+
+def instance_size(expr):
+    """Size of `expr` in bytes, including its instance dict, if any"""
+    size = sys.getsizeof(expr)
+    if hasattr(expr, '__dict__'):
+        size += sys.getsizeof(expr.__dict__)
+    return size
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    n = int(float(argv[0])) if len(argv) > 0 else 10**6
+    hs = LocalSpace('q')
+    A = OperatorSymbol('A', hs=hs)
+    B = OperatorSymbol('B', hs=LocalSpace('r'))
+    n_sigma, n_scalar = n // 2, (3 * n) // 10
+    n_times = n - n_sigma - n_scalar
+    cache = Expression._instances
+    n_cached = len(cache)
+    gc.collect()
+    rss_start = max_rss()
+    t_start = default_timer()
+    for i in range(n_sigma):
+        sigma = LocalSigma.create(i, i + 1, hs=hs)
+    for i in range(n_scalar):
+        scalar = ScalarTimesOperator.create(i + 2, A)
+    for i in range(n_times):
+        times = OperatorTimes.create(OperatorSymbol('A_%d' % i, hs=hs), B)
+    t_fill = default_timer() - t_start
+    rss_increase = max_rss() - rss_start
+    n_new = len(cache) - n_cached
+    print("filled the instance cache with %d expressions in %.1f s"
+          % (n_new, t_fill))
+    print("max RSS increase: %.0f MB (%.0f bytes per expression)"
+          % (rss_increase / 2**20, rss_increase / n_new))
+    for expr in (sigma, scalar, times):
+        print("size of a %s instance: %d bytes (%s)" % (
+            expr.__class__.__name__, instance_size(expr),
+            'with __dict__' if hasattr(expr, '__dict__') else 'slots only'))
+
+
+if __name__ == "__main__":
+    main()
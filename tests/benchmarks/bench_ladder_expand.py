@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Benchmark the expansion of powers and products of ladder operators.
+
+Run as::
+
+    python tests/benchmarks/bench_ladder_expand.py [KMAX]
+
+For every `k` up to `KMAX` (default 20), print the time (in seconds) of
+expanding ``(a + a^dag)^k`` and ``a^k a^dag^k``, each with an empty instance
+cache.
+"""
+import sys
+from timeit import default_timer
+
+from qnet.algebra.abstract_algebra import (
+    Expression, temporary_instance_cache)
+from qnet.algebra.operator_algebra import Destroy, OperatorTimes
+
+
+def time_expand(expr_factory):
+    """Return the time for expanding the expression returned by
+    `expr_factory`, with an empty instance cache"""
+    with temporary_instance_cache(Expression):
+        expr = expr_factory()
+        t_start = default_timer()
+        expr.expand()
+        return default_timer() - t_start
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    kmax = int(argv[0]) if len(argv) > 0 else 20
+    a = Destroy(hs=1)
+    ad = a.dag()
+    print("%4s %16s %16s" % ('k', '(a + a^dag)^k', 'a^k a^dag^k'))
+    for k in range(1, kmax + 1):
+        t_sum = time_expand(lambda: (a + ad)**k)
+        t_prod = time_expand(
+            lambda: OperatorTimes.create(*([a] * k + [ad] * k)))
+        print("%4d %16.4f %16.4f" % (k, t_sum, t_prod))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Benchmark compiled patterns against the pattern interpreter.
+
+Run as::
+
+    python tests/benchmarks/bench_pattern_compile.py
+
+Match the binary rules of
+:class:`~qnet.algebra.operator_algebra.OperatorTimes` and
+:class:`~qnet.algebra.operator_algebra.OperatorPlus` against all pairs of a
+set of typical operands, and print the average time per match for
+:func:`~qnet.algebra.pattern_matching.match_pattern` and for the matchers
+returned by :meth:`~qnet.algebra.pattern_matching.Pattern.compile`.
+"""
+from timeit import default_timer
+
+from sympy import Symbol
+
+from qnet.algebra.hilbert_space_algebra import LocalSpace
+from qnet.algebra.operator_algebra import (
+    Create, Destroy, Displace, IdentityOperator, LocalProjector, LocalSigma,
+    OperatorPlus, OperatorSymbol, OperatorTimes, Phase, ZeroOperator)
+from qnet.algebra.pattern_matching import ProtoExpr, match_pattern
+
+
+def operands():
+    """List of typical operands"""
+    hs = LocalSpace('q')
+    alpha = Symbol('alpha')
+    A = OperatorSymbol('A', hs=hs)
+    return [
+        2, alpha, ZeroOperator, IdentityOperator, Destroy(hs=hs),
+        Create(hs=hs), LocalSigma(0, 1, hs=hs), LocalSigma(1, 1, hs=hs),
+        LocalProjector(0, hs=hs), Phase(alpha, hs=hs),
+        Displace(alpha, hs=hs), A, 2 * A, alpha * Destroy(hs=hs),
+        A + OperatorSymbol('B', hs=hs)]
+
+
+def best_time(func, repeat=5):
+    """Return the minimum time (in seconds) of `repeat` calls of `func`"""
+    times = []
+    for i in range(repeat):
+        t_start = default_timer()
+        func()
+        times.append(default_timer() - t_start)
+    return min(times)
+
+
+def main():
+    patterns = [
+        pat for cls in (OperatorTimes, OperatorPlus)
+        for (pat, replacement) in cls._binary_rules.values()]
+    matchers = [pat.compile() for pat in patterns]
+    exprs = [
+        ProtoExpr([first, second], {})
+        for first in operands() for second in operands()]
+    n_matches = len(patterns) * len(exprs)
+
+    def interpreted():
+        for pat in patterns:
+            for expr in exprs:
+                match_pattern(pat, expr)
+
+    def compiled():
+        for matcher in matchers:
+            for expr in exprs:
+                matcher(expr)
+
+    t_interpreted = best_time(interpreted) / n_matches
+    t_compiled = best_time(compiled) / n_matches
+    print("%d rules x %d operand pairs" % (len(patterns), len(exprs)))
+    print("interpreted: %.2f us per match" % (1e6 * t_interpreted))
+    print("compiled:    %.2f us per match" % (1e6 * t_compiled))
+    print("speedup:     %.1fx" % (t_interpreted / t_compiled))
+
+
+if __name__ == "__main__":
+    main()
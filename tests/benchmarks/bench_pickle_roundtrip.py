@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Benchmark the size and time of a pickle round trip of an SLH model.
+
+Run as::
+
+    python tests/benchmarks/bench_pickle_roundtrip.py [N_CAVITIES]
+
+For a cascade of `N_CAVITIES` (default 20) single-mode cavities, print the
+size of the pickled SLH model, and the best time (of 5) for pickling it and
+for unpickling it, both with an empty instance cache for every load (as in a
+fresh worker process), and with the instance cache of the current process.
+"""
+import pickle
+import sys
+from timeit import default_timer
+
+import sympy
+
+from qnet.algebra.abstract_algebra import (
+    Expression, temporary_instance_cache)
+from qnet.algebra.circuit_algebra import SLH
+from qnet.algebra.hilbert_space_algebra import LocalSpace
+from qnet.algebra.operator_algebra import Destroy
+
+
+def cascade(n):
+    """SLH model for a cascade of `n` cavities"""
+    slh = None
+    for i in range(n):
+        a = Destroy(hs=LocalSpace('c%d' % i))
+        kappa = sympy.symbols('kappa_%d' % i, positive=True)
+        cavity = SLH([[1]], [sympy.sqrt(kappa) * a], i * a.dag() * a)
+        slh = cavity if slh is None else cavity << slh
+    return slh.toSLH()
+
+
+def best_time(func, repeat=5):
+    """Return the minimum time (in seconds) of `repeat` calls of `func`"""
+    times = []
+    for i in range(repeat):
+        t_start = default_timer()
+        func()
+        times.append(default_timer() - t_start)
+    return min(times)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    n_cavities = int(argv[0]) if len(argv) > 0 else 20
+    slh = cascade(n_cavities)
+    data = pickle.dumps(slh)
+
+    def load():
+        with temporary_instance_cache(Expression):
+            return pickle.loads(data)
+
+    assert load() == slh
+    print("cascade of %d cavities" % n_cavities)
+    print("size: %d bytes" % len(data))
+    print("dump: %.2f ms" % (1000 * best_time(lambda: pickle.dumps(slh))))
+    print("load (empty cache): %.2f ms" % (1000 * best_time(load)))
+    print("load (warm cache): %.2f ms"
+          % (1000 * best_time(lambda: pickle.loads(data))))
+
+
+if __name__ == "__main__":
+    main()
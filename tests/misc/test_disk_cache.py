@@ -0,0 +1,216 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Test the persistent cache for circuit reductions"""
+
+import os
+
+import pytest
+import sympy
+
+from qnet.algebra.circuit_algebra import (
+    CircuitSymbol, SLH, connect, set_circuit_cache)
+from qnet.algebra.operator_algebra import OperatorSymbol, Destroy
+from qnet.circuit_components.mach_zehnder_cc import MachZehnder
+from qnet.misc.disk_cache import DiskCache
+
+
+class CountingCache(dict):
+    """In-memory cache that counts lookups"""
+
+    def __init__(self):
+        super().__init__()
+        self.hits = 0
+        self.misses = 0
+
+    def __getitem__(self, key):
+        try:
+            value = super().__getitem__(key)
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        return value
+
+
+@pytest.fixture
+def circuit_cache():
+    cache = CountingCache()
+    orig_cache = set_circuit_cache(cache)
+    yield cache
+    set_circuit_cache(orig_cache)
+
+
+def test_disk_cache(tmpdir):
+    """Test storing and retrieving entries"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    cache = DiskCache(str(tmpdir))
+    key = ('toSLH', A * B)
+    with pytest.raises(KeyError):
+        cache[key]
+    cache[key] = A + B
+    assert key in cache
+    assert cache[key] == A + B
+    assert len(cache) == 1
+    assert list(cache) == [key]
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    # a new process sees the same entries
+    assert DiskCache(str(tmpdir))[key] == A + B
+    del cache[key]
+    assert key not in cache
+    with pytest.raises(KeyError):
+        del cache[key]
+    cache[key] = A + B
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_disk_cache_lru(tmpdir):
+    """Test that the least recently used entries are evicted"""
+    A = OperatorSymbol('A', hs=0)
+    keys = [('expand', n * A) for n in range(2, 5)]
+    cache = DiskCache(str(tmpdir))
+    cache[keys[0]] = A
+    cache[keys[1]] = A
+    cache.maxsize = cache.stats()['nbytes']  # room for two entries
+    # make sure keys[1] was used less recently than keys[0]
+    os.utime(cache._filename(keys[0]), ns=(2, 2))
+    os.utime(cache._filename(keys[1]), ns=(1, 1))
+    cache[keys[2]] = A
+    assert keys[0] in cache
+    assert keys[1] not in cache
+    assert keys[2] in cache
+    assert cache.evictions == 1
+
+
+def test_disk_cache_corrupted(tmpdir):
+    """Test that unreadable files are ignored"""
+    A = OperatorSymbol('A', hs=0)
+    cache = DiskCache(str(tmpdir))
+    cache[('toSLH', A)] = A
+    with open(cache._filename(('toSLH', A)), 'wb') as out_fh:
+        out_fh.write(b'garbage')
+    with pytest.raises(KeyError):
+        cache[('toSLH', A)]
+    cache[('toSLH', A)] = A
+    assert cache[('toSLH', A)] == A
+
+
+def test_toSLH_cached(circuit_cache):
+    """Test that toSLH and creduce use the circuit cache"""
+    circuit = MachZehnder('Zender')
+    slh = circuit.toSLH()
+    assert circuit_cache.misses == 1
+    assert circuit.toSLH() == slh
+    assert circuit_cache.hits == 1
+    # conversion of the sub-components is not cached separately
+    assert list(circuit_cache) == [('toSLH', circuit)]
+    reduced = circuit.creduce()
+    assert circuit.creduce() == reduced
+    assert circuit_cache.hits == 2
+    # converting an SLH object is trivial and not cached
+    assert slh.toSLH() is slh
+    assert len(circuit_cache) == 2
+
+
+def test_connect_cached(circuit_cache):
+    """Test that connect uses the circuit cache, independently of how the
+    connections are specified"""
+    A = CircuitSymbol('A', 1)
+    B = CircuitSymbol('B', 1)
+    C = CircuitSymbol('C', 2)
+    res = connect([A, B, C], [((0, 0), (2, 0)), ((1, 0), (2, 1))])
+    assert res == (C << A + B)
+    assert connect([A, B, C], [((A, 0), (C, 0)), ((B, 0), (C, 1))]) == res
+    assert circuit_cache.misses == 1
+    assert circuit_cache.hits == 1
+
+
+def test_expand_cached(circuit_cache, tmpdir):
+    """Test that an expanded and simplified SLH model is taken from a
+    DiskCache"""
+    set_circuit_cache(DiskCache(str(tmpdir)))
+    slh = MachZehnder('Zender').toSLH()
+    expanded = slh.expand().simplify_scalar()
+    cache = DiskCache(str(tmpdir))
+    set_circuit_cache(cache)
+    assert MachZehnder('Zender').toSLH() == slh
+    assert slh.expand().simplify_scalar() == expanded
+    assert isinstance(expanded, SLH)
+    assert cache.hits == 3
+    assert cache.misses == 0
+
+
+def test_uncacheable_key(tmpdir):
+    """Test that an SLH model that cannot be stored in a DiskCache is
+    processed without caching"""
+    cache = DiskCache(str(tmpdir))
+    orig_cache = set_circuit_cache(cache)
+    try:
+        a = Destroy(hs=1)
+        x = sympy.Dummy('x')
+        slh = SLH([[1]], [a], x * a.dag() * (a + 1))
+        expected = SLH([[1]], [a], x * a.dag() * a + x * a.dag())
+        assert slh.expand() == expected
+        assert slh.expand().simplify_scalar() == expected
+        assert len(cache) == 0
+        # callable strategies are not part of the key
+        slh = SLH([[1]], [a], a.dag() * a)
+        assert slh.simplify_scalar(strategy=lambda s: s) == slh
+        assert len(cache) == 0
+        assert slh.simplify_scalar(strategy='expand_cancel') == slh
+        assert len(cache) == 1
+    finally:
+        set_circuit_cache(orig_cache)
+
+
+class UnstorableCache(dict):
+    """In-memory cache that cannot store any value"""
+
+    def __setitem__(self, key, value):
+        raise TypeError("Cannot serialize %r" % value)
+
+
+def test_unstorable_result():
+    """Test that a result that cannot be stored in the cache is returned"""
+    orig_cache = set_circuit_cache(UnstorableCache())
+    try:
+        a = Destroy(hs=1)
+        slh = SLH([[1]], [a], a.dag() * (a + 1))
+        assert slh.expand() == SLH([[1]], [a], a.dag() * a + a.dag())
+    finally:
+        set_circuit_cache(orig_cache)
+
+
+class CustomOperatorSymbol(OperatorSymbol):
+    """Operator symbol defined outside of QNET"""
+    pass
+
+
+def test_trusted_modules(tmpdir):
+    """Test that entries with classes from outside of QNET are only loaded
+    from trusted modules"""
+    expr = CustomOperatorSymbol('X', hs=1) * OperatorSymbol('Y', hs=1)
+    key = ('custom', expr)
+    DiskCache(str(tmpdir))[key] = expr
+    assert key not in DiskCache(str(tmpdir))
+    cache = DiskCache(
+        str(tmpdir), trusted=[CustomOperatorSymbol.__module__])
+    assert cache[key] == expr
@@ -0,0 +1,222 @@
+# This file is part of QNET.
+#
+#    QNET is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    QNET is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with QNET.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2012-2017, QNET authors (see AUTHORS file)
+#
+###########################################################################
+"""Test the binary serialization format"""
+
+import io
+
+import numpy as np
+import sympy
+import pytest
+
+from qnet.algebra.abstract_algebra import (
+    hash_consing, temporary_instance_cache)
+from qnet.algebra.circuit_algebra import SLH
+from qnet.algebra.hilbert_space_algebra import LocalSpace
+from qnet.algebra.matrix_algebra import Matrix
+from qnet.algebra.operator_algebra import (
+    OperatorSymbol, OperatorPlus, Destroy, LocalSigma, IdentityOperator,
+    ZeroOperator)
+from qnet.algebra.state_algebra import BasisKet
+from qnet.circuit_components.mach_zehnder_cc import MachZehnder
+from qnet.misc import serialization
+from qnet.misc.serialization import (
+    FORMAT_VERSION, dump, dumps, load, loads, register_trusted_module)
+
+
+def _cascade(n):
+    """SLH model for a cascade of `n` cavities"""
+    slh = None
+    for i in range(n):
+        a = Destroy(hs=LocalSpace('c%d' % i))
+        kappa = sympy.symbols('kappa_%d' % i, positive=True)
+        cavity = SLH([[1]], [sympy.sqrt(kappa) * a], i * a.dag() * a)
+        slh = cavity if slh is None else cavity << slh
+    return slh.toSLH()
+
+
+def _exprs():
+    hs = LocalSpace('q', basis=('g', 'e'))
+    A = OperatorSymbol('A', hs=hs)
+    x = sympy.Symbol('x', positive=True)
+    t = sympy.Symbol('t')
+    return [
+        A, ZeroOperator, 2.5 * A, (1 + 2j) * A, sympy.Float('0.1', 30) * A,
+        (sympy.pi * sympy.I * x + sympy.Rational(-1, 3)) * A,
+        sympy.Function('Omega')(t) * A + sympy.exp(-t) * A.dag(),
+        LocalSigma('g', 'e', hs=hs), BasisKet('e', hs=hs),
+        Matrix([[A, 0], [1, IdentityOperator]]), Matrix(np.eye(2)),
+        _cascade(3), MachZehnder('Zender').creduce(),
+        1.5, -(2**70), sympy.sqrt(2) * x, (A, [1, 2.0, None], {'a': True})]
+
+
+@pytest.mark.parametrize('expr', _exprs())
+def test_roundtrip(expr):
+    """Test that expressions are restored exactly"""
+    data = dumps(expr)
+    assert data.startswith(b'QNETDAG\x00')
+    assert loads(data) == expr
+    assert type(loads(data)) == type(expr)
+    assert loads(data, create=True) == expr
+
+
+def test_matrix_dtype():
+    """Test that the dtype of a numeric Matrix is preserved"""
+    matrix = Matrix(np.array([[1, 2], [3, 4]], dtype=np.int8))
+    assert loads(dumps(matrix)).matrix.dtype == np.int8
+
+
+def test_file(tmpdir):
+    """Test writing to and reading from files and buffers"""
+    slh = _cascade(4)
+    filename = str(tmpdir.join('slh.qnet'))
+    dump(slh, filename)
+    assert load(filename) == slh
+    buffer = io.BytesIO()
+    dump(slh, buffer)
+    buffer.seek(0)
+    assert load(buffer) == slh
+
+
+class _TrickleReader(io.RawIOBase):
+    """Non-seekable stream that returns at most 3 bytes per read"""
+
+    def __init__(self, data):
+        self.buffer = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        chunk = self.buffer.read(min(len(b), 3))
+        b[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def test_stream():
+    """Test reading several expressions from a single stream, incrementally,
+    and that truncated data is rejected"""
+    A = OperatorSymbol('A', hs=0)
+    slh = _cascade(2)
+    buffer = io.BytesIO()
+    dump(slh, buffer)
+    dump(A, buffer)
+    buffer.seek(0)
+    assert load(buffer) == slh
+    assert load(buffer) == A
+    assert buffer.read() == b''
+    assert load(_TrickleReader(dumps(slh))) == slh
+    with pytest.raises(ValueError) as exc_info:
+        load(io.BytesIO(dumps(slh)[:-3]))
+    assert 'end of data' in str(exc_info.value)
+    with pytest.raises(ValueError):
+        loads(b'')
+
+
+def test_compact():
+    """Test that repeated sub-expressions and scalars are stored only once"""
+    a = Destroy(hs=LocalSpace('c'))
+    g = sympy.symbols('g', positive=True)
+    term = sympy.sqrt(g) * a
+    single = len(dumps(term))
+    expr = OperatorPlus(term, term.dag(), term * term)
+    assert len(dumps(expr)) < 2 * single
+
+
+def test_not_normalized():
+    """Test that expressions that were instantiated directly survive"""
+    A = OperatorSymbol('A', hs=0)
+    expr = OperatorPlus(A, A)
+    assert isinstance(loads(dumps(expr)), OperatorPlus)
+    assert isinstance(loads(dumps(expr), create=True), OperatorPlus)
+
+
+def test_sympy_not_evaluated():
+    """Test that Sympy scalars are restored without evaluating them"""
+    x = sympy.symbols('x')
+    for scalar in (sympy.Add(x, x, evaluate=False),
+                   sympy.Pow(10, 10**9, evaluate=False),
+                   sympy.sin(sympy.pi, evaluate=False)):
+        loaded = loads(dumps(scalar))
+        assert loaded.func is scalar.func
+        assert loaded.args == scalar.args
+
+
+def test_create():
+    """Test that with create=True, sub-expressions are interned"""
+    A = OperatorSymbol('A', hs=0)
+    B = OperatorSymbol('B', hs=0)
+    expr = A * B + B
+    data = dumps(expr)
+    with temporary_instance_cache(OperatorPlus):
+        expr1 = loads(data, create=True)
+        assert loads(data, create=True) is expr1
+        assert loads(data) is not expr1
+    with hash_consing():
+        assert loads(data) is loads(data)
+
+
+def test_invalid_data():
+    """Test that invalid data or a newer format version are rejected"""
+    data = dumps(OperatorSymbol('A', hs=0))
+    with pytest.raises(ValueError) as exc_info:
+        loads(b'garbage' + data)
+    assert 'not in the QNET binary format' in str(exc_info.value)
+    newer = (data[:8] + (FORMAT_VERSION + 1).to_bytes(2, 'little') +
+             data[10:])
+    with pytest.raises(ValueError) as exc_info:
+        loads(newer)
+    assert 'newer' in str(exc_info.value)
+    with pytest.raises(TypeError):
+        dumps(OperatorSymbol('A', hs=0) * sympy.Dummy('d'))
+
+
+class _LocalOperatorSymbol(OperatorSymbol):
+    pass
+
+
+def test_untrusted_names():
+    """Test that only names from trusted modules are resolved"""
+    name = b'qnet.algebra.operator_algebra:OperatorSymbol'
+    data = dumps(OperatorSymbol('A', hs=0))
+    assert data.count(bytes([len(name)]) + name) == 1
+    for untrusted in (b'os:system', b'qnet:__builtins__.eval'):
+        with pytest.raises(ValueError) as exc_info:
+            loads(data.replace(
+                bytes([len(name)]) + name,
+                bytes([len(untrusted)]) + untrusted))
+        assert 'name' in str(exc_info.value).lower()
+
+
+def test_trusted_modules():
+    """Test loading instances of classes defined outside of QNET"""
+    module = _LocalOperatorSymbol.__module__
+    expr = _LocalOperatorSymbol('X', hs=1) * OperatorSymbol('Y', hs=1)
+    data = dumps(expr)
+    with pytest.raises(ValueError) as exc_info:
+        loads(data)
+    assert 'register_trusted_module' in str(exc_info.value)
+    assert loads(data, trusted=[module]) == expr
+    assert loads(data, trusted=[module.split('.')[0]]) == expr
+    with pytest.raises(ValueError):
+        loads(data, trusted=[module + '_other'])
+    register_trusted_module(module)
+    try:
+        assert loads(data) == expr
+    finally:
+        serialization._TRUSTED_MODULES.discard(module)